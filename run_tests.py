@@ -46,6 +46,7 @@ from vis.tests import test_barchart
 from vis.tests import test_offset
 from vis.tests import test_indexed_piece
 from vis.tests import test_aggregated_pieces
+from vis.tests import test_patterns
 from vis.tests import bwv2_integration_tests as bwv2
 from vis.tests import bwv603_integration_tests as bwv603
 # NB: The WorkflowManager is deprecated, though most of its tests still pass.
@@ -74,6 +75,8 @@ THE_TESTS = (  # Indexer and Subclasses
              test_interval_indexer.INTERVAL_INDEXER_LONG_SUITE,
              test_interval_indexer.INT_IND_INDEXER_SUITE,
              test_interval_indexer.HORIZ_INT_IND_LONG_SUITE,
+             test_interval_indexer.INTERVAL_PAIRS_SUITE,
+             test_interval_indexer.INTERVAL_ENGINE_SUITE,
              test_repeat.REPEAT_INDEXER_SUITE,
              test_ngram.NGRAM_INDEXER_SUITE,
              test_dissonance_indexer.DISSONANCE_INDEXER_SUITE,
@@ -94,7 +97,9 @@ THE_TESTS = (  # Indexer and Subclasses
              test_indexed_piece.INDEXED_PIECE_SUITE_A,
              test_indexed_piece.INDEXED_PIECE_PARTS_TITLES,
              test_indexed_piece.INDEXED_PIECE_SUITE_C,
+             test_indexed_piece.INDEXED_PIECE_INTERVALS,
              test_aggregated_pieces.AGGREGATED_PIECES_SUITE,
+             test_patterns.PATTERN_SET_SUITE,
              # NB: Most of these WorkflowManager tests pass but they are commented out because the WorkflowManager is deprecated.
              # # WorkflowManager 
              # test_workflow.WORKFLOW_TESTS,  # FutureWarning: sort(columns) is depracated, use sort_values(by=...)
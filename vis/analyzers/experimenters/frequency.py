@@ -33,6 +33,7 @@ Experimenters that deal with the frequencies (number of occurrences) of events.
 import six
 import pandas
 from vis.analyzers import experimenter
+from vis.analyzers.indexers.noterest import RaggedMultiStop
 
 
 class FrequencyExperimenter(experimenter.Experimenter):
@@ -56,7 +57,7 @@ class FrequencyExperimenter(experimenter.Experimenter):
     def __init__(self, index, settings=None):
         """
         :param index: The data in which to count frequencies.
-        :type index: :class:`pandas.DataFrame` or list of :class:`pandas.DataFrame`
+        :type index: :class:`pandas.DataFrame`, :class:`RaggedMultiStop`, or a list of them
         :param settings: Optional dictionary with the settings described above in
             :const:`possible_settings`.
         :type settings: dict or NoneType
@@ -94,11 +95,18 @@ class FrequencyExperimenter(experimenter.Experimenter):
         """
 
         # ensure we have a list of DatFrame
-        if isinstance(self._index, pandas.DataFrame):
+        if isinstance(self._index, (pandas.DataFrame, RaggedMultiStop)):
             uncounted = [self._index]
         else:
             uncounted = self._index
 
+        # ragged multi-stop results can be counted without unpacking them, unless they're not in
+        # the selected 'column'
+        ragged = [self._settings['column'] in (None, RaggedMultiStop.name) and
+                  isinstance(each_df, RaggedMultiStop) for each_df in uncounted]
+        uncounted = [each_df.to_frame() if isinstance(each_df, RaggedMultiStop) and not is_ragged
+                     else each_df for each_df, is_ragged in zip(uncounted, ragged)]
+
         # if there's a 'column', select it from every DataFrame
         if self._settings['column'] is not None:
             def select_func(column_label):
@@ -111,14 +119,18 @@ class FrequencyExperimenter(experimenter.Experimenter):
                 else:
                     return column_label[0] == self._settings['column']
 
-            uncounted = [df.select(select_func, axis=1) for df in uncounted]
+            uncounted = [df if is_ragged else df.select(select_func, axis=1)
+                         for df, is_ragged in zip(uncounted, ragged)]
 
         # get the value_counts() on every Series
         counted = []
-        for each_df in uncounted:
-            each_df_results = {}
-            for col_name in each_df:
-                each_df_results[col_name] = each_df[col_name].value_counts()
+        for each_df, is_ragged in zip(uncounted, ragged):
+            if is_ragged:
+                each_df_results = each_df.value_counts()
+            else:
+                each_df_results = {}
+                for col_name in each_df:
+                    each_df_results[col_name] = each_df[col_name].value_counts()
             each_df = pandas.DataFrame(each_df_results)
             # make the MultiIndex and its labels
             if isinstance(each_df.columns[0], tuple):
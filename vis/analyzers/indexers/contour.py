@@ -25,75 +25,92 @@
 # -------------------------------------------------------------------- #
 """
 .. codeauthor:: Marina Cottrell <marinaborsodibenson@gmail.com>
-.. todo:: Properly document the ``COM_matrix`` and ``compare`` 
-    functions.
 
 """
 
 from vis.analyzers import indexer
 import music21
+import numpy
 import pandas
 
-def COM_matrix(contour):
+def _parse(contour):
     """
-    Creates a matrix representing the contour given.
+    Used internally to turn a contour like ``'[4, 0, 1, 3, 2]'`` into 
+    an array of its numbers.
     """
-    com = []
-
-    contour = contour.replace(' ', '')
-    contour = contour.replace('[', '')
-    contour = contour.replace(']', '')
-    contour = contour.split(',')
-
-    for x in contour:
-        com.append([])
-    for i in range(len(contour)):
-        for x in range(len(contour)):
-            if contour[i] == contour[x]:
-                com[i].append("0")
-            elif contour[i] > contour[x]:
-                com[i].append("-")
-            else:
-                com[i].append("+")
-
-    return com
+    contour = contour.replace(' ', '').replace('[', '').replace(']', '')
+    return numpy.array([int(x) for x in contour.split(',') if x != ''], dtype=numpy.int64)
 
-def getContour(notes):
+def _contours(heights, spellings, length):
     """
-    Method used internally by the ``ContourIndexer`` class to convert 
-    pitches into contour numbers.
+    Used internally to find the contour of every run of ``length`` 
+    consecutive notes at once. ``heights`` holds the pitch-space number 
+    of each note and ``spellings`` a number for each way a note is 
+    written, and the contour number of a note is how many different 
+    spellings in its window are at or below it, other than its own.
+
+    :returns: The contours, one row for each note that starts a window.
+    :rtype: 2-D :class:`numpy.ndarray` of int
     """
+    rows = numpy.arange(len(heights) - length + 1)[:, numpy.newaxis] + numpy.arange(length)
+    heights = numpy.asarray(heights)[rows]
+    spellings = numpy.asarray(spellings)[rows]
+    # a spelling is only counted at its first appearance in a window
+    earlier = numpy.tril(numpy.ones((length, length), dtype=bool), -1)
+    repeated = ((spellings[:, :, numpy.newaxis] == spellings[:, numpy.newaxis, :]) & earlier).any(axis=2)
+    below = heights[:, numpy.newaxis, :] <= heights[:, :, numpy.newaxis]
+    return (below & ~repeated[:, numpy.newaxis, :]).sum(axis=2) - 1
+
+def _pitch_codes(notes):
+    """
+    Used internally to find the pitch-space number and a spelling 
+    number of every note, making each different note only once.
+    """
+    codes, uniques = pandas.factorize(list(notes))
+    pitches = [music21.pitch.Pitch(x) for x in uniques]
+    spellings = pandas.factorize([x.nameWithOctave for x in pitches])[0]
+    return numpy.array([x.ps for x in pitches])[codes], spellings[codes]
 
-    contour = list(map(music21.note.Note, notes))
-
-    cseg = [0] * len(contour)
+def COM_matrix(contour):
+    """
+    Creates a matrix representing the contour given, which compares 
+    every note with every other. Where the note of a row is higher than 
+    the note of a column the matrix has ``'-'``, where it is lower 
+    ``'+'``, and where they are the same ``'0'``.
 
-    for i in range(len(contour)):
-        notes = []
+    :param contour: A contour as returned by :func:`getContour`, such 
+        as ``'[4, 0, 1, 3, 2]'``.
+    :type contour: str
 
-        for x in range(len(contour)):
-            if ((music21.interval.getAbsoluteHigherNote(contour[i], contour[x]) == contour[i]) and 
-                (contour[i].nameWithOctave != contour[x].nameWithOctave) and 
-                (contour[x].nameWithOctave not in notes)):
-                notes.append(contour[x].nameWithOctave)
-                cseg[i] += 1
+    :returns: The matrix, as a list of its rows.
+    :rtype: list of list of str
+    """
+    contour = _parse(contour)
+    signs = numpy.sign(contour[numpy.newaxis, :] - contour[:, numpy.newaxis])
+    return numpy.array(['-', '0', '+'])[signs + 1].tolist()
 
-    return str(cseg)
+def getContour(notes):
+    """
+    Method used internally by the ``ContourIndexer`` class to convert 
+    pitches into contour numbers.
+    """
+    heights, spellings = _pitch_codes(notes)
+    return str(_contours(heights, spellings, len(heights))[0].tolist())
 
 def compare(contour1, contour2):
     """
-    Additional method to compare ``COM_matrices``.
-    """
+    Additional method to compare ``COM_matrices``, as made by 
+    :func:`COM_matrix`. This is the proportion of the pairs of notes 
+    that go the same way in both.
 
-    count = 0
+    :returns: The similarity of the contours, from ``0.0`` to ``1.0``.
+    :rtype: float
+    """
     l = len(contour1)
-    for row in range(l):
-        for c1, c2 in zip(contour1[row], contour2[row]):
-            if c1 == c2:
-                count += 1
+    count = int((numpy.array(contour1) == numpy.array(contour2)).sum())
 
-    count = float((count - l) / 2)
-    total = float((l * (l - 1)) / 2)
+    count = float((count - l) // 2)
+    total = float((l * (l - 1)) // 2)
     
     return count / total
 
@@ -183,30 +200,17 @@ class ContourIndexer(indexer.Indexer):
         """
 
         contours = []
+        length = self.settings['length']
 
         for v, voice in enumerate(self.score.columns.values):
 
-            part = self.score[voice].tolist()
-            index = self.score.index.tolist()
-            new_index = []
-            voice_con = []
-            for x in range(len(part)-self.settings['length']+1):
-                cont = []
-
-                if part[x] == 'Rest' or type(part[x]) == float:
-                    pass
-                else:
-                    cont.append(part[x])
-                    y = 1
-                    while (len(cont) < self.settings['length']) and (x+y < len(part)):
-                        if part[x+y] == 'Rest' or type(part[x+y]) == float:
-                            pass
-                        else:
-                            cont.append(part[x+y])
-                        y+=1
-                if len(cont) == self.settings['length']:
-                    voice_con.append(getContour(cont))
-                    new_index.append(index[x])
+            part = self.score[voice]
+            # the windows skip the rests, so they are made from the notes alone
+            notes = part[part.notnull() & (part != 'Rest')]
+            heights, spellings = _pitch_codes(notes.values)
+            found = _contours(heights, spellings, length)
+            voice_con = [str(x) for x in found.tolist()]
+            new_index = notes.index[:len(voice_con)].tolist()
 
             voice = pandas.Series(voice_con, index=new_index, name=str(v))
             contours.append(voice)
@@ -27,6 +27,8 @@
 .. codeauthor:: Alexander Morgan
 .. codeauthor:: Christopher Antila <christopher@antila.ca>
 """
+import multiprocessing as mp
+import time
 import pandas
 import numpy
 from numpy import nan  # pylint: disable=no-name-in-module
@@ -86,6 +88,17 @@ _Xed_makers = {
     '-d5':[u'-M6'], 
     '-A4':[u'-m3']
 }
+# How the durations and beat strengths in each time signature have to be 
+# scaled to compare them to the thresholds in the dissonance rules, which 
+# are written for 4/2: the duration that counts as a quarter note, and 
+# the factor for every beat strength but a downbeat's. Other time 
+# signatures are treated like 4/2.
+_meter_scales = mkd({
+    ('4/2', '2/1', '3/1'): (1.0, 1.0),
+    ('4/4', '2/2'): (0.5, 1.0),
+    ('3/2',): (1.0, 0.5),
+    ('3/4', '2/4'): (0.5, 0.5)
+})
 _nan_rest = set([nan, 'Rest'])
 _ignored = _consonances.union(['Rest'])
 _go_ons = set([_no_diss_label, _unexplainable])
@@ -96,6 +109,26 @@ h_ind = u'interval.HorizontalIntervalIndexer'
 bs_ind = u'meter.NoteBeatStrengthIndexer'
 dur_ind = u'meter.DurationIndexer'
 diss_types = u'dissonance.DissonanceIndexer'
+# The indexer and sounding intervals of a worker process of DissonanceIndexer.run()
+_worker = {}
+
+
+def _start_worker(indexer):
+    """
+    Used internally to give a worker process of 
+    :meth:`DissonanceIndexer.run` the indexer whose voice pairs it 
+    classifies.
+    """
+    _worker['indexer'] = indexer
+    _worker['simuls'] = indexer._score[int_ind].ffill()
+
+
+def _classify_in_worker(col):
+    """
+    Used internally to classify the dissonances of one voice pair in a 
+    worker process of :meth:`DissonanceIndexer.run`.
+    """
+    return _worker['indexer']._classify_pair(col, _worker['simuls'])
 
 
 class DissonanceIndexer(indexer.Indexer):
@@ -143,6 +176,48 @@ class DissonanceIndexer(indexer.Indexer):
     """
     required_score_type = 'pandas.DataFrame'
 
+    possible_settings = ['processes', 'time_signatures', 'statistics']
+    """
+    A ``list`` of possible settings for the 
+    :class:`DissonanceIndexer`.
+
+    :keyword 'processes': If given, the voice pairs are classified in 
+        this many worker processes. The labels are the same as when 
+        the pairs are classified one after another, which is the 
+        default.
+    
+    :type 'processes': int or ``None``
+
+    :keyword 'time_signatures': The time signatures of the piece, as 
+        returned by ``IndexedPiece._get_time_signature()``, which 
+        ``get_data()`` provides automatically. The duration and beat 
+        strength thresholds of the dissonance types are adjusted to the 
+        time signature in effect at every offset. Supported time 
+        signatures are 4/2, 2/1, 3/1, 4/4, 2/2, 3/2, 3/4, and 2/4. If 
+        this is ``None`` (the default), or for any other time signature, 
+        the thresholds are those for 4/2.
+    
+    :type 'time_signatures': :class:`pandas.DataFrame` or ``None``
+
+    :keyword 'statistics': Whether to count how often each dissonance 
+        type is checked and found, and time the checks, for 
+        :meth:`rule_statistics`. This slows the classification down a 
+        little, so it is off by default.
+    
+    :type 'statistics': bool
+    """
+
+    default_settings = {'processes': None, 'time_signatures': None, 'statistics': False}
+
+    # The dissonance types, in the order classify() tries them. Each is 
+    # checked by the method called '_is_' and its name.
+    _RULES = ('passing_or_neigh', 'suspension', 'd3q', 'fake_suspension', 
+        'chanson_idiom', 'cambiata', 'anticipation', 'echappee', 
+        'unexplainable')
+
+    # When a rule needs the event before a dissonance but there is none.
+    _NO_PREVIOUS_EVENT = 'There is no event in {} before row {}.'
+
     def __init__(self, score, settings=None):
         """
         :param score: The output from 
@@ -151,10 +226,9 @@ class DissonanceIndexer(indexer.Indexer):
         
         :type score:  :class:`pandas.DataFrame`.
         
-        :param settings: This indexer uses no settings, so this is 
-            ignored.
+        :param settings: See :const:`possible_settings`.
         
-        :type settings: NoneType
+        :type settings: dict or NoneType
         :raises: :exc:`RuntimeError` if ``score`` is the wrong type.
         
         :raises: :exc:`RuntimeError` if ``score`` is not a list of the 
@@ -162,7 +236,161 @@ class DissonanceIndexer(indexer.Indexer):
         
         """
         super(DissonanceIndexer, self).__init__(score)
+        self._settings = DissonanceIndexer.default_settings.copy()
+        if settings is not None:
+            self._settings.update(settings)
         self._score = pandas.concat(score, axis=1)
+        self._find_attacks()
+        self._simuls_index = None
+        # for every rule, how often it was tried and matched, and the 
+        # seconds spent on it, with the 'statistics' setting; see 
+        # rule_statistics()
+        self._statistics = numpy.zeros((len(DissonanceIndexer._RULES), 3))
+
+    def _find_attacks(self):
+        """
+        Precompute everything the dissonance rules look up around a 
+        dissonance, so that each lookup takes constant time instead of 
+        a search through the score. For every column of horizontal or 
+        vertical intervals this finds, at each row, the position of the 
+        previous and of the next row with an event. It also keeps the 
+        horizontal intervals (as returned by ``_set_horiz_invl()``), 
+        durations, and beat strengths of each voice in sequences 
+        indexed by row position.
+        
+        """
+        self._before = {}
+        self._after = {}
+        self._horiz = {}
+        self._durs = {}
+        self._strengths = {}
+        places = numpy.arange(len(self._score))
+        end = len(self._score)
+        scales = self._meter_table()
+        for col, key in enumerate(self._score.columns):
+            column = self._score.iloc[:, col]
+            if key[0] in (h_ind, int_ind):
+                valid = column.notnull().values
+                latest = numpy.maximum.accumulate(numpy.where(valid, places, -1))
+                earliest = numpy.minimum.accumulate(numpy.where(valid, places, end)[::-1])[::-1]
+                self._before[key] = numpy.append(-1, latest)[:end]
+                self._after[key] = numpy.append(earliest, end)[1:]
+            if key[0] == h_ind:
+                self._horiz[key[1]] = [v if not ok or v in _nan_rest else int(v, 10)
+                                       for v, ok in zip(column.values, valid)]
+            elif key[0] == dur_ind:
+                self._durs[key[1]] = column.values
+                if scales is not None:
+                    self._durs[key[1]] = column.values / scales['unit'].values
+            elif key[0] == bs_ind:
+                self._strengths[key[1]] = column.values
+                if scales is not None:
+                    self._strengths[key[1]] = numpy.where(column.values == 1, column.values,
+                                                          column.values * scales['factor'].values)
+
+    def _meter_table(self):
+        """
+        Used internally by ``_find_attacks()`` to find how to scale the 
+        durations and beat strengths at every offset for the time 
+        signature in effect there, using ``_meter_scales``. Where parts 
+        disagree, the highest part's time signature is used, and offsets 
+        before the first time signature use that one.
+        
+        :returns: The ``'unit'`` and ``'factor'`` of every offset, or 
+            ``None`` if there are no time signatures.
+        
+        :rtype: :class:`pandas.DataFrame` or ``None``
+        """
+        meters = self._settings['time_signatures']
+        if meters is None or len(meters) == 0:
+            return None
+        meters = meters.bfill(axis=1).iloc[:, 0].dropna()
+        if len(meters) == 0:
+            return None
+        meters = meters.reindex(self._score.index, method='ffill').fillna(meters.iloc[0])
+        names = meters.unique()
+        table = pandas.DataFrame([_meter_scales[x] if x in _meter_scales else (1.0, 1.0) for x in names],
+                                 index=names, columns=['unit', 'factor'])
+        return table.loc[meters.values]
+
+    def _previous(self, key, indx):
+        """
+        Find the position of the last event before the row at ``indx`` 
+        in the column called ``key``.
+        
+        :raises: :exc:`IndexError` if there is no earlier event.
+        """
+        found = self._before[key][indx]
+        if found < 0:
+            raise IndexError(DissonanceIndexer._NO_PREVIOUS_EVENT.format(key[1], indx))
+        return found
+
+    def _next(self, key, indx):
+        """
+        Find the position of the first event after the row at ``indx`` 
+        in the column called ``key``, or ``None`` if there is none.
+        """
+        found = self._after[key][indx]
+        if found < len(self._score):
+            return found
+        return None
+
+    def _neighbourhood(self, indx, pair, prev_event):
+        """
+        Find what the dissonance rules look at around the dissonance at 
+        ``indx`` in ``pair``, so that it can be found once and given to 
+        every rule. The names are those described in the doc string of 
+        ``_is_passing_or_neigh``, and include the positions ``'a_ind'`` 
+        and ``'x_ind'``. NB ``b`` and ``y`` don't correspond to a note 
+        onset in suspensions.
+        The events before the dissonance are only found if there is a 
+        ``prev_event``, since no rule that needs them applies otherwise, 
+        and the events after it are only found by ``_following()``, for 
+        the rules that look at them.
+        
+        :returns: The voices of the pair as ``'upper'`` and ``'lower'`` 
+            and the variables around the dissonance.
+        
+        :rtype: dict
+        
+        """
+        upper, lower = pair.split(',')
+        context = {'upper': upper, 'lower': lower}
+        for voice, (a, b) in ((upper, 'ab'), (lower, 'xy')):
+            horiz = self._horiz[voice]
+            durs = self._durs[voice]
+            strengths = self._strengths[voice]
+            context[b] = horiz[indx]
+            context['dur_' + b] = durs[indx]
+            context['bs_' + b] = strengths[indx]
+            if prev_event is not None:
+                a_ind = self._previous((h_ind, voice), indx)
+                context[a + '_ind'] = a_ind
+                context[a] = horiz[a_ind]
+                context['dur_' + a] = durs[a_ind]
+        context['indx'] = indx
+        return context
+
+    def _following(self, context):
+        """
+        Add the events after the dissonance, ``c`` and ``z``, to a 
+        ``context`` from ``_neighbourhood()``, unless they're there 
+        already, with their positions ``'c_ind'`` and ``'z_ind'``. ``c`` 
+        and ``z`` are ``0`` if there is no later event, and then 
+        ``dur_c``, ``bs_c``, ``dur_z`` and ``bs_z`` are ``None``.
+        """
+        if 'c_ind' in context:
+            return
+        for voice, c in ((context['upper'], 'c'), (context['lower'], 'z')):
+            c_ind = self._next((h_ind, voice), context['indx'])
+            context[c + '_ind'] = c_ind
+            if c_ind is None:
+                context[c] = 0
+                context['dur_' + c] = context['bs_' + c] = None
+            else:
+                context[c] = self._horiz[voice][c_ind]
+                context['dur_' + c] = self._durs[voice][c_ind]
+                context['bs_' + c] = self._strengths[voice][c_ind]
 
     def _set_horiz_invl(self, indx, col_indx):
         """
@@ -177,7 +405,7 @@ class DissonanceIndexer(indexer.Indexer):
 
         return horiz_int
 
-    def _is_passing_or_neigh(self, indx, pair, event, prev_event):
+    def _is_passing_or_neigh(self, indx, pair, event, prev_event, context=None):
         """
         A *passing tone* moves by step obliquely (i.e. the other voice 
         stands still while this one moves) creating a dissonant 
@@ -214,14 +442,10 @@ class DissonanceIndexer(indexer.Indexer):
              after the dissonance
         
         x2, x, y, z, z2 correspond to a2, a, b, c, d respectively but 
-        for the lower voice. ``h_upper_col``, ``d_upper_col``, and 
-        ``bs_upper_col`` correspond to the column indecies in 
-        ``self._score`` where the ``horizontal``, ``duration``, and 
-        ``beatStrength`` information of the upper voice can be found. 
-        These columns are also calculated for the lower voice, replacing 
-        'upper' with 'lower'.
-        
-        'letter'_temp == label-based index letter's row position
+        for the lower voice. The ``horizontal``, ``duration``, and 
+        ``beatStrength`` information of each voice is looked up in 
+        ``self._horiz``, ``self._durs``, and ``self._strengths``, which 
+        are calculated once in ``__init__()``.
         
         'letter'_ind == int-based index of letter's row position
         
@@ -251,6 +475,12 @@ class DissonanceIndexer(indexer.Indexer):
         
         :type prev_event: string of previous event in the same voice 
             pair or None if there was no previous event.
+        
+        :param context: What is around the dissonance, as found by 
+            ``_neighbourhood()``. It is found here if it isn't given.
+        
+        :type context: dict or ``None``
+        
         :returns: If it finds a suspension a five-tuple with True as the 
             first argument, the upper-voice number stored as a string as 
             the second argument, the label to assign the upper voice as 
@@ -265,47 +495,28 @@ class DissonanceIndexer(indexer.Indexer):
         """
         if prev_event is None:
             return (False,)
+        if context is None:
+            context = self._neighbourhood(indx, pair, prev_event)
+        upper, lower = context['upper'], context['lower']
         # Upper voice variables
-        upper = pair.split(',')[0] 
-        h_upper_col = self._score.columns.get_loc((h_ind, upper))
-        d_upper_col = self._score.columns.get_loc((dur_ind, upper))
-        bs_upper_col = self._score.columns.get_loc((bs_ind, upper))
-        a_temp = self._score.iloc[:indx, h_upper_col].last_valid_index()
-        a_ind = numpy.where(self._score.index == a_temp)[0][0]
-        a = self._set_horiz_invl(a_ind, h_upper_col)
-        b = self._set_horiz_invl(indx, h_upper_col)
-        dur_a = self._score.iat[a_ind, d_upper_col]
-        dur_b = self._score.iat[indx, d_upper_col]
-        bs_b = self._score.iat[indx, bs_upper_col]
+        a, b = context['a'], context['b']
+        dur_a, dur_b, bs_b = context['dur_a'], context['dur_b'], context['bs_b']
         if dur_a < dur_b:
-            a2_temp = self._score.iloc[:a_ind, h_upper_col].last_valid_index()
-            a2_ind = numpy.where(self._score.index == a2_temp)[0][0]
-            if a2_ind != None:
-                a2 = self._set_horiz_invl(a2_ind, h_upper_col)
-                if a2 == 1:
-                    dur_a2 = self._score.iat[a2_ind, d_upper_col]
-                    dur_a += dur_a2
+            a2_ind = self._previous((h_ind, upper), context['a_ind'])
+            a2 = self._horiz[upper][a2_ind]
+            if a2 == 1:
+                dur_a2 = self._durs[upper][a2_ind]
+                dur_a += dur_a2
 
         # Lower voice variables
-        lower = pair.split(',')[1] 
-        h_lower_col = self._score.columns.get_loc((h_ind, lower))
-        d_lower_col = self._score.columns.get_loc((dur_ind, lower))
-        bs_lower_col = self._score.columns.get_loc((bs_ind, lower))
-        x_temp = self._score.iloc[:indx, h_lower_col].last_valid_index()
-        x_ind = numpy.where(self._score.index == x_temp)[0][0]
-        x = self._set_horiz_invl(x_ind, h_lower_col)
-        y = self._set_horiz_invl(indx, h_lower_col)
-        dur_x = self._score.iat[x_ind, d_lower_col]
-        dur_y = self._score.iat[indx, d_lower_col]
-        bs_y = self._score.iat[indx, bs_lower_col]
+        x, y = context['x'], context['y']
+        dur_x, dur_y, bs_y = context['dur_x'], context['dur_y'], context['bs_y']
         if dur_x < dur_y:
-            x2_temp = self._score.iloc[:x_ind, h_lower_col].last_valid_index()
-            x2_ind = numpy.where(self._score.index == x2_temp)[0][0]
-            if x2_ind != None:
-                x2 = self._set_horiz_invl(x2_ind, h_lower_col)
-                if x2 == 1:
-                    dur_x2 = self._score.iat[x2_ind, d_lower_col]
-                    dur_x += dur_x2
+            x2_ind = self._previous((h_ind, lower), context['x_ind'])
+            x2 = self._horiz[lower][x2_ind]
+            if x2 == 1:
+                dur_x2 = self._durs[lower][x2_ind]
+                dur_x += dur_x2
 
         # The dissonance can't be a passing tone.
         if prev_event not in _consonances: 
@@ -339,7 +550,7 @@ class DissonanceIndexer(indexer.Indexer):
         
         return (False,) # The dissonance is not a passing tone.
 
-    def _is_suspension(self, indx, pair, event, prev_event):
+    def _is_suspension(self, indx, pair, event, prev_event, context=None):
         """
         A note is considered a *suspension* if it is sustained or 
         re-attacked on the same pitch while another voice enters or 
@@ -377,6 +588,12 @@ class DissonanceIndexer(indexer.Indexer):
         
         :type prev_event: string of previous event in the same voice 
             pair or None if there was no previous event.
+        
+        :param context: What is around the dissonance, as found by 
+            ``_neighbourhood()``. It is found here if it isn't given.
+        
+        :type context: dict or ``None``
+        
         :returns: If it finds a suspension a five-tuple with True as the 
             first argument, the upper-voice number stored as a string as 
             the second argument, the label to assign the upper voice as 
@@ -390,47 +607,14 @@ class DissonanceIndexer(indexer.Indexer):
         """
         if prev_event is None:
             return (False,)
-        upper = pair.split(',')[0] # Upper voice variables
-        h_upper_col = self._score.columns.get_loc((h_ind, upper))
-        d_upper_col = self._score.columns.get_loc((dur_ind, upper))
-        bs_upper_col = self._score.columns.get_loc((bs_ind, upper))
-        a_temp = self._score.iloc[:indx, h_upper_col].last_valid_index()
-        a_ind = numpy.where(self._score.index == a_temp)[0][0]
-        a = self._set_horiz_invl(a_ind, h_upper_col)
-        b = self._set_horiz_invl(indx, h_upper_col) 
-        # NB b doesn't correspond to a note onset in upper-voice 
-        # suspensions
-        dur_a = self._score.iat[a_ind, d_upper_col]
-        dur_b = self._score.iat[indx, d_upper_col]
-        bs_b = self._score.iat[indx, bs_upper_col]
-        c_ind = 0
-        c = 0
-        c_temp = self._score.iloc[indx + 1:, h_upper_col].first_valid_index()
-        if c_temp != None:
-            c_ind = numpy.where(self._score.index == c_temp)[0][0]
-            c = self._set_horiz_invl(c_ind, h_upper_col)
-            bs_c = self._score.iat[c_ind, bs_upper_col]
-
-        lower = pair.split(',')[1] # Lower voice variables
-        h_lower_col = self._score.columns.get_loc((h_ind, lower))
-        d_lower_col = self._score.columns.get_loc((dur_ind, lower))
-        bs_lower_col = self._score.columns.get_loc((bs_ind, lower))
-        x_temp = self._score.iloc[:indx, h_lower_col].last_valid_index()
-        x_ind = numpy.where(self._score.index == x_temp)[0][0]
-        x = self._set_horiz_invl(x_ind, h_lower_col)
-        y = self._set_horiz_invl(indx, h_lower_col) 
-        # NB y doesn't correspond to a note onset in lower-voice 
-        # suspensions
-        dur_x = self._score.iat[x_ind, d_lower_col]
-        dur_y = self._score.iat[indx, d_lower_col]
-        bs_y = self._score.iat[indx, bs_lower_col]
-        z_ind = 0
-        z = 0
-        z_temp = self._score.iloc[indx + 1:, h_lower_col].first_valid_index()
-        if z_temp != None:
-            z_ind = numpy.where(self._score.index == z_temp)[0][0]
-            z = self._set_horiz_invl(z_ind, h_lower_col)
-            bs_z = self._score.iat[z_ind, bs_lower_col]
+        if context is None:
+            context = self._neighbourhood(indx, pair, prev_event)
+        self._following(context)
+        upper, lower = context['upper'], context['lower']
+        a, b, c = context['a'], context['b'], context['c']
+        dur_a, dur_b, bs_b, bs_c = context['dur_a'], context['dur_b'], context['bs_b'], context['bs_c']
+        x, y, z = context['x'], context['y'], context['z']
+        dur_x, dur_y, bs_y, bs_z = context['dur_x'], context['dur_y'], context['bs_y'], context['bs_z']
 
         # NB this may need to be tweaked for the edge case where a 
         # consonant 4th becomes a dissonant fourth suspension without 
@@ -446,7 +630,7 @@ class DissonanceIndexer(indexer.Indexer):
             # Susp in lower voice
         return (False,)
 
-    def _is_fake_suspension(self, indx, pair, event, prev_event): 
+    def _is_fake_suspension(self, indx, pair, event, prev_event, context=None): 
         """
         A *fake suspension* (more accurately a "*fake preparation*") is 
         a dissonant preparation to a suspension. It is moved to by step 
@@ -486,6 +670,11 @@ class DissonanceIndexer(indexer.Indexer):
         :type prev_event: string of previous event in the same voice 
             pair or None if there was no previous event.
         
+        :param context: What is around the dissonance, as found by 
+            ``_neighbourhood()``. It is found here if it isn't given.
+        
+        :type context: dict or ``None``
+        
         :returns: If it finds a fake suspension a five-tuple with 
             ``True`` as the first argument, the upper-voice number 
             stored as a string as the second argument, the label to 
@@ -500,43 +689,14 @@ class DissonanceIndexer(indexer.Indexer):
         """
         if prev_event is None:
             return (False,)
-        upper = pair.split(',')[0] # Upper voice variables
-        h_upper_col = self._score.columns.get_loc((h_ind, upper))
-        d_upper_col = self._score.columns.get_loc((dur_ind, upper))
-        bs_upper_col = self._score.columns.get_loc((bs_ind, upper))
-        a_temp = self._score.iloc[:indx, h_upper_col].last_valid_index()
-        a_ind = numpy.where(self._score.index == a_temp)[0][0]
-        a = self._set_horiz_invl(a_ind, h_upper_col)
-        b = self._set_horiz_invl(indx, h_upper_col) 
-        # NB b doesn't correspond to a note onset in upper-voice 
-        # suspensions
-        dur_b = self._score.iat[indx, d_upper_col]
-        bs_b = self._score.iat[indx, bs_upper_col]
-        c_ind = 0
-        c = 0
-        c_temp = self._score.iloc[indx + 1:, h_upper_col].first_valid_index()
-        if c_temp != None:
-            c_ind = numpy.where(self._score.index == c_temp)[0][0]
-            c = self._set_horiz_invl(c_ind, h_upper_col)
-
-        lower = pair.split(',')[1] # Lower voice variables
-        h_lower_col = self._score.columns.get_loc((h_ind, lower))
-        d_lower_col = self._score.columns.get_loc((dur_ind, lower))
-        bs_lower_col = self._score.columns.get_loc((bs_ind, lower))
-        x_temp = self._score.iloc[:indx, h_lower_col].last_valid_index()
-        x_ind = numpy.where(self._score.index == x_temp)[0][0]
-        x = self._set_horiz_invl(x_ind, h_lower_col)
-        y = self._set_horiz_invl(indx, h_lower_col) 
-        # NB y doesn't correspond to a note onset in lower-voice 
-        # suspensions
-        dur_y = self._score.iat[indx, d_lower_col]
-        bs_y = self._score.iat[indx, bs_lower_col]
-        z_ind = 0
-        z = 0
-        z_temp = self._score.iloc[indx + 1:, h_lower_col].first_valid_index()
-        if z_temp != None:
-            z_ind = numpy.where(self._score.index == z_temp)[0][0]
-            z = self._set_horiz_invl(z_ind, h_lower_col)
+        if context is None:
+            context = self._neighbourhood(indx, pair, prev_event)
+        self._following(context)
+        upper, lower = context['upper'], context['lower']
+        a, b, c = context['a'], context['b'], context['c']
+        dur_b, bs_b = context['dur_b'], context['bs_b']
+        x, y, z = context['x'], context['y'], context['z']
+        dur_y, bs_y = context['dur_y'], context['bs_y']
 
         if a == 2 or a == -2:
             if bs_b == .25 and ((b == -2 and dur_b > 2) 
@@ -558,7 +718,7 @@ class DissonanceIndexer(indexer.Indexer):
                 # Diminished fake susp in lower voice
         return (False,)
 
-    def _is_d3q(self, indx, pair, event, prev_event):
+    def _is_d3q(self, indx, pair, event, prev_event, context=None):
         """
         A legal "*dissonant 3rd quarter*" is a dissonant 1 on a weak 
         half, approached by step from above and preceded by a 2 or 
@@ -596,6 +756,11 @@ class DissonanceIndexer(indexer.Indexer):
         :type prev_event: string of previous event in the same voice 
             pair or None if there was no previous event.
         
+        :param context: What is around the dissonance, as found by 
+            ``_neighbourhood()``. It is found here if it isn't given.
+        
+        :type context: dict or ``None``
+        
         :returns: If it finds a dissonant 3rd quarter a five-tuple with 
             True as the first argument, the upper-voice number stored as 
             a string as the second argument, the label to assign the 
@@ -610,34 +775,16 @@ class DissonanceIndexer(indexer.Indexer):
         """
         if prev_event is None:
             return (False,)
-        upper = pair.split(',')[0] # Upper voice variables
-        h_upper_col = self._score.columns.get_loc((h_ind, upper))
-        d_upper_col = self._score.columns.get_loc((dur_ind, upper))
-        bs_upper_col = self._score.columns.get_loc((bs_ind, upper))
-        a_temp = self._score.iloc[:indx, h_upper_col].last_valid_index()
-        a_ind = numpy.where(self._score.index == a_temp)[0][0]
-        a = self._set_horiz_invl(a_ind, h_upper_col)
-        b = self._set_horiz_invl(indx, h_upper_col)
-        dur_a = self._score.iat[a_ind, d_upper_col]
-        dur_b = self._score.iat[indx, d_upper_col]
-        bs_b = self._score.iat[indx, bs_upper_col]
+        if context is None:
+            context = self._neighbourhood(indx, pair, prev_event)
+        upper, lower = context['upper'], context['lower']
+        a, b = context['a'], context['b']
+        dur_a, dur_b, bs_b = context['dur_a'], context['dur_b'], context['bs_b']
+        x, y = context['x'], context['y']
+        dur_x, dur_y, bs_y = context['dur_x'], context['dur_y'], context['bs_y']
 
-        lower = pair.split(',')[1] # Lower voice variables
-        h_lower_col = self._score.columns.get_loc((h_ind, lower))
-        d_lower_col = self._score.columns.get_loc((dur_ind, lower))
-        bs_lower_col = self._score.columns.get_loc((bs_ind, lower))
-        x_temp = self._score.iloc[:indx, h_lower_col].last_valid_index()
-        x_ind = numpy.where(self._score.index == x_temp)[0][0]
-        x = self._set_horiz_invl(x_ind, h_lower_col)
-        y = self._set_horiz_invl(indx, h_lower_col)
-        dur_x = self._score.iat[x_ind, d_lower_col]
-        dur_y = self._score.iat[indx, d_lower_col]
-        bs_y = self._score.iat[indx, bs_lower_col]
-
-        '''
-        .. todo:: make the beatstrength requirements dependent on the 
-            detected meter. Right now it is hard-coded for 4/2 meter.
-        '''
+        # The requirements are written for 4/2; the durations and beat 
+        # strengths of other meters were scaled to match in __init__().
 
         if (bs_b == .25 and dur_a >= 2 and dur_b == 1 
             and a == -2 and b == -2): 
@@ -650,7 +797,7 @@ class DissonanceIndexer(indexer.Indexer):
         else: # The dissonance is not a d3q.
             return (False,)
 
-    def _is_anticipation(self, indx, pair, event, prev_event):
+    def _is_anticipation(self, indx, pair, event, prev_event, context=None):
         """
         An anticipation occurs on a weak quarter-note, is approached 
         obliquely by step from above, and is followed immediately (i.e. 
@@ -688,6 +835,11 @@ class DissonanceIndexer(indexer.Indexer):
         :type prev_event: string of previous event in the same voice 
             pair or None if there was no previous event.
         
+        :param context: What is around the dissonance, as found by 
+            ``_neighbourhood()``. It is found here if it isn't given.
+        
+        :type context: dict or ``None``
+        
         :returns: If it finds an anticipation a five-tuple with ``True`` 
             as the first argument, the upper-voice number stored as a 
             string as the second argument, the label to assign the
@@ -702,27 +854,13 @@ class DissonanceIndexer(indexer.Indexer):
         """
         if prev_event is None:
             return (False,)
-        upper = pair.split(',')[0] # Upper voice variables
-        h_upper_col = self._score.columns.get_loc((h_ind, upper))
-        d_upper_col = self._score.columns.get_loc((dur_ind, upper))
-        bs_upper_col = self._score.columns.get_loc((bs_ind, upper))
-        a_temp = self._score.iloc[:indx, h_upper_col].last_valid_index()
-        a_ind = numpy.where(self._score.index == a_temp)[0][0]
-        a = self._set_horiz_invl(a_ind, h_upper_col)
-        b = self._set_horiz_invl(indx, h_upper_col)
-        dur_b = self._score.iat[indx, d_upper_col]
-        bs_b = self._score.iat[indx, bs_upper_col]
-
-        lower = pair.split(',')[1] # Lower voice variables
-        h_lower_col = self._score.columns.get_loc((h_ind, lower))
-        d_lower_col = self._score.columns.get_loc((dur_ind, lower))
-        bs_lower_col = self._score.columns.get_loc((bs_ind, lower))
-        x_temp = self._score.iloc[:indx, h_lower_col].last_valid_index()
-        x_ind = numpy.where(self._score.index == x_temp)[0][0]
-        x = self._set_horiz_invl(x_ind, h_lower_col)
-        y = self._set_horiz_invl(indx, h_lower_col)
-        dur_y = self._score.iat[indx, d_lower_col]
-        bs_y = self._score.iat[indx, bs_lower_col]
+        if context is None:
+            context = self._neighbourhood(indx, pair, prev_event)
+        upper, lower = context['upper'], context['lower']
+        a, b = context['a'], context['b']
+        dur_b, bs_b = context['dur_b'], context['bs_b']
+        x, y = context['x'], context['y']
+        dur_y, bs_y = context['dur_y'], context['bs_y']
 
         if (bs_b == .125 and a == -2 and b == 1 and dur_b == 1):
             return (True, upper, _ant_label, lower, _no_diss_label)
@@ -730,7 +868,7 @@ class DissonanceIndexer(indexer.Indexer):
             return (True, upper, _no_diss_label, lower, _ant_label)
         return (False,)
 
-    def _is_cambiata(self, indx, pair, event, prev_event):
+    def _is_cambiata(self, indx, pair, event, prev_event, context=None):
         """
         A *nota cambiata* figure moves obliquely by descending step to a 
         dissonant weak half or quarter then skips down a third before 
@@ -767,6 +905,11 @@ class DissonanceIndexer(indexer.Indexer):
         :type prev_event: string of previous event in the same voice 
             pair or ``None`` if there was no previous event.
         
+        :param context: What is around the dissonance, as found by 
+            ``_neighbourhood()``. It is found here if it isn't given.
+        
+        :type context: dict or ``None``
+        
         :returns: If it finds a nota cambiata a five-tuple with ``True`` 
             as the first argument, the upper-voice number stored as a 
             string as the second argument, the label to assign the upper 
@@ -783,44 +926,14 @@ class DissonanceIndexer(indexer.Indexer):
         
         if prev_event is None:
             return (False,)
-        upper = pair.split(',')[0] # Upper voice variables
-        h_upper_col = self._score.columns.get_loc((h_ind, upper))
-        d_upper_col = self._score.columns.get_loc((dur_ind, upper))
-        bs_upper_col = self._score.columns.get_loc((bs_ind, upper))
-        a_temp = self._score.iloc[:indx, h_upper_col].last_valid_index()
-        a_ind = numpy.where(self._score.index == a_temp)[0][0]
-        a = self._set_horiz_invl(a_ind, h_upper_col)
-        b = self._set_horiz_invl(indx, h_upper_col) 
-        # NB b doesn't correspond to a note onset in upper-voice 
-        # suspensions
-        dur_b = self._score.iat[indx, d_upper_col]
-        bs_b = self._score.iat[indx, bs_upper_col]
-        c_ind = 0
-        c = 0
-        c_temp = self._score.iloc[indx + 1:, h_upper_col].first_valid_index()
-        if c_temp != None:
-            c_ind = numpy.where(self._score.index == c_temp)[0][0]
-            c = self._set_horiz_invl(c_ind, h_upper_col)
-
-        lower = pair.split(',')[1] # Lower voice variables
-        h_lower_col = self._score.columns.get_loc((h_ind, lower))
-        d_lower_col = self._score.columns.get_loc((dur_ind, lower))
-        bs_lower_col = self._score.columns.get_loc((bs_ind, lower))
-        x_temp = self._score.iloc[:indx, h_lower_col].last_valid_index()
-        x_ind = numpy.where(self._score.index == x_temp)[0][0]
-        x = self._set_horiz_invl(x_ind, h_lower_col)
-        y = self._set_horiz_invl(indx, h_lower_col) 
-        # NB y doesn't correspond to a note onset in lower-voice 
-        #suspensions
-        dur_y = self._score.iat[indx, d_lower_col]
-        bs_y = self._score.iat[indx, bs_lower_col]
-        z_ind = 0
-        z = 0
-        z_temp = self._score.iloc[indx + 1:, h_lower_col].first_valid_index()
-        if z_temp != None:
-            z_ind = numpy.where(self._score.index == z_temp)[0][0]
-            z = self._set_horiz_invl(z_ind, h_lower_col)
-
+        if context is None:
+            context = self._neighbourhood(indx, pair, prev_event)
+        self._following(context)
+        upper, lower = context['upper'], context['lower']
+        a, b, c = context['a'], context['b'], context['c']
+        dur_b, bs_b = context['dur_b'], context['bs_b']
+        x, y, z = context['x'], context['y'], context['z']
+        dur_y, bs_y = context['dur_y'], context['bs_y']
 
         if (a == -2 and ((dur_b == 2 and bs_b == .25) 
             or (dur_b == 1 and bs_b == .125) and b == -3 and c == 2)):
@@ -833,7 +946,7 @@ class DissonanceIndexer(indexer.Indexer):
         return (False,)
 
     #m.136 in alto? What about diminished lengths?
-    def _is_chanson_idiom(self, indx, pair, event, prev_event): 
+    def _is_chanson_idiom(self, indx, pair, event, prev_event, context=None): 
         """
         The *chanson* idiom dissonance consists of a seventh or second, 
         struck simultaneously or obliquely on the 3rd quarter of a whole 
@@ -880,6 +993,11 @@ class DissonanceIndexer(indexer.Indexer):
         :type prev_event: string of previous event in the same voice 
             pair or ``None`` if there was no previous event.
         
+        :param context: What is around the dissonance, as found by 
+            ``_neighbourhood()``. It is found here if it isn't given.
+        
+        :type context: dict or ``None``
+        
         :returns: If it finds a chanson idiom a five-tuple with ``True`` 
             as the first argument, the upper-voice number stored as a 
             string as the second argument, the label to assign the upper 
@@ -898,57 +1016,24 @@ class DissonanceIndexer(indexer.Indexer):
         # delete all non-digit characters from event string and convert 
         # to int.
 
-        upper = pair.split(',')[0] # Upper voice variables
-        h_upper_col = self._score.columns.get_loc((h_ind, upper))
-        d_upper_col = self._score.columns.get_loc((dur_ind, upper))
-        bs_upper_col = self._score.columns.get_loc((bs_ind, upper))
-        a_temp = self._score.iloc[:indx, h_upper_col].last_valid_index()
-        a_ind = numpy.where(self._score.index == a_temp)[0][0]
-        a = self._set_horiz_invl(a_ind, h_upper_col)
-        b = self._set_horiz_invl(indx, h_upper_col) 
-        # NB b doesn't correspond to a note onset in upper-voice 
-        # suspensions
-        dur_a = self._score.iat[a_ind, d_upper_col]
-        dur_b = self._score.iat[indx, d_upper_col]
-        bs_b = self._score.iat[indx, bs_upper_col]
-        c_ind = 0
-        c = 0
-        c_temp = self._score.iloc[indx + 1:, h_upper_col].first_valid_index()
-        if c_temp != None:
-            c_ind = numpy.where(self._score.index == c_temp)[0][0]
-            c = self._set_horiz_invl(c_ind, h_upper_col)
-            dur_c = self._score.iat[c_ind, d_upper_col]
-            dur_d = 0
-            d_temp = self._score.iloc[c_ind + 1:, h_upper_col].first_valid_index()
-            if d_temp != None:
-                d_ind = numpy.where(self._score.index == d_temp)[0][0]
-                dur_d = self._score.iat[d_ind, d_upper_col]
-
-        lower = pair.split(',')[1] # Lower voice variables
-        h_lower_col = self._score.columns.get_loc((h_ind, lower))
-        d_lower_col = self._score.columns.get_loc((dur_ind, lower))
-        bs_lower_col = self._score.columns.get_loc((bs_ind, lower))
-        x_temp = self._score.iloc[:indx, h_lower_col].last_valid_index()
-        x_ind = numpy.where(self._score.index == x_temp)[0][0]
-        x = self._set_horiz_invl(x_ind, h_lower_col)
-        y = self._set_horiz_invl(indx, h_lower_col) 
-        # NB y doesn't correspond to a note onset in lower-voice 
-        # suspensions
-        dur_x = self._score.iat[x_ind, d_lower_col]
-        dur_y = self._score.iat[indx, d_lower_col]
-        bs_y = self._score.iat[indx, bs_lower_col]
-        z_ind = 0
-        z = 0
-        z_temp = self._score.iloc[indx + 1:, h_lower_col].first_valid_index()
-        if z_temp != None:
-            z_ind = numpy.where(self._score.index == z_temp)[0][0]
-            z = self._set_horiz_invl(z_ind, h_lower_col)
-            dur_z = self._score.iat[z_ind, d_lower_col]
-            dur_z2 = 0
-            z2_temp = self._score.iloc[z_ind + 1:, h_lower_col].first_valid_index()
-            if z2_temp != None:
-                z2_ind = numpy.where(self._score.index == z2_temp)[0][0]
-                dur_z2 = self._score.iat[z2_ind, d_lower_col]
+        if context is None:
+            context = self._neighbourhood(indx, pair, prev_event)
+        self._following(context)
+        upper, lower = context['upper'], context['lower']
+        a, b, c = context['a'], context['b'], context['c']
+        dur_b, dur_c = context['dur_b'], context['dur_c']
+        dur_d = 0
+        if context['c_ind'] is not None:
+            d_ind = self._next((h_ind, upper), context['c_ind'])
+            if d_ind is not None:
+                dur_d = self._durs[upper][d_ind]
+        x, y, z = context['x'], context['y'], context['z']
+        dur_y, dur_z = context['dur_y'], context['dur_z']
+        dur_z2 = 0
+        if context['z_ind'] is not None:
+            z2_ind = self._next((h_ind, lower), context['z_ind'])
+            if z2_ind is not None:
+                dur_z2 = self._durs[lower][z2_ind]
 
         if ((diss == 2 or diss == -7) and dur_b == 1 
             and ((y == -2 and dur_y > 2) or (y == 1 and dur_y == 2)) 
@@ -962,7 +1047,7 @@ class DissonanceIndexer(indexer.Indexer):
             # Chanson idiom in lower voice
         return (False,)
 
-    def _is_echappee(self, indx, pair, event, prev_event):
+    def _is_echappee(self, indx, pair, event, prev_event, context=None):
         """
         A note is considered an *échappée* if it consists of a 
         quarter-note dissonance on a weak quarter note that is 
@@ -999,6 +1084,11 @@ class DissonanceIndexer(indexer.Indexer):
         :type prev_event: string of previous event in the same voice 
             pair or ``None`` if there was no previous event.
         
+        :param context: What is around the dissonance, as found by 
+            ``_neighbourhood()``. It is found here if it isn't given.
+        
+        :type context: dict or ``None``
+        
         :returns: If it finds an *échappée* a five-tuple with ``True`` 
             as the first argument, the upper-voice number stored as a 
             string as the second argument, the label to assign the
@@ -1013,27 +1103,11 @@ class DissonanceIndexer(indexer.Indexer):
         """
         if prev_event is None:
             return (False,)
-        upper = pair.split(',')[0] # Upper voice variables
-        h_upper_col = self._score.columns.get_loc((h_ind, upper))
-        d_upper_col = self._score.columns.get_loc((dur_ind, upper))
-        bs_upper_col = self._score.columns.get_loc((bs_ind, upper))
-        a_temp = self._score.iloc[:indx, h_upper_col].last_valid_index()
-        a_ind = numpy.where(self._score.index == a_temp)[0][0]
-        a = self._set_horiz_invl(a_ind, h_upper_col)
-        b = self._set_horiz_invl(indx, h_upper_col)
-        dur_b = self._score.iat[indx, d_upper_col]
-        bs_b = self._score.iat[indx, bs_upper_col]
-
-        lower = pair.split(',')[1] # Lower voice variables
-        h_lower_col = self._score.columns.get_loc((h_ind, lower))
-        d_lower_col = self._score.columns.get_loc((dur_ind, lower))
-        bs_lower_col = self._score.columns.get_loc((bs_ind, lower))
-        x_temp = self._score.iloc[:indx, h_lower_col].last_valid_index()
-        x_ind = numpy.where(self._score.index == x_temp)[0][0]
-        x = self._set_horiz_invl(x_ind, h_lower_col)
-        y = self._set_horiz_invl(indx, h_lower_col)
-        dur_y = self._score.iat[indx, d_lower_col]
-        bs_y = self._score.iat[indx, bs_lower_col]
+        if context is None:
+            context = self._neighbourhood(indx, pair, prev_event)
+        upper, lower = context['upper'], context['lower']
+        a, b, bs_b = context['a'], context['b'], context['bs_b']
+        x, y, bs_y = context['x'], context['y'], context['bs_y']
 
         if bs_b == .125 and ((a == 2 and b < -2) or (a == -2 and b > 2)): 
             # Upper note *échappée*
@@ -1044,7 +1118,7 @@ class DissonanceIndexer(indexer.Indexer):
         return (False,)
         
 
-    def _is_unexplainable(self, indx, pair, event, prev_event):
+    def _is_unexplainable(self, indx, pair, event, prev_event, context=None):
         """
         Neither note in the dissonant interval can be explained as one 
         of the above. The voice that moved to the dissonance (if only 
@@ -1088,6 +1162,11 @@ class DissonanceIndexer(indexer.Indexer):
         :type prev_event: string of previous event in the same voice 
             pair or ``None`` if there was no previous event.
         
+        :param context: What is around the dissonance, as found by 
+            ``_neighbourhood()``. It is found here if it isn't given.
+        
+        :type context: dict or ``None``
+        
         :returns: A five-tuple with True as the first argument, the 
             upper-voice number stored as a string as the second 
             argument, the label to assign the upper voice as the third
@@ -1099,17 +1178,11 @@ class DissonanceIndexer(indexer.Indexer):
         :rtype: tuple
         
         """
-        upper = pair.split(',')[0] # Upper voice variables
-        h_upper_col = self._score.columns.get_loc((h_ind, upper))
-        d_upper_col = self._score.columns.get_loc((dur_ind, upper))
-        b = self._set_horiz_invl(indx, h_upper_col)
-        dur_b = self._score.iat[indx, d_upper_col]
-
-        lower = pair.split(',')[1] # Lower voice variables
-        h_lower_col = self._score.columns.get_loc((h_ind, lower))
-        d_lower_col = self._score.columns.get_loc((dur_ind, lower))
-        y = self._set_horiz_invl(indx, h_lower_col)
-        dur_y = self._score.iat[indx, d_lower_col]
+        if context is None:
+            context = self._neighbourhood(indx, pair, prev_event)
+        upper, lower = context['upper'], context['lower']
+        b, dur_b = context['b'], context['dur_b']
+        y, dur_y = context['y'], context['dur_y']
         
         if b is not nan and y is nan: # Upper voice is diss
             return (True, upper, _unexplainable, lower, _no_diss_label)
@@ -1122,7 +1195,7 @@ class DissonanceIndexer(indexer.Indexer):
                 return (True, upper, _no_diss_label, lower, _unexplainable)
         return (True, upper, _unexplainable, lower, _unexplainable)
 
-    def classify(self, indx, pair, event, prev_event):
+    def classify(self, indx, pair, event, prev_event, statistics=None):
         """
         Checks the dissonance definitions to find a suitable label for 
         the dissonance passed. If no identifiable dissonance type 
@@ -1130,7 +1203,18 @@ class DissonanceIndexer(indexer.Indexer):
         pair if either voice was previously given a known dissonance 
         label still in vigour at the given offset. It only takes its 
         four arguments to pass them on to the dissonance-type functions 
-        it calls.
+        it calls, along with what is around the dissonance, which is 
+        found once for all of them. With the ``'statistics'`` setting, 
+        how often each function is called and finds its dissonance type, 
+        and how long it takes, is counted in ``statistics``.
+        
+        :param statistics: Where to count the calls of each function, 
+            with a row for each of :const:`_RULES` and columns for the 
+            calls, the matches, and the seconds spent. The default is 
+            this indexer's own, as reported by :meth:`rule_statistics`.
+        
+        :type statistics: :class:`numpy.ndarray` or ``None``
+        
         :returns: A 5-tuple that can be unpacked to assign separate 
             labels for each voice in the pair. If none of the known 
             dissonance types were detected the 5-tuple will have the
@@ -1139,23 +1223,79 @@ class DissonanceIndexer(indexer.Indexer):
         :rtype: tuple
         
         """
-        diss_types = [
-            self._is_passing_or_neigh,
-            self._is_suspension,
-            self._is_d3q,
-            self._is_fake_suspension,
-            self._is_chanson_idiom,
-            self._is_cambiata,
-            self._is_anticipation,
-            self._is_echappee,
-            self._is_unexplainable
-        ]
-
-        for t in diss_types:
-            result = t(indx, pair, event, prev_event)
+        context = self._neighbourhood(indx, pair, prev_event)
+        if not self._settings['statistics']:
+            for name in DissonanceIndexer._RULES:
+                result = getattr(self, '_is_' + name)(indx, pair, event, prev_event, context)
+                if result[0]:
+                    return result
+            return
+        if statistics is None:
+            statistics = self._statistics
+        for number, name in enumerate(DissonanceIndexer._RULES):
+            start = time.time()
+            result = getattr(self, '_is_' + name)(indx, pair, event, prev_event, context)
+            statistics[number, 2] += time.time() - start
+            statistics[number, 0] += 1
             if result[0]:
+                statistics[number, 1] += 1
                 return result
 
+    def rule_statistics(self):
+        """
+        Report how often each dissonance type was checked by 
+        :meth:`classify` (including from :meth:`run`) since this indexer 
+        was made, how often it was found, and how long the checks took. 
+        The types are checked in order until one is found, so this shows 
+        which of them dominate the running time on a given repertoire. 
+        The checks are only counted with the ``'statistics'`` setting; 
+        otherwise every count is zero.
+        
+        :returns: A row for each dissonance type, in the order they are 
+            checked, with the number of ``'evaluations'`` and 
+            ``'hits'``, the ``'hit rate'``, and the ``'seconds'`` spent.
+        
+        :rtype: :class:`pandas.DataFrame`
+        
+        """
+        counts = self._statistics[:, :2].astype(int)
+        post = pandas.DataFrame({'evaluations': counts[:, 0], 'hits': counts[:, 1],
+                                 'seconds': self._statistics[:, 2]},
+                                index=DissonanceIndexer._RULES)
+        post['hit rate'] = post['hits'] / post['evaluations'].astype(float)
+        return post[['evaluations', 'hits', 'hit rate', 'seconds']]
+
+    @staticmethod
+    def _index_simuls(simuls):
+        """
+        Used internally by ``check_4s_5s()`` to prepare what it looks up 
+        in ``simuls``, once for the whole piece. For every voice this 
+        lists the pairs the voice is in, each with the intervals of the 
+        pair, the makers (``_cons_makers`` if the voice is the upper one 
+        of the pair, ``_Xed_makers`` if it is the lower one) that apply, 
+        and, for every row, the position of the first row from there on 
+        with an interval in the pair.
+        
+        :returns: The pairs of each voice, and the two voices of each 
+            pair.
+        
+        :rtype: 2-tuple of dict
+        """
+        by_voice = {}
+        members = {}
+        places = numpy.arange(len(simuls))
+        end = len(simuls)
+        for col, pair in enumerate(simuls.columns):
+            column = simuls.iloc[:, col]
+            values = column.values
+            # like Series.any(), skip empty or missing intervals
+            sounding = column.notnull().values & values.astype(bool)
+            first = numpy.minimum.accumulate(numpy.where(sounding, places, end)[::-1])[::-1]
+            members[pair] = tuple(pair.split(','))
+            by_voice.setdefault(members[pair][0], []).append((pair, _cons_makers, values, first))
+            by_voice.setdefault(members[pair][1], []).append((pair, _Xed_makers, values, first))
+        return by_voice, members
+
     def check_4s_5s(self, pair_name, iloc_indx, suspect_diss, simuls):
         """
         This function evaluates whether P4's, A4's, and d5's should be 
@@ -1189,43 +1329,34 @@ class DissonanceIndexer(indexer.Indexer):
         :rtype: string
         
         """
+        if self._simuls_index is None or self._simuls_index[0] is not simuls:
+            self._simuls_index = (simuls,) + self._index_simuls(simuls)
+        by_voice, members = self._simuls_index[1:]
         cons_made = False
         # Find the offset of the next event in the voice pair to know 
         # when the interval ends.
-        end_temp = self._score.loc[:, (int_ind, pair_name)].iloc[iloc_indx +1:].first_valid_index()
-        if end_temp != None: 
+        end_iloc = self._next((int_ind, pair_name), iloc_indx)
+        if end_iloc is None: 
             # for the case where a 4th or 5th is in the last attack of 
             # the piece.
-            end_iloc = numpy.where(self._score.index == end_temp)[0][0]
-        else:
             end_iloc = len(self._score) + 1
 
         if '-' in suspect_diss: 
             # set the voice that is spelled lower 
             # as the lower voice.
-            lower_voice = pair_name.split(',')[0]
+            lower_voice = members[pair_name][0]
         else:
-            lower_voice = pair_name.split(',')[1]
+            lower_voice = members[pair_name][1]
 
-        for voice_combo in simuls:
-            if (lower_voice == voice_combo.split(',')[0] 
-                and voice_combo != pair_name): 
-                # look at other pairs that have lower_voice as their 
-                # upper voice. Could be optimized.
-                if (simuls[voice_combo].iloc[iloc_indx:end_iloc].any() 
-                    in _cons_makers[suspect_diss]): 
-                    # this chained-indexing is actually faster than the 
-                    # alternative.
-                    cons_made = True
-                    break
-            elif (lower_voice == voice_combo.split(',')[1] 
-                and voice_combo != pair_name): 
-                # look at other pairs that have lower_voice as their 
-                # lower voice. Could be optimized.
-                if (simuls[voice_combo].iloc[iloc_indx:end_iloc].any() 
-                    in _Xed_makers[suspect_diss]):
-                    cons_made = True
-                    break
+        for voice_combo, makers, values, first in by_voice.get(lower_voice, ()):
+            # look at the other pairs that have lower_voice in them, at 
+            # the first interval they have while the fourth or fifth lasts.
+            if voice_combo == pair_name or iloc_indx >= len(first):
+                continue
+            found = first[iloc_indx]
+            if found < end_iloc and found < len(values) and values[found] in makers[suspect_diss]:
+                cons_made = True
+                break
 
         if cons_made:   
             # 'C' is for consonant and it's good enough for me.
@@ -1235,6 +1366,54 @@ class DissonanceIndexer(indexer.Indexer):
             # be dissonant.
             return ('D' + suspect_diss)   
 
+    def _classify_pair(self, col, simuls):
+        """
+        Used internally by ``run()`` to classify the dissonances of one 
+        voice pair. Pairs are classified independently of each other, 
+        so this may be called in a worker process.
+        
+        :param col: The position of the pair among the vertical 
+            interval columns.
+        
+        :type col: int
+        
+        :param simuls: The intervals sounding in every pair at every 
+            offset, as passed to ``check_4s_5s()``.
+        
+        :type simuls: :class:`pandas.DataFrame`
+        
+        :returns: The labels for the upper and lower voice of the pair 
+            at every offset, and the statistics of the dissonance types 
+            checked, as counted by ``classify()``.
+        
+        :rtype: 3-tuple of list of str, list of str, and 
+            :class:`numpy.ndarray`
+        
+        """
+        pair_title = simuls.columns[col]
+        diss_ints = list(self._score[int_ind].iloc[:, col].values)
+        statistics = numpy.zeros(self._statistics.shape)
+        upper = [_no_diss_label] * len(diss_ints)
+        lower = [_no_diss_label] * len(diss_ints)
+        for i, event in enumerate(diss_ints):
+            if event in _potential_consonances: 
+                # NB: all other events are definite consonances or 
+                # dissonances or don't qualify as interval onsets.
+                event = self.check_4s_5s(pair_title, i, event, simuls)
+                diss_ints[i] = event
+
+            # The interval must be dissonant.
+            if (event not in _ignored):
+                prev_event = self._before[(int_ind, pair_title)][i]
+                if prev_event >= 0:
+                    prev_event = diss_ints[prev_event]
+                else:
+                    prev_event = None
+                diss_analysis = self.classify(i, pair_title, event, prev_event, statistics)
+                upper[i] = diss_analysis[2]
+                lower[i] = diss_analysis[4]
+        return upper, lower, statistics
+
     def run(self):
         """
         Make a new index of the piece which consists of a DataFrame with 
@@ -1255,49 +1434,38 @@ class DissonanceIndexer(indexer.Indexer):
         :rtype: :class:`pandas.DataFrame`
         
         """
-        diss_ints = self._score[int_ind].copy(deep=True)
-        simuls = diss_ints.ffill()
-
-        iterables = [[diss_types], self._score[dur_ind].columns]
-        d_types_multi_index = pandas.MultiIndex.from_product(iterables, names = ['Indexer', 'Parts'])
-        ret = pandas.DataFrame(index=self._score.index, columns=d_types_multi_index)
-        ret.fillna(_no_diss_label, inplace=True)
+        simuls = self._score[int_ind].ffill()
+        processes = self._settings['processes']
+        if processes is None:
+            found = [self._classify_pair(col, simuls) for col in range(len(simuls.columns))]
+        else:
+            pool = mp.Pool(processes, _start_worker, (self,))
+            try:
+                found = pool.map(_classify_in_worker, range(len(simuls.columns)))
+            finally:
+                pool.close()
+                pool.join()
 
-        for col, pair_title in enumerate(diss_ints.columns):
+        # Each voice gets the label with the greatest weight it was given 
+        # in any pair, or the one from the first of these pairs if there 
+        # is more than one, just as if the pairs were classified in order.
+        labels = numpy.empty((len(self._score), len(self._score[dur_ind].columns)), dtype=object)
+        labels.fill(_no_diss_label)
+        for pair_title, pair_found in zip(simuls.columns, found):
+            pair_labels = pair_found[:2]
+            self._statistics += pair_found[2]
             voices = pair_title.split(',') 
             # assign top and bottom voices as integers
             top_voice = self._score[dur_ind].columns.get_loc(voices[0])
             bott_voice = self._score[dur_ind].columns.get_loc(voices[1])
-            for i, event in enumerate(diss_ints[pair_title]):
-                if event in _potential_consonances: 
-                    # NB: all other events are definite consonances or 
-                    # dissonances or don't qualify as interval onsets.
-                    event = self.check_4s_5s(pair_title, i, event, simuls)
-                    diss_ints.iat[i, col] = event
+            for voice, new in zip((top_voice, bott_voice), pair_labels):
+                for i, label in enumerate(new):
+                    if _weights[labels[i, voice]] < _weights[label]:
+                        labels[i, voice] = label
 
-                # The interval must be dissonant and neither voice 
-                # should already have a dissonance label assigned.
-                if (event not in _ignored):
-                    # and ret.iat[i, top_voice] in _passes
-                    # and ret.iat[i, bott_voice] in _passes):
-                    prev_event = diss_ints[pair_title].iloc[:i].last_valid_index()
-                    if prev_event is not None:
-                        prev_event = diss_ints.at[prev_event, pair_title]
-                    # if prev_event not in _consonances and i > 0 
-                    #   and (ret.iat[i-1, top_voice] in
-                    #   (_pass_rp_label, _pass_dp_label) 
-                    #   or ret.iat[i-1, bott_voice] in
-                    #   (_pass_rp_label, _pass_dp_label)):
-                    #   prev_event = 'm3' 
-                    # If there's a passing tone at the preceding note, 
-                    # call the prev_event a consonance (any consonance 
-                    # will do) so that there can be two passing tones in 
-                    # a row.
-                    diss_analysis = self.classify(i, pair_title, event, prev_event)
-                    if (_weights[ret.iat[i, top_voice]] < _weights[diss_analysis[2]]):
-                        ret.iat[i, top_voice] = diss_analysis[2]
-                    if (_weights[ret.iat[i, bott_voice]] < _weights[diss_analysis[4]]):
-                        ret.iat[i, bott_voice] = diss_analysis[4]
+        iterables = [[diss_types], self._score[dur_ind].columns]
+        d_types_multi_index = pandas.MultiIndex.from_product(iterables, names = ['Indexer', 'Parts'])
+        ret = pandas.DataFrame(labels, index=self._score.index, columns=d_types_multi_index)
 
         '''
         # Remove lingering unexplainable labels from notes that are only 
@@ -37,14 +37,365 @@ intervals in the same part.
 # disable "string statement has no effect"... it's for sphinx
 # pylint: disable=W0105
 
+import re
+import six
+import numpy
 import pandas
 from music21 import note, interval, pitch
 from vis.analyzers import indexer
+from vis.analyzers.indexers.noterest import RaggedMultiStop
 from itertools import combinations
 
 _names = ('Indexer', 'Parts')
 _memos = {}
 
+# -------------------------------------------------------------------- #
+# The interval engine computes interval names arithmetically from the 
+# step, accidental, and octave of each pitch name, rather than by 
+# building music21 Interval objects. The results are the same as 
+# music21's; the calculations follow music21.interval.notesToGeneric(), 
+# notesToChromatic(), and _getSpecifierFromGenericChromatic(). Pitch 
+# names that the engine can't parse (like microtones) still go through 
+# music21.
+
+_PITCH_NAME = re.compile(r'^([A-Ga-g])(#{0,4}|-{0,4})(\d*)$')
+_STEPS = 'CDEFGAB'
+_STEP_SEMITONES = (0, 2, 4, 5, 7, 9, 11)
+_MAJOR_SEMITONES = numpy.array((0, 0, 2, 4, 5, 7, 9, 11))
+# the offsets of the perfect and major specifiers are 4 and 5 in these
+_PERFECT_SPECIFIERS = numpy.array(interval.perfSpecifiers)
+_IMPERFECT_SPECIFIERS = numpy.array(interval.specifiers)
+_IMPOSSIBLE_INTERVAL = 'cannot get a specifier for a note with this many semitones: {} {}'
+
+def parse_pitch_name(name):
+    """
+    Find the diatonic note number and the pitch space number (both as 
+    defined by music21) of a pitch name like ``'C#4'`` or ``'b--'``. 
+    Pitches without an octave are in octave 4, like in music21.
+
+    :param name: The pitch name.
+    :type name: str
+
+    :returns: The diatonic note number and pitch space number, or 
+        ``None`` if the name is not a plain spelled pitch.
+    :rtype: 2-tuple of int or NoneType
+    """
+    match = _PITCH_NAME.match(name) if isinstance(name, six.string_types) else None
+    if match is None:
+        return None
+    step, accidental, octave = match.groups()
+    step = _STEPS.index(step.upper())
+    octave = int(octave) if octave else 4
+    alter = len(accidental) if accidental.startswith('#') else -len(accidental)
+    return (octave * 7 + step + 1, (octave + 1) * 12 + _STEP_SEMITONES[step] + alter)
+
+def pitch_numbers(names):
+    """
+    Vectorized :func:`parse_pitch_name`. Each distinct name is parsed 
+    only once.
+
+    :param names: The pitch names.
+    :type names: sequence of str
+
+    :returns: The diatonic note numbers, the pitch space numbers, and 
+        whether each name could be parsed. The numbers of unparsed names 
+        are 0.
+    :rtype: 3-tuple of :class:`numpy.ndarray`
+    """
+    codes, uniques = pandas.factorize(numpy.asarray(names, dtype=object))
+    parsed = [parse_pitch_name(x) for x in uniques] + [None] # the last is for NaN
+    found = numpy.array([x is not None for x in parsed])
+    numbers = numpy.array([x if x is not None else (0, 0) for x in parsed], dtype=numpy.int64)
+    return numbers[codes, 0], numbers[codes, 1], found[codes]
+
+def interval_parts(lower_diatonic, lower_ps, upper_diatonic, upper_ps):
+    """
+    Find the numeric parts of the intervals from the lower to the upper 
+    pitches: the directed generic interval (like ``-3`` for a 
+    descending third), the number of semitones, and music21's specifier 
+    constant (like ``interval.MAJOR``). This works with scalars or 
+    arrays.
+
+    :param lower_diatonic: The lower pitches' diatonic note numbers.
+    :param lower_ps: The lower pitches' pitch space numbers.
+    :param upper_diatonic: The upper pitches' diatonic note numbers.
+    :param upper_ps: The upper pitches' pitch space numbers.
+    :type lower_diatonic: int or :class:`numpy.ndarray` of int
+    :type lower_ps: int or :class:`numpy.ndarray` of int
+    :type upper_diatonic: int or :class:`numpy.ndarray` of int
+    :type upper_ps: int or :class:`numpy.ndarray` of int
+
+    :returns: The generic intervals, semitones, and specifiers. The 
+        specifier is 0 where music21 would raise an 
+        :exc:`~music21.interval.IntervalException` because the quality 
+        is more than quadruply augmented or diminished.
+    :rtype: 3-tuple of int or of :class:`numpy.ndarray`
+    """
+    staff = numpy.subtract(upper_diatonic, lower_diatonic)
+    generic = numpy.where(staff >= 0, staff + 1, staff - 1)
+    semitones = numpy.subtract(upper_ps, lower_ps)
+    undirected = numpy.abs(generic)
+    steps = undirected % 7
+    octaves = undirected // 7 - (steps == 0)
+    steps = numpy.where(steps == 0, 7, steps)
+    generic_direction = numpy.where(generic == 1, 0, numpy.sign(generic))
+    chromatic_direction = numpy.sign(semitones)
+    # intervals like d2 and dd2 have different generic and chromatic directions
+    these = numpy.where((generic_direction != chromatic_direction) & (generic_direction != 0) &
+                        (chromatic_direction != 0), -numpy.abs(semitones),
+                        numpy.where(undirected == 1, semitones, numpy.abs(semitones)))
+    diff = these - (_MAJOR_SEMITONES[steps] + 12 * octaves)
+    perfectable = (steps == 1) | (steps == 4) | (steps == 5)
+    position = numpy.where(perfectable, 4 + diff, 5 + diff)
+    size = numpy.where(perfectable, len(_PERFECT_SPECIFIERS), len(_IMPERFECT_SPECIFIERS))
+    possible = (position >= -size) & (position < size)
+    # music21 indexes a list here, so small negative positions wrap around
+    position = numpy.where(position < 0, position + size, position)
+    specifier = numpy.where(perfectable,
+                            _PERFECT_SPECIFIERS[numpy.clip(position, 0, len(_PERFECT_SPECIFIERS) - 1)],
+                            _IMPERFECT_SPECIFIERS[numpy.clip(position, 0, len(_IMPERFECT_SPECIFIERS) - 1)])
+    specifier = numpy.where(possible, specifier, 0)
+    if specifier.ndim == 0:
+        return int(generic), int(semitones), int(specifier)
+    return generic, semitones, specifier
+
+def interval_name(generic, semitones, specifier, analysis_number):
+    """
+    Name one interval from its :func:`interval_parts` in the way of one 
+    of the :const:`analysis_types`.
+
+    :param int generic: The directed generic interval.
+    :param int semitones: The number of semitones.
+    :param int specifier: The music21 specifier constant.
+    :param int analysis_number: The index of the analysis in 
+        :const:`analysis_types`.
+
+    :returns: The interval's name.
+    :rtype: str
+
+    :raises: :exc:`~music21.interval.IntervalException` if the specifier 
+        is 0.
+    """
+    if not specifier:
+        raise interval.IntervalException(_IMPOSSIBLE_INTERVAL.format(generic, semitones))
+    generic, semitones = int(generic), int(semitones)
+    undirected = abs(generic)
+    steps = undirected % 7 or 7
+    semi_simple = 8 if steps == 1 and undirected > 7 else steps
+    minus = '-' if semitones < 0 else ''
+    prefix = interval.prefixSpecs[specifier]
+    interval_class = semitones % 12 if semitones % 12 <= 6 else 12 - semitones % 12
+    if analysis_number == 0:
+        return str(-semi_simple if generic < 0 else semi_simple)
+    elif analysis_number == 1:
+        return minus + prefix + str(semi_simple)
+    elif analysis_number == 2:
+        return str(-(abs(semitones) % 12) if semitones < 0 else abs(semitones) % 12)
+    elif analysis_number == 3:
+        return minus + str(interval_class)
+    elif analysis_number == 4:
+        return str(semi_simple)
+    elif analysis_number == 5:
+        return prefix + str(semi_simple)
+    elif analysis_number == 6:
+        return str(abs(semitones) % 12)
+    elif analysis_number == 7:
+        return str(interval_class)
+    elif analysis_number == 8:
+        return str(generic)
+    elif analysis_number == 9:
+        return minus + prefix + str(undirected)
+    elif analysis_number == 10:
+        return str(semitones)
+    elif analysis_number == 12:
+        return str(undirected)
+    elif analysis_number == 13:
+        return prefix + str(undirected)
+    else: # analysis_number == 14
+        return str(abs(semitones))
+
+def interval_names(generic, semitones, specifier, analysis_number):
+    """
+    Vectorized :func:`interval_name`. Each distinct interval is named 
+    only once.
+
+    :returns: The interval names.
+    :rtype: :class:`numpy.ndarray` of object
+    """
+    generic = numpy.asarray(generic, dtype=numpy.int64)
+    semitones = numpy.asarray(semitones, dtype=numpy.int64)
+    if len(generic) == 0:
+        return numpy.empty(0, dtype=object)
+    # the specifier follows from the other two
+    key = (generic - generic.min()) * (semitones.max() - semitones.min() + 1) + semitones - semitones.min()
+    _, first, inverse = numpy.unique(key, return_index=True, return_inverse=True)
+    names = numpy.empty(len(first), dtype=object)
+    names[:] = [interval_name(generic[i], semitones[i], specifier[i], analysis_number) for i in first]
+    return names[inverse]
+
+# -------------------------------------------------------------------- #
+# The interval lookup tables hold the name of the interval between 
+# every pair of the TABLE_PITCHES, for one analysis type each, as a 
+# dense array of int16 codes into a tuple of names. Each table is built 
+# once per process the first time it's needed and is read-only, so 
+# forked worker processes share it with their parent. Pitches outside 
+# the tables go through the interval engine and the bounded _memos.
+
+TABLE_PITCHES = tuple(step + accidental + str(octave) for octave in range(10) for step in _STEPS
+                      for accidental in ('--', '-', '', '#', '##')) + ('Rest',)
+"""
+The pitch names covered by :func:`interval_table`: every step with up 
+to two sharps or flats in octaves 0 through 9, and ``'Rest'`` last.
+"""
+_TABLE_CODES = {name: i for i, name in enumerate(TABLE_PITCHES)}
+_interval_tables = {}
+_MAX_MEMOS = 100000 # _memos is cleared when it reaches this size
+
+def interval_table(analysis_number):
+    """
+    Get the lookup table for one analysis type. The name of the interval 
+    from the lower pitch ``TABLE_PITCHES[i]`` to the upper pitch 
+    ``TABLE_PITCHES[j]`` is ``names[table[i, j]]``. Intervals with a 
+    rest are ``'Rest'``, and intervals that music21 can't name (because 
+    they're more than quadruply augmented or diminished) have the code 
+    -1.
+
+    :param int analysis_number: The index of the analysis in 
+        :const:`analysis_types`.
+
+    :returns: The read-only table and the names its codes refer to.
+    :rtype: 2-tuple of :class:`numpy.ndarray` of int16 and tuple of str
+    """
+    if analysis_number not in _interval_tables:
+        numbers = numpy.array([parse_pitch_name(x) for x in TABLE_PITCHES[:-1]])
+        generic, semitones, specifier = interval_parts(numbers[:, :1], numbers[:, 1:],
+                                                       numbers[:, 0], numbers[:, 1])
+        possible = specifier != 0
+        codes, names = pandas.factorize(interval_names(generic[possible], semitones[possible],
+                                                       specifier[possible], analysis_number))
+        table = numpy.empty((len(TABLE_PITCHES), len(TABLE_PITCHES)), dtype=numpy.int16)
+        pitches = table[:-1, :-1]
+        pitches[possible] = codes
+        pitches[~possible] = -1
+        table[-1, :] = table[:, -1] = len(names)
+        table.flags.writeable = False
+        _interval_tables[analysis_number] = (table, tuple(names) + ('Rest',))
+    return _interval_tables[analysis_number]
+
+def table_codes(names):
+    """
+    Find the positions of pitch names in :const:`TABLE_PITCHES`.
+
+    :param names: The pitch names.
+    :type names: sequence of str
+
+    :returns: The position of each name, or -1 for names that aren't in 
+        the tables (including NaN).
+    :rtype: :class:`numpy.ndarray` of int
+    """
+    codes, uniques = pandas.factorize(numpy.asarray(names, dtype=object))
+    found = numpy.array([_TABLE_CODES.get(x, -1) for x in uniques] + [-1], dtype=numpy.intp)
+    return found[codes]
+
+def pair_interval_names(pitches, pairs, analysis_number):
+    """
+    Name the intervals between many pairs of parts at once. The pitch 
+    names are converted to their positions in :const:`TABLE_PITCHES` 
+    once, the interval codes of every pair are found with a single 
+    lookup in the :func:`interval_table`, and the codes are only decoded 
+    to names at the end. Pitches that aren't in the tables are handled 
+    by :func:`interval_names_from_pitches`.
+
+    :param pitches: The forward-filled pitch names of each part, with a 
+        row for every offset and a column for every part. NaN means the 
+        part hasn't started yet.
+    :type pitches: 2-D :class:`numpy.ndarray` of object
+    :param pairs: The positions of the upper and lower part of each pair.
+    :type pairs: list of 2-tuples of int
+    :param int analysis_number: The index of the analysis in 
+        :const:`analysis_types`.
+
+    :returns: The interval names, with a row for every offset and a 
+        column for every pair.
+    :rtype: 2-D :class:`numpy.ndarray` of object
+    """
+    upper = numpy.array([x[0] for x in pairs], dtype=numpy.intp)
+    lower = numpy.array([x[1] for x in pairs], dtype=numpy.intp)
+    table, names = interval_table(analysis_number)
+    codes = table_codes(pitches.ravel()).reshape(pitches.shape)
+    lower_codes = codes[:, lower]
+    upper_codes = codes[:, upper]
+    in_table = (lower_codes >= 0) & (upper_codes >= 0)
+    interval_codes = numpy.where(in_table, table[lower_codes, upper_codes], -1)
+    post = numpy.array(names + (numpy.nan,), dtype=object)[interval_codes]
+    missing = pandas.isnull(pitches)
+    others = (interval_codes < 0) & ~missing[:, lower] & ~missing[:, upper]
+    if others.any():
+        rows, cols = numpy.nonzero(others)
+        post[rows, cols] = interval_names_from_pitches(pitches[rows, lower[cols]],
+                                                       pitches[rows, upper[cols]], analysis_number)
+    return post
+
+def _music21_interval_name(lower, upper, analysis_type):
+    """
+    Name an interval with music21, as a fallback for the pitch names 
+    that :func:`parse_pitch_name` doesn't handle.
+    """
+    try:
+        return analysis_type(interval.Interval(note.Note(lower), note.Note(upper)))
+    except pitch.PitchException:
+        return 'Rest'
+
+def interval_names_from_pitches(lower, upper, analysis_number):
+    """
+    Name the intervals between two sequences of pitch names in the way 
+    of one of the :const:`analysis_types`. This is the vectorized 
+    equivalent of :func:`real_indexer_func`: where either pitch is NaN 
+    the result is NaN, and where either is ``'Rest'`` the result is 
+    ``'Rest'``.
+
+    :param lower: The names of the lower pitches.
+    :type lower: sequence of str
+    :param upper: The names of the upper pitches.
+    :type upper: sequence of str
+    :param int analysis_number: The index of the analysis in 
+        :const:`analysis_types`.
+
+    :returns: The interval names.
+    :rtype: :class:`numpy.ndarray` of object
+    """
+    lower = numpy.asarray(lower, dtype=object)
+    upper = numpy.asarray(upper, dtype=object)
+    post = numpy.empty(len(lower), dtype=object)
+    # first look up the pitches in the table...
+    table, names = interval_table(analysis_number)
+    lower_codes = table_codes(lower)
+    upper_codes = table_codes(upper)
+    codes = numpy.where((lower_codes >= 0) & (upper_codes >= 0), table[lower_codes, upper_codes], -1)
+    looked_up = codes >= 0
+    post[looked_up] = numpy.array(names, dtype=object)[codes[looked_up]]
+    # ... then calculate the intervals of other parseable pitches...
+    lower_diatonic, lower_ps, lower_found = pitch_numbers(lower)
+    upper_diatonic, upper_ps, upper_found = pitch_numbers(upper)
+    found = lower_found & upper_found & ~looked_up
+    post[found] = interval_names(*interval_parts(lower_diatonic[found], lower_ps[found],
+                                                 upper_diatonic[found], upper_ps[found]),
+                                 analysis_number=analysis_number)
+    # ... and leave the rest to music21
+    found |= looked_up
+    fallbacks = {}
+    for i in numpy.nonzero(~found)[0]:
+        if isinstance(lower[i], float) or isinstance(upper[i], float):
+            post[i] = numpy.nan
+        elif lower[i] == 'Rest' or upper[i] == 'Rest':
+            post[i] = 'Rest'
+        else:
+            if (lower[i], upper[i]) not in fallbacks:
+                fallbacks[(lower[i], upper[i])] = _music21_interval_name(
+                    lower[i], upper[i], analysis_types[analysis_number])
+            post[i] = fallbacks[(lower[i], upper[i])]
+    return post
+
 def real_indexer_func(simultaneity, analysis_type):
     """
     Used internally by the :class:`IntervalIndexer` and 
@@ -78,13 +429,29 @@ def real_indexer_func(simultaneity, analysis_type):
     """
     if isinstance(simultaneity, float):
         return simultaneity
+    upper, lower = simultaneity
+    if isinstance(upper, float) or isinstance(lower, float):
+        # one of the voices hasn't started yet, which happens with the 
+        # extra columns of unpacked chords
+        return numpy.nan
+    analysis_number = _analysis_numbers.get(analysis_type)
+    if (analysis_number is not None and lower in _TABLE_CODES and upper in _TABLE_CODES):
+        table, names = interval_table(analysis_number)
+        code = table[_TABLE_CODES[lower], _TABLE_CODES[upper]]
+        if code >= 0:
+            return names[code]
     memo = (simultaneity, analysis_type)
     if memo not in _memos:
-        try:
-            upper, lower = simultaneity
-            _memos[memo] = analysis_type(interval.Interval(note.Note(lower), note.Note(upper)))
-        except pitch.PitchException:
-            _memos[memo] = 'Rest'
+        if len(_memos) >= _MAX_MEMOS:
+            _memos.clear()
+        lower_numbers = parse_pitch_name(lower)
+        upper_numbers = parse_pitch_name(upper)
+        if lower_numbers is None or upper_numbers is None or analysis_number is None:
+            _memos[memo] = _music21_interval_name(lower, upper, analysis_type)
+        else:
+            parts = interval_parts(lower_numbers[0], lower_numbers[1], 
+                                   upper_numbers[0], upper_numbers[1])
+            _memos[memo] = interval_name(*parts, analysis_number=analysis_number)
     return _memos[memo]
 
 
@@ -371,6 +738,299 @@ analysis_types = (dnq_dir_sim_analysis, dwq_dir_sim_analysis,
                   dnq_und_com_analysis, dwq_und_com_analysis, 
                   chr_und_com_analysis, None)
 
+# The position of each analysis function in analysis_types, which is 
+# what interval_name() takes.
+_analysis_numbers = {func: i for i, func in enumerate(analysis_types) if func is not None}
+
+# Translation tables from the names of compound, directed intervals 
+# with quality (what IndexedPiece caches) to every other analysis 
+# type. They're shared by every IntervalReindexer in the process, and 
+# each starts with all the names in that analysis type's interval_table.
+_CANONICAL_ANALYSIS = _analysis_numbers[dwq_dir_com_analysis]
+_canonical_intervals = {}
+_translations = {}
+
+def translation_table(analysis_number):
+    """
+    Get the translation table from the names of compound, directed 
+    intervals with quality to the names of another analysis type. Names 
+    that aren't in the table yet are added by :func:`translate_intervals`.
+
+    :param int analysis_number: The index of the analysis in 
+        :const:`analysis_types`.
+
+    :returns: The shared translation table.
+    :rtype: dict
+    """
+    if analysis_number not in _translations:
+        if not _canonical_intervals:
+            _canonical_intervals.update((name, interval.Interval(name))
+                                        for name in interval_table(_CANONICAL_ANALYSIS)[1][:-1])
+        analysis_type = analysis_types[analysis_number]
+        table = {name: analysis_type(intvl) for name, intvl in six.iteritems(_canonical_intervals)}
+        table['Rest'] = 'Rest'
+        _translations[analysis_number] = table
+    return _translations[analysis_number]
+
+def translate_intervals(names, analysis_number):
+    """
+    Translate the names of compound, directed intervals with quality 
+    into the names of another analysis type, in the way of 
+    ``analysis_type(music21.interval.Interval(name))``. Each distinct 
+    name is only looked up once, and NaN stays NaN.
+
+    :param names: The interval names.
+    :type names: 1-D sequence of str
+    :param int analysis_number: The index of the analysis in 
+        :const:`analysis_types`.
+
+    :returns: The translated names.
+    :rtype: :class:`numpy.ndarray` of object
+    """
+    table = translation_table(analysis_number)
+    codes, uniques = pandas.factorize(numpy.asarray(names, dtype=object))
+    for name in uniques:
+        if name not in table:
+            table[name] = analysis_types[analysis_number](interval.Interval(name))
+    translated = numpy.array([table[name] for name in uniques] + [numpy.nan], dtype=object)
+    return translated[codes]
+
+def find_analysis_number(settings):
+    """
+    Find which of the :const:`analysis_types` some interval settings ask 
+    for.
+
+    :param dict settings: The ``'quality'``, ``'directed'``, and 
+        ``'simple or compound'`` settings, as described for the 
+        :class:`IntervalIndexer`.
+
+    :returns: The index of the analysis in :const:`analysis_types`.
+    :rtype: int
+
+    :raises: :exc:`RuntimeWarning` if the settings ask for compound 
+        interval class analysis.
+    """
+    if (settings['simple or compound'] == 'compound' 
+        and settings['quality'] == 'interval class'):
+        raise RuntimeWarning("Interval class analysis cannot be " +
+            "compound, so the simple or compound setting has " + 
+            "been reset to compound")
+
+    # Use binary-inspired system to choose one of 14 indexer_funcs.
+    analysis_number = 0
+
+    # This block deals with the four quality settings. True and 
+    # False are offered as options to accommodate the old setting 
+    # types when we only offered two options for interval quality.
+    if (settings['quality'] == False 
+        or settings['quality'] == 'diatonic no quality'):
+        pass
+    elif (settings['quality'] == True 
+        or settings['quality'] == 'diatonic with quality'):
+        analysis_number += 1
+    elif (settings['quality'] == 'chromatic'):
+        analysis_number += 2
+    else: # i.e. settings['quality'] == 'interval class'
+        analysis_number += 3
+
+    # This block determines if the intervals are directed or not, 
+    # that is, whether they can be negative or not.
+    if (not settings['directed']):
+        analysis_number += 4
+
+    # This block decides between simple, i.e. within an octave, or 
+    # compound intervals.
+    if (settings['simple or compound'] == 'compound'):
+        analysis_number += 8
+
+    return analysis_number
+
+def voice_pairs(part_labels, pairs=None):
+    """
+    Find the voice pairs to analyze in a piece, in the order the 
+    :class:`IntervalIndexer` puts them in.
+
+    :param part_labels: The labels of the parts, highest first.
+    :type part_labels: sequence of str
+    :param pairs: The pairs to keep, as described for the ``'pairs'`` 
+        setting of the :class:`IntervalIndexer`, or ``None`` for all of 
+        them.
+    :type pairs: list of str or of 2-tuples of int, or NoneType
+
+    :returns: The positions of the two parts in each pair and the 
+        pair's label, like ``((0, 3), 'Soprano,Bass')``.
+    :rtype: list of 2-tuples
+
+    :raises: :exc:`RuntimeError` if a requested pair isn't in the piece.
+    """
+    everything = [(x, '{},{}'.format(part_labels[x[0]], part_labels[x[1]]))
+                  for x in combinations(range(len(part_labels)), 2)]
+    if pairs is None:
+        return everything
+    requested = set()
+    for pair in pairs:
+        if isinstance(pair, six.string_types):
+            found = [x for x, label in everything if label == pair]
+        else:
+            found = [x for x, _ in everything if x == tuple(pair)]
+        if not found:
+            raise RuntimeError(IntervalIndexer._UNKNOWN_PAIR.format(pair))
+        requested.add(found[0])
+    return [(x, label) for x, label in everything if x in requested]
+
+
+class IntervalCodes(object):
+    """
+    A compact, numeric form of the results of the 
+    :class:`IntervalIndexer` or :class:`HorizontalIntervalIndexer`, from 
+    which the results of any of the :const:`analysis_types` can be made. 
+    Each cell holds the position of its interval in ``vocabulary``, or 
+    -1 for NaN. The distinct intervals are kept as the 3-tuple of their 
+    :func:`interval_parts`, as ``('Rest',)``, or, for pitches that only 
+    music21 can parse, as the 2-tuple of their lower and upper pitch 
+    names.
+
+    Use :meth:`to_frame` to get the names for one analysis type. The 
+    names are formatted once per distinct interval, and the resulting 
+    :class:`DataFrame` is kept for the next time it's asked for.
+    """
+
+    def __init__(self, name, index, labels, codes, vocabulary):
+        """
+        :param str name: The indexer name for the first column level.
+        :param index: The offsets of the rows.
+        :type index: :class:`pandas.Index`
+        :param labels: The labels of the columns.
+        :type labels: list of str
+        :param codes: The positions in ``vocabulary``, with a row for 
+            every offset and a column for every label.
+        :type codes: 2-D :class:`numpy.ndarray` of int
+        :param vocabulary: The distinct intervals.
+        :type vocabulary: list of tuple
+        """
+        self.name = name
+        self.index = index
+        self.labels = list(labels)
+        self.codes = codes
+        self.vocabulary = vocabulary
+        self._frames = {}
+
+    @classmethod
+    def from_pitches(cls, name, index, labels, lower, upper):
+        """
+        Make the intervals between two arrays of pitch names. Where 
+        either pitch is NaN, so is the interval.
+
+        :param str name: The indexer name for the first column level.
+        :param index: The offsets of the rows.
+        :type index: :class:`pandas.Index`
+        :param labels: The labels of the columns.
+        :type labels: list of str
+        :param lower: The lower (or earlier) pitch of each interval.
+        :type lower: 2-D :class:`numpy.ndarray` of object
+        :param upper: The upper (or later) pitch of each interval.
+        :type upper: 2-D :class:`numpy.ndarray` of object
+
+        :rtype: :class:`IntervalCodes`
+        """
+        lower = numpy.asarray(lower, dtype=object)
+        upper = numpy.asarray(upper, dtype=object)
+        pitch_codes, pitches = pandas.factorize(numpy.concatenate((lower.ravel(), upper.ravel())))
+        pitches = numpy.asarray(pitches, dtype=object)
+        lower_codes = pitch_codes[:lower.size]
+        upper_codes = pitch_codes[lower.size:]
+        valid = (lower_codes >= 0) & (upper_codes >= 0)
+        pair_codes, keys = pandas.factorize(lower_codes[valid] * len(pitches) + upper_codes[valid])
+        lower_names = pitches[keys // max(len(pitches), 1)]
+        upper_names = pitches[keys % max(len(pitches), 1)]
+        lower_diatonic, lower_ps, lower_found = pitch_numbers(lower_names)
+        upper_diatonic, upper_ps, upper_found = pitch_numbers(upper_names)
+        parts = numpy.column_stack(interval_parts(lower_diatonic, lower_ps, upper_diatonic, upper_ps))
+        vocabulary = []
+        positions = {}
+        remap = numpy.empty(len(keys), dtype=numpy.intp)
+        for i in range(len(keys)):
+            if lower_found[i] and upper_found[i]:
+                key = tuple(int(x) for x in parts[i])
+            elif lower_names[i] == 'Rest' or upper_names[i] == 'Rest':
+                key = ('Rest',)
+            else:
+                key = (lower_names[i], upper_names[i])
+            if key not in positions:
+                positions[key] = len(vocabulary)
+                vocabulary.append(key)
+            remap[i] = positions[key]
+        codes = numpy.empty(lower.size, dtype=numpy.intp)
+        codes[~valid] = -1
+        codes[valid] = remap[pair_codes]
+        return cls(name, index, labels, codes.reshape(lower.shape), vocabulary)
+
+    def to_frame(self, analysis_number):
+        """
+        Name the intervals in the way of one of the 
+        :const:`analysis_types`.
+
+        :param int analysis_number: The index of the analysis in 
+            :const:`analysis_types`.
+
+        :returns: The same :class:`DataFrame` that the indexer would 
+            have made with the settings for this analysis type. The 
+            names are worked out once per analysis type, but each call 
+            returns a new copy, so you may change it freely.
+        :rtype: :class:`pandas.DataFrame`
+
+        :raises: :exc:`~music21.interval.IntervalException` if an 
+            interval is more than quadruply augmented or diminished.
+        """
+        if analysis_number not in self._frames:
+            names = numpy.empty(len(self.vocabulary) + 1, dtype=object)
+            names[-1] = numpy.nan
+            numeric = [i for i, key in enumerate(self.vocabulary) if len(key) == 3]
+            if numeric:
+                parts = numpy.array([self.vocabulary[i] for i in numeric], dtype=numpy.int64)
+                names[numeric] = interval_names(parts[:, 0], parts[:, 1], parts[:, 2], analysis_number)
+            for i, key in enumerate(self.vocabulary):
+                if len(key) == 1:
+                    names[i] = 'Rest'
+                elif len(key) == 2:
+                    names[i] = _music21_interval_name(key[0], key[1], analysis_types[analysis_number])
+            columns = pandas.MultiIndex.from_product(((self.name,), self.labels), names=_names)
+            self._frames[analysis_number] = pandas.DataFrame(names[self.codes], index=self.index,
+                                                             columns=columns)
+        return self._frames[analysis_number].copy()
+
+    def join(self, other):
+        """
+        Put the columns of another :class:`IntervalCodes` with the same 
+        index after these ones.
+
+        :rtype: :class:`IntervalCodes`
+        """
+        positions = {key: i for i, key in enumerate(self.vocabulary)}
+        vocabulary = list(self.vocabulary)
+        remap = []
+        for key in other.vocabulary:
+            if key not in positions:
+                positions[key] = len(vocabulary)
+                vocabulary.append(key)
+            remap.append(positions[key])
+        remap = numpy.array(remap + [-1], dtype=numpy.intp)
+        codes = numpy.hstack((self.codes, remap[other.codes]))
+        return IntervalCodes(self.name, self.index, self.labels + other.labels, codes, vocabulary)
+
+    def select(self, labels):
+        """
+        Keep only some columns, in the order given.
+
+        :param labels: The labels of the columns to keep.
+        :type labels: list of str
+
+        :rtype: :class:`IntervalCodes`
+        """
+        columns = [self.labels.index(label) for label in labels]
+        return IntervalCodes(self.name, self.index, labels, self.codes[:, columns], self.vocabulary)
+
+
 class IntervalIndexer(indexer.Indexer):
     """
     Use :class:`music21.interval.Interval` to create an index of the 
@@ -400,6 +1060,12 @@ class IntervalIndexer(indexer.Indexer):
     
     :keyword boolean 'mp': Multiprocesses when True (default) or 
         processes serially when False.
+
+    :keyword list 'pairs': The voice pairs to analyze. Use the labels of 
+        the output columns (like ``'Soprano,Bass'``) or 2-tuples of the 
+        positions of the parts (like ``(0, 3)``). The default is 
+        ``None``, which analyzes all pairs. Only the requested pairs are 
+        aligned and computed.
  
     **Example:**
 
@@ -419,19 +1085,26 @@ class IntervalIndexer(indexer.Indexer):
         'simple or compound': 'compound', 
         'quality': False, 
         'directed':True, 
-        'mp': True
+        'mp': True,
+        'pairs': None
     }
 
+    _UNKNOWN_PAIR = ("The 'pairs' setting includes a voice pair that " + 
+        "isn't in the piece: {}. Use labels like 'Soprano,Bass' where " +
+        "the higher part comes first, or 2-tuples of part positions.")
+
     #"A dict of default settings for the :class:`IntervalIndexer`."
 
     def __init__(self, score, settings=None):
         """
         :param score: The output of :class:`NoteRestIndexer` for all 
             parts in a piece, or a list of :class:`Series` of the style 
-            produced by the :class:`NoteRestIndexer`.
+            produced by the :class:`NoteRestIndexer`. The ragged output 
+            of :meth:`MultiStopIndexer.run_ragged` is also accepted, in 
+            which case every stop is treated as a voice.
         
-        :type score: list of :class:`pandas.Series` or 
-            :class:`pandas.DataFrame`
+        :type score: list of :class:`pandas.Series`, 
+            :class:`pandas.DataFrame`, or :class:`RaggedMultiStop`
         
         :param dict settings: Required and optional settings.
         
@@ -439,46 +1112,26 @@ class IntervalIndexer(indexer.Indexer):
         self._settings = IntervalIndexer.default_settings.copy()
         if settings is not None:
             self._settings.update(settings)
-        
-        super(IntervalIndexer, self).__init__(score, None)
-
 
-        if (self._settings['simple or compound'] == 'compound' 
-            and self._settings['quality'] == 'interval class'):
-            raise RuntimeWarning("Interval class analysis cannot be " +
-                "compound, so the simple or compound setting has " + 
-                "been reset to compound")
-            self._settings['simple or compound'] = 'simple'
-
-        # Use binary-inspired system to choose one of 14 indexer_funcs.
-        self._indexer_number = 0
-
-        # This block deals with the four quality settings. True and 
-        # False are offered as options to accommodate the old setting 
-        # types when we only offered two options for interval quality.
-        if (self._settings['quality'] == False 
-            or self._settings['quality'] == 'diatonic no quality'):
-            pass
-        elif (self._settings['quality'] == True 
-            or self._settings['quality'] == 'diatonic with quality'):
-            self._indexer_number += 1
-        elif (self._settings['quality'] == 'chromatic'):
-            self._indexer_number += 2
-        else: # i.e. self._settings['quality'] == 'interval class'
-            self._indexer_number += 3
-
-        # This block determines if the intervals are directed or not, 
-        # that is, whether they can be negative or not.
-        if (not self._settings['directed']):
-            self._indexer_number += 4
-
-        # This block decides between simple, i.e. within an octave, or 
-        # compound intervals.
-        if (self._settings['simple or compound'] == 'compound'):
-            self._indexer_number += 8
+        super(IntervalIndexer, self).__init__(score, None)
 
+        self._indexer_number = find_analysis_number(self._settings)
         self._indexer_func = indexer_funcs[self._indexer_number]
 
+    def _sounding(self):
+        """
+        Used internally by :meth:`run` and :meth:`run_codes` to find the 
+        offsets, the part names, and the pitch sounding in every part at 
+        every offset. Every part is forward-filled once, so all the pairs 
+        can be named together. A :class:`RaggedMultiStop` is read 
+        directly, without making its :class:`DataFrame`.
+        """
+        if isinstance(self._score, RaggedMultiStop):
+            parts, pitches = self._score.sounding()
+            return self._score.index, parts, pitches
+        return (self._score.index, self._score.columns.get_level_values(1),
+                self._score.fillna(method='ffill').values.astype(object))
+
     def run(self):
         """
         Make a new index of the piece.
@@ -490,14 +1143,32 @@ class IntervalIndexer(indexer.Indexer):
         :rtype: :class:`pandas.DataFrame`
         
         """
-        combos = [pandas.concat((self._score.iloc[:,x[0]], self._score.iloc[:,x[1]]), axis=1).fillna(method='ffill')
-                  for x in combinations(range(len(self._score.columns)), 2)]
-        post = pandas.concat([pandas.Series(list(zip(df.iloc[:,0].values, df.iloc[:,1].values)), index=df.index) 
-                              for df in combos], axis=1).applymap(self._indexer_func)
-        labels = ['{},{}'.format(x, y) for x, y in combinations(self._score.columns.get_level_values(1), 2)]
-        post.columns = pandas.MultiIndex.from_product((('interval.IntervalIndexer',), labels), names=_names)
+        index, parts, pitches = self._sounding()
+        pairs = voice_pairs(parts, self._settings['pairs'])
+        if not pairs:
+            return pandas.DataFrame(index=index, columns=pandas.MultiIndex.from_product(
+                (('interval.IntervalIndexer',), []), names=_names))
+        labels = [label for _, label in pairs]
+        return pandas.DataFrame(pair_interval_names(pitches, [x for x, _ in pairs], self._indexer_number),
+                                index=index,
+                                columns=pandas.MultiIndex.from_product((('interval.IntervalIndexer',), labels),
+                                                                       names=_names))
+
+    def run_codes(self):
+        """
+        Make the index of the piece in the compact form of 
+        :class:`IntervalCodes`, from which the results of every 
+        combination of the 'quality', 'directed', and 'simple or 
+        compound' settings can be made.
 
-        return post
+        :rtype: :class:`IntervalCodes`
+        """
+        index, parts, pitches = self._sounding()
+        pairs = voice_pairs(parts, self._settings['pairs'])
+        return IntervalCodes.from_pitches('interval.IntervalIndexer', index,
+                                          [label for _, label in pairs],
+                                          pitches[:, [x[1] for x, _ in pairs]],
+                                          pitches[:, [x[0] for x, _ in pairs]])
 
 
 class HorizontalIntervalIndexer(IntervalIndexer):
@@ -566,6 +1237,8 @@ class HorizontalIntervalIndexer(IntervalIndexer):
         self._settings = HorizontalIntervalIndexer.default_settings.copy()
         if settings is not None:
             self._settings.update(settings)
+        if isinstance(score, RaggedMultiStop):
+            score = score.to_frame()
         super(HorizontalIntervalIndexer, self).__init__(score, self._settings)
 
     def run(self):
@@ -577,26 +1250,39 @@ class HorizontalIntervalIndexer(IntervalIndexer):
         :rtype: :class:`pandas.DataFrame`
         
         """
-        # First we'll make two copies of each part's NoteRest index. One 
-        # copy will be missing the first element, and the other will be 
-        # missing the last element. We'll also use the index values 
-        # starting at the second element, so that each "horizontal" 
-        # interval is presented as occurring at the offset of the second 
-        # note involved.
-        post = [self._score.iloc[:, x].dropna() 
-            for x in range(len(self._score.columns))]
+        return self.run_codes().to_frame(self._indexer_number)
+
+    def run_codes(self):
+        """
+        Make the index of the piece in the compact form of 
+        :class:`IntervalCodes`, from which the results of every 
+        combination of the 'quality', 'directed', and 'simple or 
+        compound' settings can be made.
+
+        :rtype: :class:`IntervalCodes`
+        """
+        # Each part's notes and rests are paired with the ones before 
+        # them. The intervals are presented as occurring at the offset 
+        # of the second note involved, or of the first note with the 
+        # 'horiz_attach_before' setting, which is only a matter of which 
+        # slice of each part's index we use.
+        parts = [self._score.iloc[:, x].dropna() for x in range(len(self._score.columns))]
         if not (self._settings['horiz_attach_before']):
-            post = [pandas.Series(list(zip(x.values[1:], x.values[:-1])), index=x.index[1:]) 
-                for x in post]
+            indices = [x.index[1:] for x in parts]
         else:
-            post = [pandas.Series(list(zip(x.values[1:], x.values[:-1])), index=x.index[:-1]) 
-                for x in post]
-        post = pandas.concat(post, axis=1).applymap(self._indexer_func)
-        part_labels = self._score.columns.get_level_values(1)
-        post.columns = pandas.MultiIndex.from_product((('interval.HorizontalIntervalIndexer',),
-                                                       part_labels), names=_names)
-
-        return post
+            indices = [x.index[:-1] for x in parts]
+        index = indices[0]
+        for ind in indices[1:]:
+            index = index.union(ind)
+        lower = numpy.empty((len(index), len(parts)), dtype=object)
+        lower[:] = numpy.nan
+        upper = lower.copy()
+        for col, (part, ind) in enumerate(zip(parts, indices)):
+            rows = index.get_indexer(ind)
+            lower[rows, col] = part.values[:-1]
+            upper[rows, col] = part.values[1:]
+        return IntervalCodes.from_pitches('interval.HorizontalIntervalIndexer', index,
+                                          self._score.columns.get_level_values(1), lower, upper)
 
 
 class IntervalReindexer(HorizontalIntervalIndexer):
@@ -608,8 +1294,8 @@ class IntervalReindexer(HorizontalIntervalIndexer):
     directed intervals with diatonic quality) and re-indexes them to 
     match whatever settings the user has requested. This is much faster, 
     because it takes an entire interval as its input, rather than two 
-    notes, and therefore there are considerably fewer memos in its 
-    memoization scheme.
+    notes, and each distinct interval is translated with the shared 
+    :func:`translation_table` instead of with music21.
     """
 
     def __init__(self, score, settings=None):
@@ -620,17 +1306,9 @@ class IntervalReindexer(HorizontalIntervalIndexer):
         super(IntervalReindexer, self).__init__(score, self._settings)
 
         self._analysis_type = analysis_types[self._indexer_number]
-        self._memos = {'Rest': 'Rest'} 
-        # use a dict to memoize interval names
-
-        def indexer_func(x):
-            if isinstance(x, float):
-                return x
-            if x not in self._memos:
-                self._memos[x] = self._analysis_type(interval.Interval(x))
-            return self._memos[x]
-
-        self._indexer_func = indexer_func
 
     def run(self):
-        return self._score.applymap(self._indexer_func)
+        values = self._score.values
+        translated = translate_intervals(values.ravel(), self._indexer_number)
+        return pandas.DataFrame(translated.reshape(values.shape), index=self._score.index,
+                                columns=self._score.columns)
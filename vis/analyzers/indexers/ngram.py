@@ -34,10 +34,601 @@ re-implimentation of the previous ngram_indexer.py file.
 
 # pylint: disable=pointless-string-statement
 
+import heapq
+import json
+import numbers
+import os
+import numpy
 import pandas
+import six
 from vis.analyzers import indexer
 
 
+def _block_template(prefix, count, brackets, opener, closer):
+    """
+    Used internally by the :class:`NGramIndexer` to lay out one vertical 
+    or horizontal slice of an n-gram. The result lists the literal 
+    strings and the positions (from 0 to ``count - 1``) of the 
+    observations in the order they're joined. This is the order in which 
+    the string-based n-gram method sorted its columns, so that both give 
+    the same strings.
+    """
+    items = {}
+    if brackets:
+        items[(prefix, prefix + '0')] = opener
+    for j in range(count):
+        if j > 0: # add a space if it's a non-first observation
+            items[(prefix, prefix + str(j + .5))] = ' '
+        items[(prefix, prefix + str(j + 1))] = j
+    if brackets:
+        items[(prefix, prefix + str(count + 1))] = closer
+    # add a space after all observations
+    items[(prefix, prefix + str(count + 1.5))] = ' '
+    return [items[key] for key in sorted(items)]
+
+def _unique_rows(array):
+    """
+    Find the distinct rows of a 2-D integer array.
+
+    :returns: The distinct rows and, for every row of ``array``, the 
+        position of its distinct row.
+    :rtype: 2-tuple of :class:`numpy.ndarray`
+    """
+    array = numpy.ascontiguousarray(array)
+    if len(array) == 0 or array.shape[1] == 0:
+        return array[:1], numpy.zeros(len(array), dtype=numpy.intp)
+    rows = array.view(numpy.dtype((numpy.void, array.dtype.itemsize * array.shape[1]))).ravel()
+    _, first, inverse = numpy.unique(rows, return_index=True, return_inverse=True)
+    return array[first], inverse
+
+
+class NGramCodes(object):
+    """
+    The n-grams found by the :class:`NGramIndexer`, as integer codes. 
+    Each n-gram is a fixed-width row of positions in ``vocabulary``: 
+    the vertical observations of the first slice, then for each later 
+    slice the horizontal observations that lead to it and its vertical 
+    observations, and finally the open-ended horizontal observations if 
+    there are any. A row that contains -1 stands for NaN.
+
+    Use :meth:`strings` to get the n-grams as the strings that 
+    :meth:`NGramIndexer.run` returns. Each distinct n-gram is only 
+    rendered once.
+    """
+
+    def __init__(self, labels, vocabulary, indices, grams, templates):
+        """
+        :param labels: The label of each n-gram column.
+        :type labels: list of str
+        :param vocabulary: The observations the codes refer to.
+        :type vocabulary: :class:`numpy.ndarray` of object
+        :param indices: The offsets of the n-grams in each column.
+        :type indices: list of :class:`pandas.Index`
+        :param grams: The n-gram codes in each column, with a row for 
+            every offset.
+        :type grams: list of 2-D :class:`numpy.ndarray` of int
+        :param templates: How to join the observations of each column's 
+            n-grams into strings: a list of literal strings and of 
+            positions in the rows of ``grams``.
+        :type templates: list of list
+        """
+        self.labels = labels
+        self.vocabulary = vocabulary
+        self.indices = indices
+        self.grams = grams
+        self.templates = templates
+
+    def render(self, column, row):
+        """
+        Make the string of one n-gram.
+
+        :param int column: The position of the n-gram's column.
+        :param row: The n-gram's codes.
+        :type row: sequence of int
+
+        :rtype: str
+        """
+        return ''.join([x if isinstance(x, six.string_types) else self.vocabulary[row[x]]
+                        for x in self.templates[column]]).rstrip()
+
+    def render_rows(self, column, rows):
+        """
+        Make the strings of many n-grams at once, one template item at a 
+        time.
+
+        :param int column: The position of the n-grams' column.
+        :param rows: The n-grams' codes.
+        :type rows: 2-D :class:`numpy.ndarray` of int
+
+        :rtype: :class:`numpy.ndarray` of object
+        """
+        pieces = []
+        for x in self.templates[column]:
+            if pieces and isinstance(x, six.string_types) and isinstance(pieces[-1], six.string_types):
+                pieces[-1] += x
+            else:
+                pieces.append(x)
+        post = numpy.empty(len(rows), dtype=object)
+        post[:] = ''
+        for x in pieces:
+            post = post + (x if isinstance(x, six.string_types) else self.vocabulary[rows[:, x]])
+        post[:] = [x.rstrip() for x in post]
+        return post
+
+    def strings(self):
+        """
+        Render the n-grams.
+
+        :returns: The n-grams of each column, with NaN where the old 
+            string-based method would have had NaN.
+        :rtype: list of :class:`pandas.Series`
+        """
+        post = []
+        for column, (index, grams) in enumerate(zip(self.indices, self.grams)):
+            values = numpy.empty(len(grams), dtype=object)
+            values[:] = numpy.nan
+            complete = (grams >= 0).all(axis=1)
+            distinct, inverse = _unique_rows(grams[complete])
+            rendered = self.render_rows(column, distinct)
+            values[complete] = rendered[inverse] if len(rendered) else rendered
+            post.append(pandas.Series(values, index=index))
+        return post
+
+
+class NGramCounter(object):
+    """
+    Count n-grams from many pieces in one table, one piece at a time.
+    The n-grams of each piece are added as :class:`NGramCodes`, and
+    only the number of times each distinct n-gram happened is kept,
+    keyed on its codes in a vocabulary shared by all the pieces. The
+    n-grams are rendered as strings just once, by :meth:`counts`.
+
+    If a ``capacity`` is given, the counter only keeps that many
+    n-grams, with the Space-Saving algorithm: when the table is full, a
+    new n-gram replaces the one with the lowest count and takes over
+    that count as its possible error. The counts of the n-grams in the
+    table are never too low, and are at most N / ``capacity`` too high,
+    where N is the number of n-grams counted. Every n-gram that happened
+    more than N / ``capacity`` times is in the table.
+    """
+
+    def __init__(self, capacity=None):
+        """
+        :param capacity: The most n-grams to keep, or ``None`` to count
+            all of them exactly.
+        :type capacity: int or ``None``
+        """
+        self._capacity = capacity
+        self._sketched = capacity is not None
+        self._vocabulary = {}
+        self._templates = {}
+        self._counts = {}
+        self._errors = {}
+        self._heap = []
+        self._pushes = 0
+        self._only = None
+
+    def _update(self, key, count):
+        """
+        Used internally to count an n-gram ``count`` more times.
+        """
+        if self._only is not None:
+            if key in self._only:
+                self._counts[key] = self._counts.get(key, 0) + count
+            return
+        if self._capacity is None:
+            self._counts[key] = self._counts.get(key, 0) + count
+            return
+        if key in self._counts or len(self._counts) < self._capacity:
+            new = self._counts.get(key, 0) + count
+        else:
+            # replace the n-gram with the lowest count; the heap may hold 
+            # outdated entries, which are skipped
+            while True:
+                least, _, victim = heapq.heappop(self._heap)
+                if self._counts.get(victim) == least:
+                    break
+            del self._counts[victim]
+            self._errors.pop(victim, None)
+            self._errors[key] = least
+            new = least + count
+        self._counts[key] = new
+        self._pushes += 1
+        heapq.heappush(self._heap, (new, self._pushes, key))
+        if len(self._heap) > 4 * self._capacity:
+            self._heap = [(value, i, each) for i, (each, value) in enumerate(six.iteritems(self._counts))]
+            heapq.heapify(self._heap)
+
+    def add(self, codes):
+        """
+        Count the n-grams of a piece.
+
+        :param codes: The piece's n-grams.
+        :type codes: :class:`NGramCodes`
+        """
+        shared = numpy.array([self._vocabulary.setdefault(x, len(self._vocabulary))
+                              for x in codes.vocabulary], dtype=numpy.intp)
+        for template, grams in zip(codes.templates, codes.grams):
+            template = tuple(template)
+            template_id = self._templates.setdefault(template, len(self._templates))
+            grams = grams[(grams >= 0).all(axis=1)] # NaN isn't counted
+            if not len(grams):
+                continue
+            distinct, inverse = _unique_rows(grams)
+            for row, count in zip(shared[distinct], numpy.bincount(inverse)):
+                self._update((template_id,) + tuple(row), int(count))
+
+    def add_frame(self, frame):
+        """
+        Count the n-grams of a piece that were already rendered, as
+        :meth:`NGramIndexer.run` does when they can't be coded.
+
+        :param frame: The piece's n-grams.
+        :type frame: :class:`pandas.DataFrame`
+        """
+        for label in frame:
+            for gram, count in six.iteritems(frame[label].value_counts()):
+                self._update(gram, int(count))
+
+    def _totals(self):
+        """
+        Used internally to render the n-grams. N-grams with different
+        codes that render to the same string are added up.
+
+        :returns: The count, the possible error, and the keys of every
+            n-gram string.
+        :rtype: 3-tuple of dict
+        """
+        vocabulary = numpy.empty(len(self._vocabulary), dtype=object)
+        for obs, code in six.iteritems(self._vocabulary):
+            vocabulary[code] = obs
+        templates = [None] * len(self._templates)
+        for template, template_id in six.iteritems(self._templates):
+            templates[template_id] = list(template)
+        by_template = {}
+        rendered = []
+        for key in self._counts:
+            if isinstance(key, six.string_types):
+                rendered.append((key, key))
+            else:
+                by_template.setdefault(key[0], []).append(key)
+        for template_id, keys in six.iteritems(by_template):
+            grams = numpy.array([key[1:] for key in keys], dtype=numpy.intp)
+            strings = NGramCodes([], vocabulary, [], [], [templates[template_id]]).render_rows(0, grams)
+            rendered.extend(zip(strings, keys))
+        totals = {}
+        errors = {}
+        keys = {}
+        for gram, key in rendered:
+            totals[gram] = totals.get(gram, 0) + self._counts[key]
+            errors[gram] = errors.get(gram, 0) + self._errors.get(key, 0)
+            keys.setdefault(gram, []).append(key)
+        return totals, errors, keys
+
+    def counts(self, top_x=None):
+        """
+        Render the n-grams and their counts.
+
+        :param top_x: If given, only this many of the most common
+            n-grams are returned, from most to least common.
+        :type top_x: int or ``None``
+
+        :returns: When counting exactly without ``top_x``, the same
+            result as the :class:`ColumnAggregator` gives when it adds up
+            what the :class:`FrequencyExperimenter` counted in the
+            n-grams of every piece. Otherwise the n-grams are sorted
+            from most to least common, and if the counter has a
+            ``capacity`` there is also an ``'error'`` column with the
+            most that each count may be too high.
+        :rtype: :class:`pandas.DataFrame`
+        """
+        totals, errors, _ = self._totals()
+        if top_x is None and not self._sketched:
+            post = pandas.Series(totals, dtype=numpy.float64).sort_index()
+            return pandas.DataFrame({'aggregator.ColumnAggregator': post})
+        ranked = sorted(totals, key=lambda gram: (-totals[gram], gram))[:top_x]
+        post = pandas.DataFrame({'aggregator.ColumnAggregator':
+                                 pandas.Series([totals[x] for x in ranked], index=ranked, dtype=numpy.float64)})
+        if self._sketched:
+            post['error'] = pandas.Series([errors[x] for x in ranked], index=ranked, dtype=numpy.float64)
+        return post
+
+    def shortlist(self, top_x=None):
+        """
+        Make a counter that counts only the most common n-grams of this
+        counter, exactly. Add the same pieces to it again to find their
+        true counts.
+
+        :param top_x: The number of most common n-grams wanted. Every 
+            n-gram whose count may be as high as the ``top_x``-th 
+            highest count, given the errors, is counted again. The 
+            default is all those in this counter.
+        :type top_x: int or ``None``
+
+        :rtype: :class:`NGramCounter`
+        """
+        totals, errors, keys = self._totals()
+        ranked = sorted(totals, key=lambda gram: (-totals[gram], gram))
+        if top_x and top_x < len(ranked):
+            lowest = sorted((totals[x] - errors[x] for x in totals), reverse=True)[top_x - 1]
+            ranked = [x for x in ranked if totals[x] >= lowest]
+        post = NGramCounter()
+        post._sketched = self._sketched
+        post._vocabulary = self._vocabulary
+        post._templates = self._templates
+        post._only = set(key for gram in ranked for key in keys[gram])
+        return post
+
+
+class NGramIndex(object):
+    """
+    An inverted index of the n-grams of many pieces: for every n-gram, 
+    the pieces, voice combinations (the n-gram column labels), and 
+    offsets where it happens. Pieces are added one at a time, as 
+    :class:`NGramCodes`, and the n-grams are keyed on their codes in a 
+    vocabulary shared by all the pieces until the index is queried or 
+    saved, when each distinct n-gram is rendered once.
+
+    The index is saved to a directory with :meth:`save`, and 
+    :meth:`load` maps the postings back into memory without reading 
+    them, so a saved index is ready for queries right away. More pieces 
+    can be added to a loaded index.
+
+    **Example**
+
+    >>> index = agg_p.index_ngrams({'n': 4, 'vertical': 'all', 'horizontal': 'lowest'})
+    >>> index.find('[8] (2) [6] (-2) [7] (2) [6]')
+    >>> index.pieces_with('[8] (2) [6] (-2) [7] (2) [6]', '[3] (_) [3] (_) [3] (_) [3]')
+    >>> index.shared(min_pieces=2)
+    >>> index.save('my_index')
+    """
+
+    # The files a saved index is made of.
+    _POSTINGS_FILE = 'postings.npy'
+    _STARTS_FILE = 'starts.npy'
+    _HEADER_FILE = 'index.json'
+
+    # The dtype of the postings.
+    _POSTING = numpy.dtype([('piece', numpy.int32), ('column', numpy.int32), ('offset', numpy.float64)])
+
+    def __init__(self):
+        self._vocabulary = {}
+        self._templates = {}
+        self._keys = {} # n-gram key -> n-gram id
+        self._pieces = []
+        self._columns = {}
+        self._pending = []
+        self._grams = []
+        self._postings = numpy.empty(0, dtype=NGramIndex._POSTING)
+        self._starts = numpy.zeros(1, dtype=numpy.int64)
+
+    def _piece_id(self, name):
+        """
+        Used internally to number a new piece.
+        """
+        self._pieces.append(name)
+        return len(self._pieces) - 1
+
+    def _column_ids(self, labels):
+        """
+        Used internally to number voice combinations.
+        """
+        return [self._columns.setdefault(x, len(self._columns)) for x in labels]
+
+    def add(self, name, codes):
+        """
+        Index the n-grams of a piece.
+
+        :param str name: What to call the piece in the results of queries.
+        :param codes: The piece's n-grams.
+        :type codes: :class:`NGramCodes`
+        """
+        piece = self._piece_id(name)
+        shared = numpy.array([self._vocabulary.setdefault(x, len(self._vocabulary))
+                              for x in codes.vocabulary], dtype=numpy.intp)
+        for column, template, index, grams in zip(self._column_ids(codes.labels), codes.templates,
+                                                  codes.indices, codes.grams):
+            template_id = self._templates.setdefault(tuple(template), len(self._templates))
+            complete = (grams >= 0).all(axis=1) # NaN isn't indexed
+            if not complete.any():
+                continue
+            distinct, inverse = _unique_rows(grams[complete])
+            ids = numpy.array([self._keys.setdefault((template_id,) + tuple(row), len(self._keys))
+                               for row in shared[distinct]], dtype=numpy.int64)
+            self._pending.append((ids[inverse], piece, column,
+                                  numpy.asarray(index[complete], dtype=numpy.float64)))
+
+    def add_frame(self, name, frame):
+        """
+        Index the n-grams of a piece that were already rendered, as 
+        :meth:`NGramIndexer.run` does when they can't be coded.
+
+        :param str name: What to call the piece in the results of queries.
+        :param frame: The piece's n-grams.
+        :type frame: :class:`pandas.DataFrame`
+        """
+        piece = self._piece_id(name)
+        labels = [x[1] if isinstance(x, tuple) else x for x in frame.columns]
+        for column, label in zip(self._column_ids(labels), frame.columns):
+            grams = frame[label].dropna()
+            if not len(grams):
+                continue
+            ids = numpy.array([self._keys.setdefault(x, len(self._keys)) for x in grams],
+                              dtype=numpy.int64)
+            self._pending.append((ids, piece, column, numpy.asarray(grams.index, dtype=numpy.float64)))
+
+    def _settle(self):
+        """
+        Used internally to render the n-grams added since the index was 
+        last queried or saved, and to merge their postings into the 
+        sorted postings. Afterwards the n-gram ids are the positions of 
+        the n-grams in sorted order.
+        """
+        if not self._pending:
+            return
+        vocabulary = numpy.empty(len(self._vocabulary), dtype=object)
+        for obs, code in six.iteritems(self._vocabulary):
+            vocabulary[code] = obs
+        templates = [None] * len(self._templates)
+        for template, template_id in six.iteritems(self._templates):
+            templates[template_id] = list(template)
+
+        # render every key and find the id of its string among all strings
+        strings = numpy.empty(len(self._keys), dtype=object)
+        by_template = {}
+        for key, key_id in six.iteritems(self._keys):
+            if isinstance(key, six.string_types):
+                strings[key_id] = key
+            else:
+                by_template.setdefault(key[0], []).append((key[1:], key_id))
+        for template_id, rows in six.iteritems(by_template):
+            grams = numpy.array([row for row, _ in rows], dtype=numpy.intp)
+            rendered = NGramCodes([], vocabulary, [], [], [templates[template_id]]).render_rows(0, grams)
+            strings[[key_id for _, key_id in rows]] = rendered
+        self._grams = sorted(set(strings))
+        new_ids = numpy.searchsorted(numpy.array(self._grams, dtype=object), strings)
+        self._keys = dict((x, i) for i, x in enumerate(self._grams))
+
+        # gather the old and new postings with their new n-gram ids
+        old_ids = numpy.repeat(numpy.arange(len(self._starts) - 1), numpy.diff(self._starts))
+        gram_ids = [new_ids[old_ids]]
+        postings = [self._postings]
+        for ids, piece, column, offsets in self._pending:
+            gram_ids.append(new_ids[ids])
+            these = numpy.empty(len(ids), dtype=NGramIndex._POSTING)
+            these['piece'] = piece
+            these['column'] = column
+            these['offset'] = offsets
+            postings.append(these)
+        gram_ids = numpy.concatenate(gram_ids)
+        postings = numpy.concatenate(postings)
+        order = numpy.lexsort((postings['offset'], postings['column'], postings['piece'], gram_ids))
+        self._postings = postings[order]
+        self._starts = numpy.searchsorted(gram_ids[order], numpy.arange(len(self._grams) + 1)).astype(numpy.int64)
+        self._pending = []
+
+    def __len__(self):
+        """
+        The number of distinct n-grams.
+        """
+        self._settle()
+        return len(self._grams)
+
+    def grams(self):
+        """
+        All the distinct n-grams, in sorted order.
+
+        :rtype: list of str
+        """
+        self._settle()
+        return list(self._grams)
+
+    def _postings_of(self, gram):
+        """
+        Used internally to get the postings of an n-gram.
+        """
+        self._settle()
+        gram_id = self._keys.get(gram)
+        if gram_id is None:
+            return self._postings[:0]
+        return self._postings[self._starts[gram_id]:self._starts[gram_id + 1]]
+
+    def find(self, gram):
+        """
+        Find where an n-gram happens.
+
+        :param str gram: The n-gram, as :meth:`NGramIndexer.run` gives it.
+
+        :returns: A row for every time the n-gram happens, with the 
+            ``'piece'``, the voice combination (``'voices'``), and the 
+            ``'offset'``.
+        :rtype: :class:`pandas.DataFrame`
+        """
+        found = self._postings_of(gram)
+        columns = numpy.empty(len(self._columns), dtype=object)
+        for label, column in six.iteritems(self._columns):
+            columns[column] = label
+        return pandas.DataFrame({'piece': numpy.array(self._pieces, dtype=object)[found['piece']],
+                                 'voices': columns[found['column']],
+                                 'offset': numpy.array(found['offset'])},
+                                columns=['piece', 'voices', 'offset'])
+
+    def pieces_with(self, *grams):
+        """
+        Find the pieces in which all of these n-grams happen.
+
+        :param grams: The n-grams.
+        :type grams: str
+
+        :returns: The pieces' names, in the order they were added.
+        :rtype: list of str
+        """
+        common = None
+        for gram in grams:
+            these = numpy.unique(self._postings_of(gram)['piece'])
+            common = these if common is None else numpy.intersect1d(common, these, assume_unique=True)
+        if common is None:
+            return []
+        return [self._pieces[x] for x in common]
+
+    def shared(self, min_pieces=2):
+        """
+        Find the n-grams that happen in several pieces.
+
+        :param int min_pieces: The fewest pieces an n-gram must happen in.
+
+        :returns: The number of pieces each of these n-grams happens in.
+        :rtype: :class:`pandas.Series`
+        """
+        self._settle()
+        gram_ids = numpy.repeat(numpy.arange(len(self._grams)), numpy.diff(self._starts))
+        pairs = numpy.unique(gram_ids * len(self._pieces) + self._postings['piece'])
+        counts = numpy.bincount(pairs // max(len(self._pieces), 1), minlength=len(self._grams))
+        wanted = numpy.flatnonzero(counts >= min_pieces)
+        return pandas.Series(counts[wanted], index=[self._grams[x] for x in wanted])
+
+    def save(self, directory):
+        """
+        Write the index to a directory, which is made if it doesn't exist.
+
+        :param str directory: The pathname of the directory.
+        """
+        self._settle()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        # a loaded index may still be mapped from the files about to be written
+        if isinstance(self._postings, numpy.memmap):
+            self._postings = numpy.array(self._postings)
+        if isinstance(self._starts, numpy.memmap):
+            self._starts = numpy.array(self._starts)
+        numpy.save(os.path.join(directory, NGramIndex._POSTINGS_FILE), self._postings)
+        numpy.save(os.path.join(directory, NGramIndex._STARTS_FILE), self._starts)
+        columns = sorted(self._columns, key=self._columns.get)
+        with open(os.path.join(directory, NGramIndex._HEADER_FILE), 'w') as header:
+            json.dump({'grams': self._grams, 'pieces': self._pieces, 'columns': columns}, header)
+
+    @classmethod
+    def load(cls, directory):
+        """
+        Read an index that was written with :meth:`save`. The postings 
+        are memory-mapped.
+
+        :param str directory: The pathname of the directory.
+
+        :rtype: :class:`NGramIndex`
+        """
+        post = cls()
+        with open(os.path.join(directory, NGramIndex._HEADER_FILE)) as header:
+            header = json.load(header)
+        post._grams = header['grams']
+        post._keys = dict((x, i) for i, x in enumerate(post._grams))
+        post._pieces = header['pieces']
+        post._columns = dict((x, i) for i, x in enumerate(header['columns']))
+        post._postings = numpy.load(os.path.join(directory, NGramIndex._POSTINGS_FILE), mmap_mode='r')
+        post._starts = numpy.load(os.path.join(directory, NGramIndex._STARTS_FILE), mmap_mode='r')
+        return post
+
+
 class NGramIndexer(indexer.Indexer):
     """
     Indexer that finds k-part n-grams from other indices.
@@ -182,6 +773,12 @@ class NGramIndexer(indexer.Indexer):
     default, but you can set this separately, for example to ``'P1'`` 
     ``'0'``, as seems appropriate.
 
+    To get n-grams of several lengths, pass a list as the ``'n'`` 
+    setting, for example ``range(2, 9)``. They are all found together and 
+    :meth:`run` returns a list of DataFrames, one for each length from 
+    shortest to longest. With the ``'maximal'`` setting, n-grams that 
+    only ever happen as part of the same longer n-gram are left out.
+
     Once you've chosen the appropriate settings, to actually run the 
     indexer call it like this:
 
@@ -221,7 +818,8 @@ class NGramIndexer(indexer.Indexer):
         'brackets', 
         'terminator',
         'continuer', 
-        'align'
+        'align',
+        'maximal'
     ]
     
     """
@@ -237,9 +835,11 @@ class NGramIndexer(indexer.Indexer):
     
     :type 'vertical': list of tuples of strings, default 'all'.
     
-    :keyword 'n': The number of "vertical" events per n-gram.
+    :keyword 'n': The number of "vertical" events per n-gram. If this 
+        is a list, the n-grams of every one of these lengths are found 
+        together.
     
-    :type 'n': int
+    :type 'n': int or list of int
     
     :keyword 'open-ended': Appends the next horizontal observation to 
         n-grams leaving them open-ended.
@@ -264,6 +864,13 @@ class NGramIndexer(indexer.Indexer):
         event, this is printed instead, to show that the previous "horizontal" event continues.
     
     :type 'continuer': str, default '_'.
+
+    :keyword 'maximal': When the 'n' setting is a list, leave out the 
+        n-grams that only ever happen as part of the same n-gram of the 
+        next longer length. Observations and the continuer must be 
+        strings to use this.
+
+    :type 'maximal': bool, default ``False``.
     
     """
 
@@ -274,7 +881,8 @@ class NGramIndexer(indexer.Indexer):
         'terminator': [], 
         'vertical': 'all', 
         'continuer': '_', 
-        'align': 'left'
+        'align': 'left',
+        'maximal': False
     }
 
     _MISSING_SETTINGS = ("NGramIndexer requires 'vertical' and 'n' " + 
@@ -309,6 +917,8 @@ class NGramIndexer(indexer.Indexer):
         "observations in either of the passed dataframes.")
     _WRONG_ALIGN_SETTING = ("Incorrect 'align' setting passed. " + 
         "Please use 'left', 'right', 'l', or 'r'.")
+    _NOT_STRINGS = ("Integer-coded n-grams can only be made when all " +
+        "the observations and the 'continuer' are strings.")
 
     def __init__(self, score, settings=None):
         """
@@ -336,13 +946,15 @@ class NGramIndexer(indexer.Indexer):
         if (settings is None or 'vertical' not in settings 
             or 'n' not in settings):
             raise RuntimeError(NGramIndexer._MISSING_SETTINGS)
-        elif (settings['n'] < 1):
+        self._many = not isinstance(settings['n'], numbers.Integral)
+        self._ns = sorted(set(settings['n'])) if self._many else [settings['n']]
+        if (not self._ns or self._ns[0] < 1):
             raise RuntimeError(NGramIndexer._N_VALUE_TOO_LOW)
         else:
             self._settings = NGramIndexer.default_settings.copy()
             self._settings.update(settings)
         
-        self._cut_off = self._settings['n'] if not self._settings['open-ended'] else self._settings['n'] + 1
+        self._cut_off = self._ns[0] if not self._settings['open-ended'] else self._ns[0] + 1
         if (all(self._cut_off > len(df) for df in score)):
             raise RuntimeWarning(NGramIndexer._N_VALUE_TOO_HIGH)
 
@@ -353,7 +965,7 @@ class NGramIndexer(indexer.Indexer):
         if self._settings['horizontal']:
             if len(self._score) != 2:
                 raise RuntimeError(NGramIndexer._MISSING_HORIZONTAL_DATA)
-            elif self._settings['n'] == 1 and not self._settings['open-ended']:
+            elif self._ns[-1] == 1 and not self._settings['open-ended']:
                 raise RuntimeWarning(NGramIndexer._SUPERFLUOUS_HORIZONTAL_DATA)
             elif (self._settings['horizontal'] not in ('lowest', 'highest') 
                 and not all([col_name in self._score[1].columns.levels[1] 
@@ -385,16 +997,219 @@ class NGramIndexer(indexer.Indexer):
                                            'Right', 'LEFT', 'RIGHT'):
             raise RuntimeWarning(NGramIndexer._WRONG_ALIGN_SETTING)
 
+    def _observations(self):
+        """
+        Used internally to find the vertical and horizontal 
+        :class:`Series` (without NaN) that make up each column of 
+        n-grams, and the label of each column.
+        """
+        columns = []
+        for i, verts in enumerate(self._settings['vertical']):
+            vert = [self._score[0].loc[:, (self._vertical_indexer_name, name)].dropna() for name in verts]
+            horiz = []
+            label = list(verts)
+            if self._settings['horizontal']:
+                horizs = self._settings['horizontal'][i]
+                horiz = [self._score[1].loc[:, (self._horizontal_indexer_name, name)].dropna()
+                         for name in horizs]
+                label.append(':')
+                label.extend(horizs)
+            columns.append((' '.join(label), vert, horiz))
+        return columns
+
+    def run_codes(self):
+        """
+        Make an index of k-part n-grams of anything, as integer codes.
+
+        :returns: The n-grams, from which :meth:`run` renders strings. 
+            If the ``'n'`` setting is a list, there are n-grams of each 
+            length, in order from shortest to longest.
+        :rtype: :class:`NGramCodes` or list of :class:`NGramCodes`
+
+        :raises: :exc:`RuntimeError` if an observation or the 
+            ``'continuer'`` isn't a string.
+        """
+        longest = self._ns[-1]
+        brackets = self._settings['brackets']
+        continuer = self._settings['continuer']
+        open_ended = self._settings['open-ended']
+        columns = self._observations()
+        every = [ser.values for _, vert, horiz in columns for ser in vert + horiz]
+        codes, vocabulary = pandas.factorize(numpy.concatenate(every + [numpy.array([continuer], dtype=object)]))
+        vocabulary = numpy.asarray(vocabulary, dtype=object)
+        if not all(isinstance(x, six.string_types) for x in vocabulary):
+            raise RuntimeError(NGramIndexer._NOT_STRINGS)
+        continuer_code = codes[-1]
+        terminators = set(self._settings['terminator'])
+        terminator_codes = numpy.array([i for i, x in enumerate(vocabulary) if x in terminators],
+                                       dtype=numpy.intp)
+
+        results = dict((n, ([], [], [])) for n in self._ns) # indices, grams, and templates
+        start = 0
+        for label, vert, horiz in columns:
+            # All the observations are aligned on the union of their 
+            # indices. Vertical observations are forward-filled and 
+            # missing horizontal ones are continuers.
+            index = None
+            for ser in vert + horiz:
+                index = ser.index if index is None else index.union(ser.index)
+            rows = len(index)
+            vert_codes = numpy.empty((rows, len(vert)), dtype=numpy.intp)
+            horiz_codes = numpy.empty((rows, len(horiz)), dtype=numpy.intp)
+            for these, ser in zip([vert_codes[:, j] for j in range(len(vert))] +
+                                  [horiz_codes[:, j] for j in range(len(horiz))], vert + horiz):
+                these[:] = -1
+                these[index.get_indexer(ser.index)] = codes[start:start + len(ser)]
+                start += len(ser)
+            if rows:
+                # forward-fill with the row of the last observation
+                held = numpy.where(vert_codes >= 0, numpy.arange(rows)[:, None], 0)
+                held = numpy.maximum.accumulate(held, axis=0)
+                vert_codes = vert_codes[held, numpy.arange(len(vert))]
+            horiz_codes[horiz_codes < 0] = continuer_code
+
+            # Lay the slices of the longest n-grams side by side, with -2 
+            # past the end. Shorter n-grams are the first of these slices.
+            padding = longest + 1
+            vert_codes = numpy.vstack((vert_codes, numpy.full((padding, len(vert)), -2, dtype=numpy.intp)))
+            horiz_codes = numpy.vstack((horiz_codes, numpy.full((padding, len(horiz)), -2, dtype=numpy.intp)))
+            v_template = _block_template('v', len(vert), brackets, '[', ']')
+            h_template = _block_template('h', len(horiz), brackets, '(', ')')
+            blocks = [vert_codes[:rows]]
+            template = list(v_template)
+            width = len(vert)
+            layouts = {1: (len(blocks), len(template), width, 0)}
+            for x in range(1, longest):
+                if horiz:
+                    blocks.append(horiz_codes[x:x + rows])
+                    template.extend(y if isinstance(y, six.string_types) else y + width for y in h_template)
+                    width += len(horiz)
+                blocks.append(vert_codes[x:x + rows])
+                template.extend(y if isinstance(y, six.string_types) else y + width for y in v_template)
+                width += len(vert)
+                layouts[x + 1] = (len(blocks), len(template), width, x)
+
+            found = {}
+            for n in self._ns:
+                count, length, n_width, last_shift = layouts[n]
+                n_blocks = blocks[:count]
+                n_template = template[:length]
+                if open_ended and horiz:
+                    n_blocks = n_blocks + [horiz_codes[n:n + rows]]
+                    n_template = n_template + [y if isinstance(y, six.string_types) else y + n_width
+                                               for y in h_template]
+                    last_shift = n
+                gram_codes = numpy.hstack(n_blocks)
+                past_end = numpy.arange(rows) + last_shift >= rows # these would be NaN
+
+                # Get rid of the n-grams that contain any of the terminators 
+                # or NaN, otherwise just trim the trailing rows.
+                cut_off = n + 1 if open_ended else n
+                if terminators:
+                    keep = ~past_end & (gram_codes >= 0).all(axis=1)
+                    keep &= ~numpy.in1d(gram_codes, terminator_codes).reshape(gram_codes.shape).any(axis=1)
+                    if any(x in terminators for x in n_template if isinstance(x, six.string_types)):
+                        keep[:] = False
+                elif cut_off > 1:
+                    keep = numpy.arange(rows) < rows - cut_off + 1
+                else:
+                    keep = numpy.ones(rows, dtype=bool)
+                found[n] = (gram_codes, keep, n_template)
+
+            if self._settings['maximal']:
+                NGramIndexer._drop_contained(found, rows)
+
+            for n in self._ns:
+                gram_codes, keep, n_template = found[n]
+                n_index = index
+                # Apply the right alignment if the user asked for it.
+                if (n > 1 and self._settings['align'] in ('right', 'Right', 'RIGHT', 'r', 'R')):
+                    new_index = index[n-1:]
+                    # It doesn't really matter what we put on the end 
+                    # because this will get cut off anyway,
+                    # but the values do always have to increase.
+                    n_index = new_index.append(pandas.Index([new_index[-1] + x 
+                        for x in range(1, n)]))
+                results[n][0].append(n_index[keep])
+                results[n][1].append(gram_codes[keep])
+                results[n][2].append(n_template)
+
+        labels = [label for label, _, _ in columns]
+        post = [NGramCodes(labels, vocabulary, *results[n]) for n in self._ns]
+        return post if self._many else post[0]
+
+    @staticmethod
+    def _drop_contained(found, rows):
+        """
+        Used internally by :meth:`run_codes` for the ``'maximal'`` 
+        setting. An n-gram is dropped if each time it happens it is part 
+        of the same n-gram of the next longer length, at the same place.
+
+        :param found: For each length, the codes of one column of n-grams 
+            and which of them are kept. Those to drop are no longer kept.
+        :type found: dict
+        :param int rows: The number of n-grams of each length.
+        """
+        # number the distinct n-grams of each length, with -1 for those 
+        # that aren't kept or contain NaN
+        ids = {}
+        for n, (gram_codes, keep, _) in six.iteritems(found):
+            valid = keep & (gram_codes >= 0).all(axis=1)
+            ids[n] = numpy.full(rows, -1, dtype=numpy.intp)
+            if valid.any():
+                ids[n][valid] = _unique_rows(gram_codes[valid])[1]
+        lengths = sorted(found)
+        for short, longer in zip(lengths, lengths[1:]):
+            short_ids = ids[short]
+            valid = short_ids >= 0
+            if not valid.any():
+                continue
+            distinct = short_ids.max() + 1
+            contained = numpy.zeros(distinct, dtype=bool)
+            # the longer n-gram may start up to "longer - short" slices earlier
+            for shift in range(longer - short + 1):
+                around = numpy.full(rows, -1, dtype=numpy.intp)
+                around[shift:] = ids[longer][:rows - shift]
+                lowest = numpy.full(distinct, rows, dtype=numpy.intp)
+                highest = numpy.full(distinct, -1, dtype=numpy.intp)
+                numpy.minimum.at(lowest, short_ids[valid], around[valid])
+                numpy.maximum.at(highest, short_ids[valid], around[valid])
+                contained |= (lowest == highest) & (lowest >= 0)
+            found[short][1][valid & contained[numpy.maximum(short_ids, 0)]] = False
+
     def run(self):
         """
         Make an index of k-part n-grams of anything.
 
         :returns: A new index of the piece in the form of a 
             class:`~pandas.DataFrame` with as many columns as there are 
-            tuples in the 'vertical' setting of the passed settings.
-        
+            tuples in the 'vertical' setting of the passed settings. If 
+            the ``'n'`` setting is a list, a list of these, one for each 
+            length from shortest to longest.
+
+        :raises: :exc:`RuntimeError` if the ``'maximal'`` setting is 
+            used and an observation or the ``'continuer'`` isn't a 
+            string.
+        """
+        try:
+            codes = self.run_codes()
+        except RuntimeError:
+            # there are observations that aren't strings
+            if self._settings['maximal']:
+                raise
+            post = [self._run_strings(n) for n in self._ns]
+            return post if self._many else post[0]
+        if self._many:
+            return [self.make_return(each.labels, each.strings()) for each in codes]
+        return self.make_return(codes.labels, codes.strings())
+
+    def _run_strings(self, n):
+        """
+        Make an index of k-part n-grams by concatenating the strings of 
+        their observations. This is used when not all the observations 
+        are strings, since they're converted with :func:`str`.
         """
-        n = self._settings['n']        
+        cut_off = n if not self._settings['open-ended'] else n + 1
         post = []
         cols = []
         # Each i in this loop will be a dataframe column of ngrams for a 
@@ -475,8 +1290,8 @@ class NGramIndexer(indexer.Indexer):
                 ngram_df = ngram_df.replace(self._settings['terminator'], float('nan')).dropna()
             # if there are no terminators then we need to trim the 
             # trailing rows that contain nans
-            elif self._cut_off > 1:
-                ngram_df = ngram_df.iloc[:(-self._cut_off + 1), :]
+            elif cut_off > 1:
+                ngram_df = ngram_df.iloc[:(-cut_off + 1), :]
 
             # Try to concatenate strings of each row to turn df into a 
             # series. If you encounter type other than string, first 
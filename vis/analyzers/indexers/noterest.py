@@ -33,6 +33,8 @@ Index note and rest objects into pandas DataFrame(s).
 """
 
 import six
+from itertools import chain
+import numpy
 import pandas
 from music21 import pitch, note, chord
 from vis.analyzers import indexer
@@ -119,6 +121,196 @@ def multistop_ind_func(event):
     else: # The event is a chord
         return [six.u(p.nameWithOctave) for p in event.pitches]
 
+class RaggedMultiStop(object):
+    """
+    A ragged (CSR-style) form of the results of the 
+    :class:`MultiStopIndexer`. Rather than keeping each chord as a list 
+    of pitch names in an object-dtype cell, every pitch in the piece is 
+    stored once in the flat categorical :attr:`pitches` array, and each 
+    part's events point into it with the :attr:`starts` and 
+    :attr:`lengths` arrays. Those two arrays have one row per part and 
+    one column per offset in :attr:`index`; a length of 0 means the part 
+    has no event at that offset.
+
+    Use :meth:`MultiStopIndexer.run_ragged` to get one of these, and 
+    :meth:`to_frame` to convert it to the :class:`DataFrame` returned by 
+    :meth:`MultiStopIndexer.run`. The :class:`IntervalIndexer` and the 
+    :class:`FrequencyExperimenter` also accept it directly.
+
+    **Example:**
+
+    >>> from vis.analyzers.indexers.noterest import MultiStopIndexer
+    >>> ragged = MultiStopIndexer(the_score).run_ragged()
+    >>> ragged.event(1, 2.0)
+    [u'D4', u'F#4']
+    
+    """
+
+    name = 'noterest.MultiStopIndexer'
+    "The indexer name used in the columns of :meth:`to_frame`."
+
+    def __init__(self, index, pitches, starts, lengths):
+        """
+        :param index: The offsets of the events.
+        :type index: :class:`pandas.Index`
+        :param pitches: The names of all the pitches in all the parts.
+        :type pitches: :class:`pandas.Categorical`
+        :param starts: The position in ``pitches`` of the first pitch of 
+            each part's event at each offset.
+        :type starts: 2-D :class:`numpy.ndarray` of int
+        :param lengths: The number of pitches in each part's event at 
+            each offset.
+        :type lengths: 2-D :class:`numpy.ndarray` of int
+        """
+        self.index = index
+        self.pitches = pitches
+        self.starts = starts
+        self.lengths = lengths
+
+    @classmethod
+    def from_events(cls, df):
+        """
+        Build a :class:`RaggedMultiStop` from a :class:`DataFrame` with 
+        the output of :func:`multistop_ind_func` for each part in a 
+        column, where the events are tuples or lists of pitch names and 
+        the offsets without an event are NaN.
+
+        :param df: The events of each part.
+        :type df: :class:`pandas.DataFrame`
+
+        :returns: The same events in ragged form.
+        :rtype: :class:`RaggedMultiStop`
+        """
+        parts = [df.iloc[:, x].dropna() for x in range(len(df.columns))]
+        if parts:
+            index = parts[0].index
+            for part in parts[1:]:
+                index = index.union(part.index)
+        else:
+            index = df.index[:0]
+        lengths = numpy.zeros((len(parts), len(index)), dtype=numpy.intp)
+        flat = []
+        for p, part in enumerate(parts):
+            positions = index.get_indexer(part.index)
+            order = numpy.argsort(positions, kind='mergesort')
+            events = part.values[order]
+            lengths[p, positions[order]] = [len(x) for x in events]
+            flat.extend(chain.from_iterable(events))
+        starts = numpy.cumsum(lengths, axis=None).reshape(lengths.shape) - lengths
+        return cls(index, pandas.Categorical(flat), starts, lengths)
+
+    @property
+    def parts(self):
+        "The number of parts."
+        return self.lengths.shape[0]
+
+    def event(self, part, offset):
+        """
+        Get the pitch names of one part's event.
+
+        :param int part: The index of the part.
+        :param float offset: The offset of the event.
+
+        :returns: The pitch names of the event, which is empty if the 
+            part has no event at this offset.
+        :rtype: list of str
+        """
+        i = self.index.get_loc(offset)
+        start = self.starts[part, i]
+        return list(self.pitches[start:start + self.lengths[part, i]])
+
+    def _columns(self):
+        """
+        Used internally. Find the column in the :meth:`to_frame` output 
+        of every element of :attr:`pitches`, along with the row and the 
+        number of columns of each part.
+
+        :returns: The row and column of each pitch, and the widths.
+        :rtype: 3-tuple of :class:`numpy.ndarray`
+        """
+        widths = self.lengths.max(axis=1) if self.index.size else numpy.zeros(self.parts, dtype=numpy.intp)
+        first_col = numpy.cumsum(widths) - widths
+        flat_lengths = self.lengths.ravel()
+        rows = numpy.repeat(numpy.tile(numpy.arange(len(self.index)), self.parts), flat_lengths)
+        cols = (numpy.arange(len(self.pitches)) -
+                numpy.repeat(self.starts.ravel(), flat_lengths) +
+                numpy.repeat(numpy.repeat(first_col, len(self.index)), flat_lengths))
+        return rows, cols, widths
+
+    def unpack(self):
+        """
+        Put each pitch of each event in its own column, as 
+        :func:`unpack_chords` does. The pitches are scattered into a 
+        single NaN-filled array in one pass.
+
+        :returns: The unpacked pitch names. The columns are labelled 
+            with the position of the pitch within the chord.
+        :rtype: :class:`pandas.DataFrame`
+        """
+        rows, cols, widths = self._columns()
+        post = numpy.empty((len(self.index), widths.sum()), dtype=object)
+        post.fill(float('nan'))
+        post[rows, cols] = numpy.asarray(self.pitches, dtype=object)
+        labels = list(chain.from_iterable(range(w) for w in widths))
+        return pandas.DataFrame(post, index=self.index, columns=labels)
+
+    def sounding(self):
+        """
+        Find the pitch sounding in every column of the :meth:`to_frame` 
+        output at every offset, as the :class:`IntervalIndexer` needs 
+        them, without building the :class:`DataFrame`. Each pitch lasts 
+        until the next one in its column.
+
+        :returns: The column labels, and the pitch names with one row 
+            per offset in :attr:`index`, NaN before a column's first 
+            pitch.
+        :rtype: 2-tuple of list of str and 2-D :class:`numpy.ndarray`
+        """
+        rows, cols, widths = self._columns()
+        post = numpy.empty((len(self.index), widths.sum()), dtype=object)
+        post.fill(float('nan'))
+        post[rows, cols] = numpy.asarray(self.pitches, dtype=object)
+        latest = numpy.zeros(post.shape, dtype=numpy.intp)
+        latest[rows, cols] = rows
+        numpy.maximum.accumulate(latest, axis=0, out=latest)
+        post = post[latest, numpy.arange(post.shape[1])]
+        return [str(x) for x in range(post.shape[1])], post
+
+    def to_frame(self):
+        """
+        Convert to the :class:`DataFrame` returned by 
+        :meth:`MultiStopIndexer.run`.
+
+        :returns: The unpacked pitch names with the indexer's 
+            :class:`MultiIndex` on the columns.
+        :rtype: :class:`pandas.DataFrame`
+        """
+        post = self.unpack()
+        post.columns = pandas.MultiIndex.from_product(((self.name,), 
+            [str(x) for x in range(len(post.columns))]), names=('Indexer', 'Parts'))
+        return post
+
+    def value_counts(self):
+        """
+        Count the pitches in each column of the :meth:`to_frame` output 
+        without building it, by binning the codes of :attr:`pitches`.
+
+        :returns: One :class:`Series` of counts per column, like the 
+            result of :meth:`pandas.Series.value_counts`.
+        :rtype: dict of :class:`pandas.Series`
+        """
+        _, cols, widths = self._columns()
+        n_cats = len(self.pitches.categories)
+        counts = numpy.bincount(cols * n_cats + self.pitches.codes, 
+            minlength=widths.sum() * n_cats).reshape(widths.sum(), n_cats)
+        post = {}
+        for col, row in enumerate(counts):
+            found = numpy.nonzero(row)[0]
+            post[(self.name, str(col))] = pandas.Series(row[found], 
+                index=self.pitches.categories[found]).sort_values(ascending=False)
+        return post
+
+
 def unpack_chords(df):
     """
     The c in nrc in methods like _get_m21_nrc_objs() stands for chord. 
@@ -132,12 +324,41 @@ def unpack_chords(df):
     parts that didn't have chords in them get concatenated with the 
     parts that did, resulting in potentially more columns in the final 
     dataframe then there are parts in the score.
+
+    Chord-free parts are unwrapped in place. Only the events of the 
+    parts with chords are flattened into a :class:`RaggedMultiStop` and 
+    unpacked, and every part is put into a single array spanning the 
+    union of the parts' indices, so no intermediate DataFrames need to 
+    be joined.
     """
-    post = pandas.concat([pandas.DataFrame(df.iloc[:,x].dropna().tolist(),
-                                           index=df.iloc[:,x].dropna().index)
-                          for x in range(len(df.columns))], axis=1)
-    return post.fillna(float('nan')) 
-    # without this fillna call, some na values are None's.
+    values = df.values
+    found = pandas.notnull(values)
+    rows = found.any(axis=1)
+    index = df.index[rows]
+    blocks = []
+    labels = []
+    for col in range(values.shape[1]):
+        events = values[rows, col]
+        here = found[rows, col]
+        if not here.any():
+            continue
+        if all(len(x) == 1 for x in events[here]):
+            block = numpy.empty((len(index), 1), dtype=object)
+            block.fill(float('nan'))
+            block[here, 0] = [x[0] for x in events[here]]
+            labels.append(0)
+        else:
+            chords = RaggedMultiStop.from_events(df.iloc[:, [col]]).unpack()
+            block = numpy.empty((len(index), len(chords.columns)), dtype=object)
+            block.fill(float('nan'))
+            block[index.get_indexer(chords.index)] = chords.values
+            labels.extend(chords.columns)
+        blocks.append(block)
+    post = numpy.hstack(blocks) if blocks else numpy.empty((len(index), 0), dtype=object)
+    post = pandas.DataFrame(post, index=index, columns=labels)
+    if not post.index.is_monotonic_increasing:
+        post = post.sort_index()
+    return post
 
 
 class NoteRestIndexer(indexer.Indexer):
@@ -241,9 +462,20 @@ class MultiStopIndexer(indexer.Indexer):
             # If parts have no note, rest, or chord events in them
             result = self._score.copy()
         else: # This is the normal case
-            temp = self._score.applymap(self._indexer_func) 
-            # Do indexing.
-            result = unpack_chords(temp) 
+            result = unpack_chords(self._score.applymap(self._indexer_func)) 
             # Unpack chords into individual pitches.
         return self.make_return([str(x) 
             for x in range(len(result.columns))], result)
+
+    def run_ragged(self):
+        """
+        Make a new index of the note and rest names in the piece like 
+        :meth:`run` does, but keep the chords together in a 
+        :class:`RaggedMultiStop` instead of unpacking them into columns.
+
+        :returns: The pitch names of every event in every part.
+        
+        :rtype: :class:`RaggedMultiStop`
+        
+        """
+        return RaggedMultiStop.from_events(self._score.applymap(self._indexer_func))
@@ -34,12 +34,159 @@ themselves.
 
 """
 
+import fractions
+from functools import reduce
 import six
 import pandas
 import numpy
 from vis.analyzers import indexer
 from multi_key_dict import multi_key_dict as mkd
 
+
+# The largest denominator an offset is assumed to have when it is turned back into a fraction.
+_MAX_DENOMINATOR = 1000
+
+# Beyond this many ticks per quarter note, the offsets are measured in thousandths of one instead.
+_MAX_TICKS = 2 ** 20
+
+
+def _common_denominator(values, ticks=1, limit=None):
+    """
+    Used internally by :func:`_ticks_per_quarter` to find the least common multiple of ``ticks``
+    and the denominators of ``values`` as fractions, or ``None`` if it's more than ``limit``.
+    """
+    # only the fractional part of a value has a denominator
+    for each in numpy.unique(numpy.mod(values, 1.0)):
+        denominator = fractions.Fraction(float(each)).limit_denominator(_MAX_DENOMINATOR).denominator
+        ticks = ticks * denominator // fractions.gcd(ticks, denominator)
+        if limit is not None and ticks > limit:
+            return None
+    return ticks
+
+
+def _ticks_per_quarter(offsets, quarter_lengths):
+    """
+    Used internally by :meth:`FilterByOffsetIndexer.run` to find how many "ticks" to divide a
+    quarter note into so that every offset and every one of the ``quarter_lengths`` is a whole
+    number of ticks. This is the least common multiple of their denominators as fractions, so
+    triplets and other tuplets are counted exactly rather than rounded to thousandths. If that's
+    more than :const:`_MAX_TICKS`, the offsets are rounded to thousandths of the ticks that the
+    ``quarter_lengths`` alone need.
+    """
+    ticks = _common_denominator(quarter_lengths)
+    with_offsets = _common_denominator(offsets, ticks, _MAX_TICKS)
+    if with_offsets is None:
+        return 1000 * ticks
+    return with_offsets
+
+
+def _align(ticks, grid, method):
+    """
+    Used internally by :meth:`FilterByOffsetIndexer.run` to find, for every tick in ``grid``, the
+    position in the sorted ``ticks`` of the event that ``method`` puts there, or ``-1`` when there
+    is none. Returns ``None`` for a ``method`` that has to be left to :meth:`pandas.Series.reindex`.
+    """
+    if method in ('ffill', 'pad'):
+        return numpy.searchsorted(ticks, grid, side='right') - 1
+    elif method in ('bfill', 'backfill'):
+        positions = numpy.searchsorted(ticks, grid, side='left')
+        positions[positions >= len(ticks)] = -1
+        return positions
+    elif method is None:
+        positions = numpy.searchsorted(ticks, grid, side='left')
+        found = numpy.minimum(positions, len(ticks) - 1)
+        positions[ticks[found] != grid] = -1
+        return positions
+    return None
+
+
+def _lend_backwards(durations, lenders):
+    """
+    Used internally by :meth:`FilterByOffsetIndexer._dynamic_run` to add the duration of every
+    event in ``lenders`` to the nearest earlier event in its column that is not in ``lenders``.
+    Each event in a run of lenders keeps the sum of the durations from there to the end of the
+    run, as it did when the durations were handed back one event at a time. Both arguments are
+    2-D arrays, and ``durations`` is changed in place.
+    """
+    for col in range(durations.shape[1]):
+        rows = numpy.flatnonzero(~numpy.isnan(durations[:, col]))
+        if len(rows) == 0:
+            continue
+        values = durations[rows, col]
+        lending = lenders[rows, col]
+        # the events lent to each event are in its group
+        group = numpy.cumsum(~lending)
+        lent = numpy.where(lending, values, 0.0)
+        total = numpy.bincount(group, weights=lent, minlength=group[-1] + 1)
+        before = numpy.cumsum(lent) - lent
+        at_head = numpy.zeros(len(total))
+        at_head[group[~lending]] = before[~lending]
+        durations[rows, col] = numpy.where(lending, total[group] - before + at_head[group],
+                                           values + total[group])
+
+
+def _borrow_forwards(durations, notes, borrowers):
+    """
+    Used internally by :meth:`FilterByOffsetIndexer._dynamic_run` to merge every event in
+    ``borrowers`` with the events after it in its column, up to and including the next event that
+    is not in ``borrowers``. The first event of each run gets the sum of the durations and the
+    note of the event that ends the run, and the other events of the run are removed from both.
+    Runs at the end of a column are left alone. The arguments are 2-D arrays and are changed in
+    place.
+    """
+    for col in range(durations.shape[1]):
+        rows = numpy.flatnonzero(~numpy.isnan(durations[:, col]))
+        if len(rows) == 0:
+            continue
+        borrowing = borrowers[rows, col]
+        after = numpy.concatenate(([False], borrowing[:-1]))
+        # a run and the event that ends it share a group, counted from the end of the column
+        group = numpy.cumsum((~borrowing)[::-1])[::-1]
+        heads = borrowing & ~after & (group > 0)
+        merged = after & (group > 0)
+        if not heads.any():
+            continue
+        total = numpy.bincount(group, weights=durations[rows, col])
+        ends = numpy.zeros(len(total), dtype=numpy.int64)
+        ends[group[~borrowing]] = rows[~borrowing]
+        durations[rows[heads], col] = total[group[heads]]
+        notes[rows[heads], col] = notes[ends[group[heads]], col]
+        durations[rows[merged], col] = float('nan')
+        notes[rows[merged], col] = float('nan')
+
+
+def _confirmed(levels, readings, window):
+    """
+    Used internally by :meth:`FilterByOffsetIndexer._dynamic_run` to find which of the attack-
+    density ``readings`` are confirmed. A reading is confirmed when it is the most common of the
+    dissonance ``levels`` (a 2-D array) in the ``window`` rows that start at the same position, or
+    when it is the same as the last confirmed reading before it.
+    """
+    found = ~numpy.isnan(levels)
+    kinds = numpy.unique(levels[found])
+    if len(kinds) == 0:
+        return numpy.zeros(len(readings), dtype=bool)
+    # how many of each level there are in each row, then in each window
+    codes = numpy.searchsorted(kinds, numpy.where(found, levels, kinds[0]))
+    per_row = numpy.zeros((len(levels), len(kinds)))
+    numpy.add.at(per_row, (numpy.nonzero(found)[0], codes[found]), 1)
+    running = numpy.vstack((numpy.zeros((1, len(kinds))), numpy.cumsum(per_row, axis=0)))
+    starts = numpy.minimum(numpy.arange(len(readings)), len(levels))
+    in_window = running[numpy.minimum(starts + window, len(levels))] - running[starts]
+    code = numpy.minimum(numpy.searchsorted(kinds, readings), len(kinds) - 1)
+    mine = in_window[numpy.arange(len(readings)), code]
+    most = in_window.max(axis=1)
+    agrees = (kinds[code] == readings) & (mine > 0) & (mine == most)
+    # when the reading ties with another level, the first of them in value_counts() wins
+    for i in numpy.flatnonzero(agrees & ((in_window == most[:, numpy.newaxis]).sum(axis=1) > 1)):
+        tied = levels[i:i + window].ravel()
+        counts = pandas.Series(tied[~numpy.isnan(tied)]).value_counts()
+        agrees[i] = counts.index[0] == readings[i]
+    # the last reading confirmed by the dissonances is the last one confirmed at all
+    last = pandas.Series(numpy.where(agrees, readings, numpy.nan)).ffill().shift(1).values
+    return agrees | (last == readings)
+
+
 class FilterByOffsetIndexer(indexer.Indexer):
     """
     Indexer that regularizes the "offset" values of observations from 
@@ -209,12 +356,15 @@ class FilterByOffsetIndexer(indexer.Indexer):
     :class:`FilterByOffsetIndexer`.
 
     :keyword 'quarterLength': The quarterLength duration between 
-        observations desired in the output. This value must not have 
-        more than three digits to the right of the decimal (i.e. 0.001 
-        is the smallest possible value). For dynamic (i.e. variable)
+        observations desired in the output. This value must be at 
+        least 0.001, and may be a tuplet value like ``1/3.0``, which is 
+        observed exactly rather than rounded. To sample the same 
+        parts at several rhythmic levels in one pass, pass a list of 
+        them, and :meth:`run` returns a ``dict`` of the results for 
+        each. For dynamic (i.e. variable)
         and context-dependent value, pass the string 'dynamic'.
     
-    :type 'quarterLength': float or string
+    :type 'quarterLength': float or list of float or string
 
     :keyword 'dom_data': A list of DataFrames and one integer is 
         required here if the 'quarterLength' setting is set to 
@@ -297,7 +447,7 @@ the following time signatures when the "quarterLength" setting is set to \
             present in ``settings``.
         
         :raises: :exc:`RuntimeError` if the ``'quarterLength'`` setting 
-            has a value less than ``0.001``.
+            has a value less than ``0.001``, or is an empty list.
 
         """
         super(FilterByOffsetIndexer, self).__init__(score, None)
@@ -305,7 +455,10 @@ the following time signatures when the "quarterLength" setting is set to \
         # check the settings instance has a u'quarterLength' property.
         if settings is None or u'quarterLength' not in settings:
             raise RuntimeError(FilterByOffsetIndexer._NO_QLENGTH_ERROR)
-        elif (type(settings['quarterLength']) != str and
+        elif (isinstance(settings[u'quarterLength'], (list, tuple)) and
+              (len(settings[u'quarterLength']) == 0 or min(settings[u'quarterLength']) < 0.001)):
+            raise RuntimeError(FilterByOffsetIndexer._QLENGTH_TOO_SMALL_ERROR)
+        elif (not isinstance(settings[u'quarterLength'], (six.string_types, list, tuple)) and
               settings[u'quarterLength'] < 0.001):
             raise RuntimeError(FilterByOffsetIndexer._QLENGTH_TOO_SMALL_ERROR)
         
@@ -355,73 +508,51 @@ the following time signatures when the "quarterLength" setting is set to \
 
         """
         dom_data = self._settings['dom_data']
-        #Remove the upper level of the columnar multi-index.
-        dds = dom_data[0].copy()
-        dds.columns = range(len(dds.columns))
-        ddr = dom_data[1].copy()
-        ddr.columns = dds.columns
-        bbs = dom_data[2].copy()
-        bbs.columns = dds.columns
-        nnr = dom_data[3].copy()
-        nnr.columns = dds.columns
-        ts = dom_data[4]
-
-        w = 6
-
-        # Remove weak dissonances
         weaks = ('R', 'D', 'L', 'U', 'E', 'C', 'A')
-        indx, cols = numpy.where(dom_data[0].isin(weaks))
-        for x in reversed(range(len(indx))):
-            spot = ddr.iloc[:indx[x], cols[x]].last_valid_index()
-            # Add the weak dissonance duration to the note that immediately precedes it.
-            ddr.at[spot, cols[x]] += ddr.iat[indx[x], cols[x]]
-            
-        # Remove strong dissonances other than suspensions
         strongs = ('Q', 'H')
-        indx, cols = numpy.where(dom_data[0].isin(strongs))
-        for x in reversed(range(len(indx))):
-            spot = ddr.iloc[indx[x]+1:, cols[x]].first_valid_index()
-            # Add the strong dissonance duration to the note that immediately follows it.
-            ddr.iat[indx[x], cols[x]] += ddr.at[spot, cols[x]]
-            ddr.at[spot, cols[x]] = float('nan')
-            nnr.iat[indx[x], cols[x]] = nnr.at[spot, cols[x]]
-            nnr.at[spot, cols[x]] = float('nan')
-
-        # Delete the duration entries of weak dissonances 
-        ddr[dds.isin(weaks)] = float('nan')
-        nnr[dds.isin(weaks)] = float('nan')
-
-        # Delete the duration entries of strong dissonances other than suspensions
-        ddr[dds.isin(strongs)] = float('nan')
-
-        # Delete duration entries for rests
-        ddr = ddr[nnr != 'Rest']
+        is_weak = dom_data[0].isin(weaks).values
+        is_strong = dom_data[0].isin(strongs).values
+        w = 6
+
+        # Work on plain arrays, without the columnar multi-index.
+        durations = dom_data[1].values.astype(numpy.float64)
+        notes = dom_data[3].values.astype(object)
+        # Add the weak dissonance durations to the notes that immediately precede them.
+        _lend_backwards(durations, is_weak)
+        # Add the durations of the notes that immediately follow strong dissonances other than
+        # suspensions to those dissonances.
+        _borrow_forwards(durations, notes, is_strong)
+
+        # Delete the duration entries of weak dissonances and of strong dissonances other than
+        # suspensions, and of rests
+        durations[is_weak | is_strong] = float('nan')
+        notes[is_weak] = float('nan')
+        durations[notes == 'Rest'] = float('nan')
+        ddr = pandas.DataFrame(durations, index=dom_data[1].index)
         ddr.dropna(how='all', inplace=True)
 
         # Attack-density analysis without most dissonances for the whole piece.
         combined = pandas.Series(ddr.index[1:] - ddr.index[:-1], index=ddr.index[:-1])
         comb_roll = combined.rolling(w).mean()
 
-        # Broadcast any bs value to all columns of a df.
-        cbs = pandas.concat([dom_data[2].T.bfill().iloc[0]]*len(bbs.columns), axis=1, ignore_index=True)
-
         diss_levs = mkd({('2/1w', '4/2w'): {.0625: 1, .125: 2, .25: 4, .5: 8, 1: 8}, #NB: things that happen on beats 1 and 3 are treated the same way.
                          ('2/1s', '4/2s'): {.0625: .25, .125: .5, .25: 1, .5: 2, 1: 2},
                          ('2/2w', '4/4w'): {.0625: .5, .125: 1, .25: 2, .5: 4, 1: 4}, #NB: things that happen on beats 1 and 3 are treated the same way.
                          ('2/2s', '4/4s'): {.0625: .125, .125: .25, .25: .5, .5: 1, 1: 1},
                          })
 
-        # Get the beatstrength of the dissonances
-        diss_cr = bbs[dds.isin(weaks)]
-        time_sig = ts.iloc[0, 0]
-        diss_cr.replace(diss_levs[time_sig + 'w'], inplace=True)
-        
-        swsus = ('S', 'Q', 'H')
-        sbs = cbs[dds.isin(swsus)]
-        sbs.replace(diss_levs[time_sig + 's'], inplace=True)
+        # Get the beatstrength of the dissonances, and broadcast the beatstrength of each offset
+        # to all the suspensions and strong dissonances at it.
+        time_sig = dom_data[4].iloc[0, 0]
+        bbs = dom_data[2].values
+        bs = dom_data[2].T.bfill().iloc[0].values
+        diss_cr = pandas.DataFrame(numpy.where(is_weak, bbs, numpy.nan)).replace(diss_levs[time_sig + 'w'])
+        sbs = pandas.DataFrame(numpy.where(dom_data[0].isin(('S',) + strongs).values,
+                                           bs[:, numpy.newaxis], numpy.nan))
+        sbs = sbs.replace(diss_levs[time_sig + 's'])
 
         # CR analysis based on dissonance types alone.
-        diss_cr.update(sbs)
+        diss_cr = diss_cr.where(sbs.isnull(), sbs).values.astype(numpy.float64)
 
         cr = comb_roll.copy()
         ccr = cr.copy()
@@ -433,16 +564,9 @@ the following time signatures when the "quarterLength" setting is set to \
         ccr[cr > 1*mlt] = 2
         ccr[cr > 2*mlt] = 4
 
-        for i, val in enumerate(ccr):
-            counts = diss_cr.iloc[i:i+w].stack().value_counts()
-            lvi = ccr.iloc[:i].last_valid_index()
-            if len(counts) > 0 and counts.index[0] == val: # If the most common diss in the window corresponds to the attack-density reading, leave the current val
-                continue
-
-            elif lvi is not None and ccr.at[lvi] == val: # There is no dissonance in this window, but the IR analysis has not changed, so the reading is valid
-                continue
-            else: # The new level has not been confirmed by a corresponding dissonance
-                ccr.iat[i] = float('nan')
+        # Keep the readings confirmed by the most common dissonance in their window, or by the
+        # attack-density reading not having changed since the last confirmed one.
+        ccr[~_confirmed(diss_cr, ccr.values, w)] = float('nan')
 
         ccr.ffill(inplace=True)
         ccr.bfill(inplace=True)
@@ -465,6 +589,58 @@ the following time signatures when the "quarterLength" setting is set to \
             self._score = pandas.concat(self._score, axis=1)
         return self._score.reindex(index=pandas.Index(new_index)).ffill()
 
+    def _regularize(self, quarter_lengths):
+        """
+        Used internally by :meth:`run` to regularize the parts for every one of the
+        ``quarter_lengths`` in one pass. The offsets of each part are converted to ticks and
+        aligned with the finest grid that all the others are part of only once, and the grid for
+        each ``quarterLength`` is taken from that.
+
+        :returns: For each of the ``quarter_lengths``, the regularized parts.
+        :rtype: ``list`` of ``list`` of :class:`pandas.Series`
+        """
+        # NB: the offsets are counted in whole "ticks" of a quarter note, so the grid of observed
+        #     offsets can be made and compared with the events exactly.
+        post = [[] for _ in quarter_lengths]
+        parts = [part for part in self._score if len(part.index) > 0]
+        if 0 == len(parts):
+            # all the parts have no length, so we need as many empty parts
+            return [[pandas.Series() for _ in range(len(self._score))] for _ in quarter_lengths]
+        ticks = _ticks_per_quarter(numpy.concatenate([part.index.values for part in parts]),
+                                   quarter_lengths)
+        steps = [int(round(q_length * ticks)) for q_length in quarter_lengths]
+        finest = reduce(fractions.gcd, steps)
+        if max(steps) // finest > sum(max(steps) // step for step in steps):
+            # the grids have so little in common that the finest one is bigger than all of them
+            return [self._regularize([q_length])[0] for q_length in quarter_lengths]
+        # the first offset in the piece
+        start_tick = int(round(min([part.index[0] for part in parts]) * ticks))
+        method = self._settings['method']
+        for part in self._score:
+            if len(part.index) < 1:
+                for each in post:
+                    each.append(part)
+                continue
+            part_ticks = numpy.rint(part.index.values * ticks).astype(numpy.int64)
+            grid = numpy.arange(start_tick, part_ticks[-1] + max(steps), finest, dtype=numpy.int64)
+            positions = _align(part_ticks, grid, method)
+            for each, step in zip(post, steps):
+                # every grid starts at the same offset and ends at or after the part's last event
+                size = (part_ticks[-1] - start_tick) // step + 1
+                if (part_ticks[-1] - start_tick) % step:
+                    size += 1
+                offsets = grid[::step // finest][:size] / float(ticks)
+                if positions is None:
+                    each.append(part.reindex(index=offsets, method=method))
+                    continue
+                these = positions[::step // finest][:size]
+                aligned = pandas.Series(part.values[numpy.maximum(these, 0)], index=offsets,
+                                        name=part.name)
+                if (these < 0).any():
+                    aligned[these < 0] = float('nan')
+                each.append(aligned)
+        return post
+
     def run(self):
         """
         Regularize the observed offsets for the Series input.
@@ -476,41 +652,19 @@ the following time signatures when the "quarterLength" setting is set to \
             ``quarterLength`` until the final offset, which is either 
             the last observation in the piece (if it is divisible by
             the ``quarterLength``) or the next-highest value that is 
-            divisible by ``quarterLength``.
+            divisible by ``quarterLength``. If the ``quarterLength`` 
+            setting is a list, a ``dict`` with one such 
+            :class:`DataFrame` for each ``quarterLength``, all found in 
+            one pass.
         
-        :rtype: :class:`pandas.DataFrame`
+        :rtype: :class:`pandas.DataFrame` or ``dict``
         
         """
         if self._settings['quarterLength'] == 'dynamic':
             return self._dynamic_run()
-        # NB: we have to convert all the "offset" values to integers so 
-        #     we can use the range() function to iterate through 
-        #     offsets.
-        post = []
-        start_offset = None
-        try:
-            # usually this finds the first offset in the piece
-            start_offset = int(min([part.index[0] for part in self._score]) * 1000)
-        except (ValueError, IndexError):
-            # if one of the parts has 0 length
-            start_offset = []
-            for part in self._score:
-                if 0 < len(part.index):
-                    start_offset.append(part.index[0])
-            if 0 == len(start_offset):
-                # all the parts have no length, so we need as many empty parts
-                post = [pandas.Series() for _ in range(len(self._score))]
-            else:
-                start_offset = int(min(start_offset))
-        if 0 == len(post):
-            for part in self._score:
-                if len(part.index) < 1:
-                    post.append(part)
-                else:
-                    end_offset = int(part.index[-1] * 1000)
-                    step = int(self._settings[u'quarterLength'] * 1000)
-                    off_list = list(pandas.Series(range(start_offset, end_offset + step, step)).div(1000.0))  
-                    # pylint: disable=C0301
-                    post.append(part.reindex(index=off_list, method=self._settings['method']))
-        post = self.make_return([ser.name[1] for ser in self._score], post)
-        return post
+        labels = [ser.name[1] for ser in self._score]
+        q_lengths = self._settings[u'quarterLength']
+        if isinstance(q_lengths, (list, tuple)):
+            grids = self._regularize(q_lengths)
+            return {q_length: self.make_return(labels, each) for q_length, each in zip(q_lengths, grids)}
+        return self.make_return(labels, self._regularize([q_lengths])[0])
@@ -29,6 +29,8 @@
 """
 
 from vis.analyzers import indexer
+import numpy
+from numpy.lib.stride_tricks import as_strided
 import pandas
 
 class Windexer(indexer.Indexer):
@@ -54,6 +56,18 @@ class Windexer(indexer.Indexer):
     >>> notes = ip.get_data('noterest')
     >>> setts = {'window_size': 4}
     >>> ip.get_data('windexer', data=notes, settings=setts)
+
+    Each window is a run of ``window_size`` consecutive rows. To look 
+    at the windows without copying the rows into every window they are 
+    in, use :meth:`windows` or :meth:`view` instead of :meth:`run`:
+
+    >>> windexer = Windexer(notes, setts)
+    >>> for window in windexer.windows():
+    ...     pass
+    >>> view = windexer.view()
+
+    With these settings, ``view.shape`` is 
+    ``(len(notes) - 3, 4, len(notes.columns))``.
     
     """
 
@@ -92,30 +106,60 @@ class Windexer(indexer.Indexer):
 
         super(Windexer, self).__init__(score, None)
 
+    def _count(self):
+        """
+        Used internally to find how many windows there are.
+        """
+        return max(len(self._score) - self._settings['window_size'] + 1, 0)
+
+    def windows(self):
+        """
+        Iterate through the windows of the indexer results, one at a 
+        time, without making them all at once.
+
+        :returns: Each window, a slice of the indexer results.
+
+        :rtype: generator of :class:`pandas.DataFrame`
+
+        """
+        size = self._settings['window_size']
+        for x in range(self._count()):
+            yield self._score.iloc[x:x + size]
+
+    def view(self):
+        """
+        Look at the windows of the indexer results as a strided view of 
+        their values, so no row is copied into every window it is in. 
+        The view is read-only, since each value is in many windows. It 
+        is over the indexer results themselves only if all their columns 
+        have the same dtype, like the note names of the 
+        :class:`~vis.analyzers.indexers.noterest.NoteRestIndexer`. 
+        Otherwise pandas first copies the columns into one new array of 
+        a common dtype, once for the whole view.
+
+        :returns: The values of every window, with the windows in the 
+            first dimension and the rows of each in the second.
+
+        :rtype: :class:`numpy.ndarray` of shape 
+            ``(windows, window_size, columns)``
+
+        """
+        values = self._score.values
+        post = as_strided(values, shape=(self._count(), self._settings['window_size'], values.shape[1]),
+                          strides=(values.strides[0],) + values.strides)
+        post.flags.writeable = False
+        return post
+
     def run(self):
         """
-        Make a new windowed index of the indexer results.
+        Make a new windowed index of the indexer results. All the 
+        windows are taken from the indexer results at once.
         
         :returns: The new windowed DataFrame.
         
         :rtype: :class:`pandas.DataFrame`
         
         """
-
-        x = 0
-        l = self._settings['window_size'] - 1
-
-        indices = self._score.index.tolist()
-        windowed = pandas.DataFrame(self._score[indices[x]:indices[l]])
-
-        x += 1
-        l += 1
-        
-        while l < len(indices):
-
-            temp = pandas.DataFrame(self._score[indices[x]:indices[l]])
-            windowed = pandas.concat([windowed, temp])
-            x += 1
-            l += 1
-
-        return windowed
+        size = self._settings['window_size']
+        rows = (numpy.arange(self._count())[:, numpy.newaxis] + numpy.arange(size)).ravel()
+        return self._score.iloc[rows]
@@ -31,9 +31,14 @@ The model representing data from multiple :class:`~vis.models.indexed_piece.Inde
 import sys
 import six
 import os
+import itertools
+import math
+import multiprocessing as mp
 import pandas
 from vis.analyzers import experimenter
+from vis.analyzers.indexers import ngram
 from vis.analyzers.experimenters import aggregator, barchart, frequency
+from vis.models import patterns as patterns_module
 # Only import dendrogram experiment if scipy and matplotlib have been installed.
 try:
     from vis.analyzers.experimenters import dendrogram
@@ -42,6 +47,18 @@ except ImportError:
 from multi_key_dict import multi_key_dict as mkd
 
 
+def _piece_ngram_codes(job):
+    """
+    Used by :meth:`AggregatedPieces.count_ngrams` to find the n-grams of one piece in a worker
+    process. The piece is imported again from its pathname, since an :class:`IndexedPiece` can't
+    be sent to another process.
+    """
+    # indexed_piece imports this module, so it can only be imported once both are loaded
+    from vis.models.indexed_piece import _import_file
+    pathname, settings = job
+    return _import_file(pathname)[0]._get_ngram_codes(settings)
+
+
 class AggregatedPieces(object):
     """
     Hold data from multiple :class:`~vis.models.indexed_piece.IndexedPiece` instances.
@@ -69,6 +86,12 @@ received {}. Please choose from one of the following: {}.'
 
     _UNKNOWN_INPUT = "The input type is not one of the supported options"
 
+    # When find_patterns() gets a 'kind' it doesn't know
+    _UNKNOWN_KIND = "parameter 'kind' must be 'horizontal' or 'vertical', not {}"
+
+    # When count_ngrams() gets an 'error' that isn't a fraction
+    _BAD_ERROR_BOUND = "parameter 'error' must be greater than 0 and at most 1"
+
     class Metadata(object):
         """
         Used internally by :class:`AggregatedPieces` ... at least for now.
@@ -232,7 +255,182 @@ received {}. Please choose from one of the following: {}.'
 
         return dendrogram.HierarchicalClusterer(data, settings).run()
 
+    def _all_ngram_codes(self, settings, processes=None):
+        """
+        Used internally by :meth:`count_ngrams` and :meth:`index_ngrams` to find the n-grams of every
+        piece, one at a time, with the piece. The analyses cached on a piece while finding its
+        n-grams are dropped before they're given, so only one piece's worth is held at a time, and
+        the worker processes are stopped even if the caller gives up early.
+        """
+        in_process = self._pieces
+        elsewhere = []
+        pool = None
+        if processes is not None:
+            elsewhere = [p for p in self._pieces if p._pathname and p._opus_id is None]
+            in_process = [p for p in self._pieces if p not in elsewhere]
+            jobs = [(p._pathname, settings) for p in elsewhere]
+            pool = mp.Pool(processes)
+            results = pool.imap(_piece_ngram_codes, jobs)
+        else:
+            results = []
+        try:
+            for piece, codes in six.moves.zip(elsewhere, results):
+                yield piece, codes
+            for piece in in_process:
+                cached = set(piece._analyses)
+                codes = piece._get_ngram_codes(settings)
+                for key in set(piece._analyses) - cached:
+                    del piece._analyses[key]
+                yield piece, codes
+            if pool is not None:
+                pool.close()
+                pool.join()
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+    @staticmethod
+    def _count(counter, all_codes):
+        """
+        Used internally by :meth:`count_ngrams` to add every piece's n-grams to an
+        :class:`NGramCounter`.
+        """
+        for _, codes in all_codes:
+            if isinstance(codes, pandas.DataFrame):
+                counter.add_frame(codes)
+            else:
+                counter.add(codes)
+
+    def count_ngrams(self, settings, processes=None, top_x=None, error=None, verify=False):
+        """
+        Count the interval n-grams of all the pieces. This gives the same result as getting the
+        'ngram' results of every piece, counting them with the :class:`FrequencyExperimenter`,
+        and adding up the counts with the :class:`ColumnAggregator`, but the n-grams of only one
+        piece are held at a time and they're counted in one table of integer codes.
+
+        If only the most common n-grams are wanted, an ``error`` bound lets the counting use a
+        table of bounded size (see :class:`~vis.analyzers.indexers.ngram.NGramCounter`). The counts
+        may then be too high by up to ``error`` times the number of n-grams in all the pieces, as
+        shown in the ``'error'`` column, and rarer n-grams may be missing. With ``verify``, the
+        pieces are read a second time to find the exact counts of the n-grams that are returned.
+
+        **Example**
 
+        >>> settings = {'n': 3, 'vertical': 'all', 'horizontal': 'lowest', 'directed': True}
+        >>> agg_p.count_ngrams(settings)
+        >>> agg_p.count_ngrams(settings, top_x=100, error=0.001, verify=True)
+
+        :param dict settings: The ngram settings, as for the 'ngram' indexer when it makes interval
+            n-grams without a ``data`` argument.
+        :param processes: If given, the pieces are imported and their n-grams found in this many
+            worker processes. Pieces without a pathname, and movements of an opus, are always done
+            in this process.
+        :type processes: int or ``None``
+        :param top_x: If given, only this many of the most common n-grams are returned, from most
+            to least common.
+        :type top_x: int or ``None``
+        :param error: If given, the largest error allowed in the counts, as a fraction of the number
+            of n-grams counted.
+        :type error: float or ``None``
+        :param bool verify: Whether to count the returned n-grams again exactly, when an ``error``
+            bound was given.
+        :returns: The number of times each n-gram happened in all the pieces.
+        :rtype: :class:`pandas.DataFrame`
+        :raises: :exc:`RuntimeWarning` if there are no pieces.
+        :raises: :exc:`RuntimeWarning` if ``error`` isn't between 0 and 1.
+        """
+        if not self._pieces:
+            raise RuntimeWarning(AggregatedPieces._NO_PIECES)
+        if error is None:
+            counter = ngram.NGramCounter()
+        elif 0 < error <= 1:
+            counter = ngram.NGramCounter(max(int(math.ceil(1.0 / error)), top_x or 0))
+        else:
+            raise RuntimeWarning(AggregatedPieces._BAD_ERROR_BOUND)
+        AggregatedPieces._count(counter, self._all_ngram_codes(settings, processes))
+        if error is not None and verify:
+            counter = counter.shortlist(top_x)
+            AggregatedPieces._count(counter, self._all_ngram_codes(settings, processes))
+        return counter.counts(top_x)
+
+    def index_ngrams(self, settings, processes=None, index=None):
+        """
+        Make an inverted index of the interval n-grams of all the pieces, to find where n-grams
+        happen and which n-grams several pieces share. See
+        :class:`~vis.analyzers.indexers.ngram.NGramIndex`. The pieces are called by their pathnames,
+        with the number of the movement for the movements of an opus.
+
+        :param dict settings: The ngram settings, as for :meth:`count_ngrams`.
+        :param processes: If given, the pieces are imported and their n-grams found in this many
+            worker processes, as for :meth:`count_ngrams`.
+        :type processes: int or ``None``
+        :param index: An index to add the pieces to, such as one loaded from disk. By default a
+            new index is made.
+        :type index: :class:`~vis.analyzers.indexers.ngram.NGramIndex`
+        :returns: The index.
+        :rtype: :class:`~vis.analyzers.indexers.ngram.NGramIndex`
+        :raises: :exc:`RuntimeWarning` if there are no pieces.
+        """
+        if not self._pieces:
+            raise RuntimeWarning(AggregatedPieces._NO_PIECES)
+        index = ngram.NGramIndex() if index is None else index
+        for piece, codes in self._all_ngram_codes(settings, processes):
+            name = piece.metadata('pathname')
+            if piece._opus_id is not None:
+                name = '{} ({})'.format(name, piece._opus_id)
+            if isinstance(codes, pandas.DataFrame):
+                index.add_frame(name, codes)
+            else:
+                index.add(name, codes)
+        return index
+
+    def find_patterns(self, patterns, transformations=None, kind='horizontal', settings=None):
+        """
+        Find where many interval patterns, and if asked their transformations, happen in all the
+        pieces. All the patterns are found in one pass over each voice's melodic intervals or each
+        voice pair's vertical intervals, with a :class:`~vis.models.patterns.PatternSet`, which
+        describes the patterns, wildcards, and transformations.
+
+        **Example**
+
+        >>> agg_p.find_patterns(['[2] [-3] [4] [-2]', '[2] [2] * [-2]'],
+                                transformations=['inversion', 'retrograde'],
+                                settings={'quality': False, 'simple or compound': 'simple'})
+
+        :param patterns: The patterns to find.
+        :type patterns: list of str or of list of str
+        :param transformations: The transformations of the patterns to find as well.
+        :type transformations: list of str
+        :param str kind: Either ``'horizontal'`` to search the melodic intervals of each voice, or
+            ``'vertical'`` to search the vertical intervals of each voice pair.
+        :param dict settings: The interval settings, as for the 'horizontal_interval' or
+            'vertical_interval' indexer.
+        :returns: A row for every match, with the ``'piece'`` (its pathname), the ``'voices'``,
+            the ``'offset'`` of its first interval and the ``'end'`` offset of its last one, the
+            ``'pattern'``, and the transformation (``'variant'``).
+        :rtype: :class:`pandas.DataFrame`
+        :raises: :exc:`RuntimeWarning` if there are no pieces.
+        :raises: :exc:`RuntimeWarning` if ``kind`` is neither 'horizontal' nor 'vertical'.
+        """
+        if not self._pieces:
+            raise RuntimeWarning(AggregatedPieces._NO_PIECES)
+        if kind not in ('horizontal', 'vertical'):
+            raise RuntimeWarning(AggregatedPieces._UNKNOWN_KIND.format(kind))
+        pattern_set = patterns_module.PatternSet(patterns, transformations, kind == 'horizontal')
+        post = []
+        for piece in self._pieces:
+            intervals = piece.get_data(kind + '_interval', settings=settings)
+            for label in intervals.columns:
+                stream = intervals[label].dropna()
+                offsets = stream.index
+                for first, last, number in pattern_set.search(stream.values):
+                    name, variant, _ = pattern_set.variants[number]
+                    post.append((piece.metadata('pathname'), label[1], offsets[first], offsets[last],
+                                 name, variant))
+        # several permutations of a pattern with wildcards may match in the same place
+        post = pandas.DataFrame(post, columns=['piece', 'voices', 'offset', 'end', 'pattern',
+                                               'variant'])
+        return post.drop_duplicates().reset_index(drop=True)
 
     def get_data(self, ind_analyzer=None, combined_experimenter=None, settings=None, data=None):
         """
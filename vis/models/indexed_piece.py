@@ -241,17 +241,17 @@ def _combine_voices(ser, part):
     # only the rest will be lost even after calling _reinsert_rests().
     return res.apply(_reinsert_rests)
 
-def _attach_before(df):
-    """Used internally by _get_horizontal_interval() to change the index values of the cached 
-    results of the interval.HorizontalIntervalIndexer so that they start on 0.0 instead of whatever 
-    value they start on. This shift makes the index values correspond to the first of two notes in 
-    a horizontal interval in any given voice rather than that of the second."""
-    re_indexed = []
-    for x in range(len(df.columns)):
-        ser = df.iloc[:, x].dropna()
-        ser.index = numpy.insert(ser.index, 0, 0.0)[:-1]
-        re_indexed.append(ser)
-    return pandas.concat(re_indexed, axis=1)
+def _interval_analysis_number(settings):
+    """Used internally by _get_vertical_interval() and _get_horizontal_interval() to find which of 
+    the interval.analysis_types the user asked for. Without settings this is the compound, 
+    directed, diatonic with quality analysis. Otherwise the settings are filled in with the defaults 
+    of the interval.HorizontalIntervalIndexer. The 'pairs' setting only chooses voice pairs, so it 
+    never changes the analysis: the same pair has the same intervals however it was asked for."""
+    if settings is None:
+        return interval.find_analysis_number(_default_interval_setts)
+    setts = interval.HorizontalIntervalIndexer.default_settings.copy()
+    setts.update((k, v) for k, v in six.iteritems(settings) if k != 'pairs')
+    return interval.find_analysis_number(setts)
 
 def _find_piece_range(the_score):
 
@@ -704,54 +704,64 @@ are not encoded in midi files so VIS currently cannot detect measures in midi fi
 
     def _get_vertical_interval(self, settings=None):
         """Used internally by get_data() to cache and retrieve results from the 
-        interval.IntervalIndexer. Since there are many possible settings for intervals, no matter 
-        what the user asks for intervals are calculated as compound, directed, and diatonic with 
-        quality. The results with these settings are stored and if the user asked for different 
-        settings, they are recalculated from these 'complete' cached results. This reindexing is 
-        done with the interval.IntervalReindexer."""
-        if 'vertical_interval' not in self._analyses:
-            self._analyses['vertical_interval'] = interval.IntervalIndexer(self._get_noterest(), settings=_default_interval_setts.copy()).run()
-        if settings is not None and not ('directed' in settings and settings['directed'] == True and
-                'quality' in settings and settings['quality'] in (True, 'diatonic with quality') and
-                'simple or compound' in settings and settings['simple or compound'] == 'compound'):
-            return interval.IntervalReindexer(self._analyses['vertical_interval'], settings).run()
-        return self._analyses['vertical_interval']
+        interval.IntervalIndexer. Since there are many possible settings for intervals, the 
+        intervals are calculated and cached once in the compact, numeric form of 
+        interval.IntervalCodes, from which the results for whatever settings the user asks for are 
+        made and cached in turn. With no settings, intervals are compound, directed, and diatonic 
+        with quality. If the settings include 'pairs', only those voice pairs are calculated. Each 
+        voice pair is only ever calculated once, and pairs that weren't cached yet are added to the 
+        cached results as they're requested."""
+        pairs = None if settings is None else settings.get('pairs')
+        notes = self._get_noterest()
+        every_pair = [label for _, label in interval.voice_pairs(notes.columns.get_level_values(1))]
+        wanted = [label for _, label in interval.voice_pairs(notes.columns.get_level_values(1), pairs)]
+        cached = self._analyses.get('vertical_interval')
+        missing = [label for label in wanted if cached is None or label not in cached.labels]
+        if missing:
+            new = interval.IntervalIndexer(notes, settings={'pairs': missing}).run_codes()
+            if cached is not None:
+                new = cached.join(new)
+                new = new.select([label for label in every_pair if label in new.labels])
+            cached = self._analyses['vertical_interval'] = new
+        post = cached.to_frame(_interval_analysis_number(settings))
+        if len(wanted) < len(cached.labels):
+            post = post.loc[:, [('interval.IntervalIndexer', label) for label in wanted]]
+        return post
 
     def _get_horizontal_interval(self, settings=None):
         """Used internally by get_data() to cache and retrieve results from the 
-        interval.IntervalIndexer. Since there are many possible settings for intervals, no matter 
-        what the user asks for intervals are calculated as compound, directed, and diatonic with 
-        quality. The results with these settings are stored and if the user asked for different 
-        settings, they are recalculated from these 'complete' cached results. This reindexing is 
-        done with the interval.IntervalReindexer. Those details are the same as for the 
-        _get_vertical_interval() method, but this method has an added check to see if the user asked 
-        for horiz_attach_before == False. In this case the index of each part's horizontal intervals 
-        is shifted forward one element and 0.0 is assigned as the first element."""
-        # No matter what settings the user specifies, calculate the intervals in the most complete way.
-        if 'horizontal_interval' not in self._analyses:
-            self._analyses['horizontal_interval'] = interval.HorizontalIntervalIndexer(self._get_noterest(), _default_interval_setts.copy()).run()
-        # If the user's settings were different, reindex the stored intervals.
-        if settings is not None and not ('directed' in settings and settings['directed'] == True and
-                'quality' in settings and settings['quality'] in (True, 'diatonic with quality') and
-                'simple or compound' in settings and settings['simple or compound'] == 'compound'):
-            post = interval.IntervalReindexer(self._analyses['horizontal_interval'], settings).run()
-            # Switch to 'attach before' if necessary.
-            if 'horiz_attach_before' in settings and settings['horiz_attach_before'] == True:
-                post = _attach_before(post)
-            return post
-        return self._analyses['horizontal_interval']
-
-    def _get_dissonance(self):
+        interval.HorizontalIntervalIndexer. The intervals are cached in the same way as for the 
+        _get_vertical_interval() method. If the user asked for horiz_attach_before == True, each 
+        interval is given the offset of its first note rather than its second; these results are 
+        cached separately."""
+        if settings is not None and settings.get('horiz_attach_before') == True:
+            key, setts = 'horizontal_interval_before', {'horiz_attach_before': True}
+        else:
+            key, setts = 'horizontal_interval', None
+        if key not in self._analyses:
+            self._analyses[key] = interval.HorizontalIntervalIndexer(self._get_noterest(), setts).run_codes()
+        return self._analyses[key].to_frame(_interval_analysis_number(settings))
+
+    def _get_dissonance(self, settings=None):
         """Used internally by get_data() to cache and retrieve results from the 
-        dissonance.DissonanceIndexer. This method automatically supplies the input dataframes from 
-        the indexed_piece that is the self argument. If you want to call this with indexer results 
-        other than those associated with self, you can call the indexer directly."""
-        if 'dissonance' not in self._analyses:
+        dissonance.DissonanceIndexer. This method automatically supplies the input dataframes and 
+        the time signatures from the indexed_piece that is the self argument. If you want to call 
+        this with indexer results other than those associated with self, you can call the indexer 
+        directly. The 'processes' setting only changes how the results are calculated, not what 
+        they are, so they are cached either way, but results for other time signatures are not."""
+        own_meters = settings is None or settings.get('time_signatures') is None
+        if 'dissonance' not in self._analyses or not own_meters:
             h_setts = {'quality': False, 'simple or compound': 'compound', 'horiz_attach_before': False}
             v_setts = setts = {'quality': True, 'simple or compound': 'simple', 'directed': True}
             in_dfs = [self._get_beat_strength(), self._get_duration(),
                       self._get_horizontal_interval(h_setts), self._get_vertical_interval(v_setts)]
-            self._analyses['dissonance'] = dissonance.DissonanceIndexer(in_dfs).run()
+            d_setts = {'time_signatures': self._get_time_signature()}
+            if settings is not None:
+                d_setts.update((k, v) for k, v in settings.items() if v is not None)
+            results = dissonance.DissonanceIndexer(in_dfs, d_setts).run()
+            if not own_meters:
+                return results
+            self._analyses['dissonance'] = results
         return self._analyses['dissonance']
 
     def _get_approach(self, data=[], settings=None):
@@ -780,12 +790,63 @@ are not encoded in midi files so VIS currently cannot detect measures in midi fi
             self._analyses['measure'] = meter.MeasureIndexer(self._get_m21_measure_objs()).run()
         return self._analyses['measure']
 
-    def _get_ngram(self, data, settings=None):
+    def _get_ngram(self, data=None, settings=None):
         """Convenience method for fethcing ngram indexer results. These results never get cached 
-        though, because there are too many unpredictable variables in ngram queries."""
+        though, because there are too many unpredictable variables in ngram queries. If no data is 
+        passed, the ngrams are made of this piece's vertical intervals (and horizontal intervals if 
+        there is a 'horizontal' setting) with the interval settings found in the ngram settings, and 
+        only the voice pairs named in the 'vertical' setting are calculated."""
+        if data is None:
+            if settings is None: # get_data() reports this as a problem with the arguments
+                raise TypeError(IndexedPiece._SUPERFLUOUS_OR_INSUFFICIENT_ARGUMENTS)
+            data = self._ngram_intervals(settings)
         return ngram.NGramIndexer(data, settings).run()
 
-    def _get_offset(self, data, settings=None):
+    def _ngram_intervals(self, settings):
+        """Used internally to get the vertical (and if needed horizontal) intervals that interval 
+        n-grams with these ngram settings are made of."""
+        int_setts = {k: v for k, v in six.iteritems(settings) if k in _default_interval_setts}
+        v_setts = int_setts.copy()
+        if settings.get('vertical', 'all') != 'all':
+            v_setts['pairs'] = [name for tup in settings['vertical'] for name in tup]
+        data = [self._get_vertical_interval(v_setts)]
+        if settings.get('horizontal'):
+            data.append(self._get_horizontal_interval(int_setts))
+        return data
+
+    def _get_ngram_codes(self, settings):
+        """Used by :meth:`AggregatedPieces.count_ngrams` to get this piece's interval n-grams as 
+        integer codes, without rendering them. If the n-grams can't be coded, the 
+        :class:`DataFrame` from :meth:`NGramIndexer.run` is returned instead."""
+        indexer = ngram.NGramIndexer(self._ngram_intervals(settings), settings)
+        try:
+            return indexer.run_codes()
+        except RuntimeError: # there are observations that aren't strings
+            return indexer.run()
+
+    def _get_offset(self, data=None, settings=None):
+        """Used internally by get_data() to run the offset.FilterByOffsetIndexer. Without ``data``,
+        the noterest results of this piece are regularized, and the results are cached for each
+        quarterLength and method, so asking for several quarterLengths at once, or again later,
+        only calculates the ones that weren't cached yet, in one pass. As with the indexer, a list
+        or tuple of quarterLengths gives a dict of DataFrames keyed by quarterLength, and a single
+        quarterLength gives its DataFrame. Each is a copy of the cached one."""
+        if data is None and settings is not None and settings.get('quarterLength') != 'dynamic':
+            setts = offset.FilterByOffsetIndexer.default_settings.copy()
+            setts.update(settings)
+            q_lengths = setts['quarterLength']
+            wanted = q_lengths if isinstance(q_lengths, (list, tuple)) else [q_lengths]
+            keys = dict((q_length, ('offset', float(q_length), setts['method'])) for q_length in wanted)
+            missing = [q_length for q_length in wanted if keys[q_length] not in self._analyses]
+            if missing or not wanted:
+                setts['quarterLength'] = missing
+                found = offset.FilterByOffsetIndexer(self._get_noterest(), setts).run()
+                self._analyses.update((keys[q_length], found[q_length]) for q_length in missing)
+            if wanted is q_lengths:
+                return dict((q_length, self._analyses[keys[q_length]].copy()) for q_length in wanted)
+            return self._analyses[keys[q_lengths]].copy()
+        if data is None:
+            data = self._get_noterest()
         if (settings is not None and settings['quarterLength'] == 'dynamic' and 
             ('dom_data' not in settings or type(settings['dom_data']) != list)):
             settings['dom_data'] = [self._get_dissonance(), self._get_duration(),
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#--------------------------------------------------------------------------------------------------
+# Program Name:           vis
+# Program Description:    Helps analyze music with computers.
+#
+# Filename:               models/patterns.py
+# Purpose:                Search for many interval patterns at once.
+#
+# Copyright (C) 2016 Alexander Morgan
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#--------------------------------------------------------------------------------------------------
+"""
+.. codeauthor:: Alexander Morgan
+
+Search sequences of intervals for many patterns and their transformations at once, with an
+Aho-Corasick automaton. This is used by
+:meth:`~vis.models.aggregated_pieces.AggregatedPieces.find_patterns`.
+"""
+
+import itertools
+from collections import deque
+import six
+
+
+# The token in a pattern that matches any one interval.
+WILDCARD = '*'
+
+# The transformations a PatternSet can add, in the order their variants are made.
+TRANSFORMATIONS = ('inversion', 'retrograde', 'retrograde inversion', 'permutations')
+
+
+def _tokens(pattern):
+    """
+    Used internally to split a pattern into its intervals. A pattern is either a list of intervals
+    or a string of them separated by spaces, in which each interval may be in brackets like in
+    n-grams, as in ``'[2] [-3] [4] [-2]'``.
+    """
+    if isinstance(pattern, six.string_types):
+        pattern = pattern.split()
+    return tuple(six.text_type(x).strip('[]()') for x in pattern)
+
+
+def _invert(token):
+    """
+    Used internally to turn a directed interval the other way. Rests, unisons (as ``'1'``,
+    ``'P1'``, or any number of semitones equal to zero, like ``'0'``), and wildcards stay the same.
+    """
+    if token.startswith('-'):
+        return token[1:]
+    elif token in (WILDCARD, 'Rest', '1', 'P1'):
+        return token
+    try:
+        if float(token) == 0:
+            return token
+    except ValueError:
+        pass
+    return '-' + token
+
+
+class PatternSet(object):
+    """
+    Many interval patterns, and the transformations of each that are wanted, compiled into one
+    Aho-Corasick automaton. :meth:`search` finds all of them in a sequence of intervals in one pass.
+
+    A pattern's ``'*'`` intervals match any one interval. Each pattern is split at its wildcards
+    into runs of intervals, only the runs go into the automaton, and a match is found where all
+    the runs of a pattern are found the right distances apart.
+
+    Since intervals don't change when music is transposed, every pattern already matches its
+    transpositions. Patterns without quality, like ``'[2] [-3]'``, should be searched for in
+    intervals without quality.
+
+    The possible transformations are:
+
+    * ``'inversion'``: every interval goes the other way. This only applies to melodic intervals.
+    * ``'retrograde'``: the pattern backwards. For melodic intervals this also inverts every
+      interval, since each interval is then between the same notes in the other order.
+    * ``'retrograde inversion'``: both of the above.
+    * ``'permutations'``: the intervals of the pattern in every possible order.
+    """
+
+    # When a transformation isn't one of TRANSFORMATIONS.
+    _UNKNOWN_TRANSFORMATION = 'Unknown transformation: {}. Please choose from {}.'
+
+    # When a pattern has no intervals.
+    _EMPTY_PATTERN = 'Patterns must have at least one interval.'
+
+    def __init__(self, patterns, transformations=None, melodic=True):
+        """
+        :param patterns: The patterns to find.
+        :type patterns: list of str or of list of str
+        :param transformations: The transformations of the patterns to find as well.
+        :type transformations: list of str
+        :param bool melodic: Whether the patterns are of melodic (horizontal) intervals, rather
+            than of vertical intervals.
+
+        :raises: :exc:`RuntimeError` if a transformation is unknown.
+        :raises: :exc:`RuntimeError` if a pattern has no intervals.
+        """
+        transformations = [] if transformations is None else list(transformations)
+        for each in transformations:
+            if each not in TRANSFORMATIONS:
+                raise RuntimeError(PatternSet._UNKNOWN_TRANSFORMATION.format(each, TRANSFORMATIONS))
+        # each variant is the name of its pattern, the transformation, and the intervals
+        self.variants = []
+        for pattern in patterns:
+            name = pattern if isinstance(pattern, six.string_types) else ' '.join(pattern)
+            tokens = _tokens(pattern)
+            if not tokens:
+                raise RuntimeError(PatternSet._EMPTY_PATTERN)
+            inverted = tuple(_invert(x) for x in tokens) if melodic else tokens
+            made = [('original', tokens)]
+            if 'inversion' in transformations and melodic:
+                made.append(('inversion', inverted))
+            if 'retrograde' in transformations:
+                made.append(('retrograde', inverted[::-1]))
+            if 'retrograde inversion' in transformations:
+                made.append(('retrograde inversion', tokens[::-1]))
+            if 'permutations' in transformations:
+                made.extend(('permutation', x) for x in itertools.permutations(tokens))
+            seen = set()
+            for transformation, these in made:
+                if these not in seen:
+                    seen.add(these)
+                    self.variants.append((name, transformation, these))
+        self._compile()
+
+    def _compile(self):
+        """
+        Used internally to build the automaton from the wildcard-free runs of every variant.
+        """
+        self._goto = [{}]
+        self._outputs = [[]]
+        # for every variant, the number of runs that have to be found
+        self._needed = []
+        self._anywhere = [] # the variants that are only wildcards
+        for number, (_, _, tokens) in enumerate(self.variants):
+            runs = [(start, tuple(group)) for start, group in self._runs(tokens)]
+            self._needed.append(len(runs))
+            if not runs:
+                self._anywhere.append(number)
+            for start, run in runs:
+                state = 0
+                for token in run:
+                    state = self._goto[state].setdefault(token, len(self._goto))
+                    if state == len(self._outputs):
+                        self._goto.append({})
+                        self._outputs.append([])
+                # when this run ends at a position, the variant starts this far back
+                self._outputs[state].append((number, start + len(run) - 1))
+        # breadth-first, find where to go when a run can't be continued
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, following in six.iteritems(self._goto[state]):
+                queue.append(following)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                found = self._goto[fallback].get(token, 0)
+                self._fail[following] = found if found != following else 0
+                self._outputs[following] = self._outputs[following] + self._outputs[self._fail[following]]
+
+    @staticmethod
+    def _runs(tokens):
+        """
+        Used internally to find the runs of intervals between wildcards, with their positions.
+        """
+        start = None
+        for i, token in enumerate(tokens + (WILDCARD,)):
+            if token == WILDCARD:
+                if start is not None:
+                    yield start, tokens[start:i]
+                start = None
+            elif start is None:
+                start = i
+
+    def search(self, tokens):
+        """
+        Find every pattern in a sequence of intervals.
+
+        :param tokens: The intervals.
+        :type tokens: sequence of str
+
+        :returns: The matches, as the position of their first and last intervals and the number of
+            the variant in :attr:`variants`, in order of where they end.
+        :rtype: list of 3-tuple of int
+        """
+        post = []
+        lengths = [len(x[2]) for x in self.variants]
+        longest = max(lengths) if lengths else 0
+        found = {} # start -> {variant: number of runs found}
+        state = 0
+        goto = self._goto
+        fail = self._fail
+        for position, token in enumerate(tokens):
+            # no variant that starts this far back can have a run end here, so forget its partial
+            # matches, which keeps only the last ``longest`` starts
+            found.pop(position - longest, None)
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for number, back in self._outputs[state]:
+                start = position - back
+                if start < 0 or start + lengths[number] > len(tokens):
+                    continue
+                counts = found.setdefault(start, {})
+                counts[number] = counts.get(number, 0) + 1
+                if counts[number] == self._needed[number]:
+                    post.append((start, start + lengths[number] - 1, number))
+                    del counts[number]
+        for number in self._anywhere:
+            post.extend((start, start + lengths[number] - 1, number)
+                        for start in range(len(tokens) - lengths[number] + 1))
+        post.sort(key=lambda x: (x[1], x[0], x[2]))
+        return post
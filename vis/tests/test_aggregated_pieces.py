@@ -30,8 +30,10 @@ import os
 from unittest import TestCase, TestLoader
 import six
 if six.PY3:
+    from unittest import mock
     from unittest.mock import MagicMock, Mock
 else:
+    import mock
     from mock import MagicMock, Mock
 import pandas
 from vis.analyzers.indexer import Indexer
@@ -181,6 +183,85 @@ class TestAggregatedPieces(TestCase):
                               data=aps.get_data(ind_analyzer='noterest', combined_experimenter='frequency'))
         self.assertTrue(actual.iloc[:,0].equals(expected))
 
+    def test_count_ngrams_1(self):
+        """count_ngrams() gives the same counts as the ngram, frequency, and aggregator pipeline"""
+        pieces = [Importer(os.path.join(VIS_PATH, 'tests', 'corpus', name))
+                  for name in ('bwv77.mxl', 'Kyrie.krn')]
+        aps = AggregatedPieces(pieces=pieces)
+        setts = {'n': 3, 'vertical': 'all', 'horizontal': 'lowest', 'directed': True}
+        freqs = aps.get_data('frequency', data=aps.get_data('ngram', settings=setts))
+        expected = aps.get_data(combined_experimenter='aggregator', data=[f[0] for f in freqs])
+        self.assertTrue(aps.count_ngrams(setts).equals(expected))
+        self.assertTrue(aps.count_ngrams(setts, processes=2).equals(expected))
+
+    def test_count_ngrams_2(self):
+        """count_ngrams() on an AggregatedPieces object with no pieces"""
+        self.assertRaises(RuntimeWarning, AggregatedPieces().count_ngrams, {'n': 2, 'vertical': 'all'})
+
+    def test_count_ngrams_3(self):
+        """the top n-grams from a bounded table, counted again exactly"""
+        pieces = [Importer(os.path.join(VIS_PATH, 'tests', 'corpus', name))
+                  for name in ('bwv77.mxl', 'Kyrie.krn')]
+        aps = AggregatedPieces(pieces=pieces)
+        setts = {'n': 3, 'vertical': 'all', 'horizontal': 'lowest', 'directed': True}
+        exact = aps.count_ngrams(setts, top_x=5)
+        actual = aps.count_ngrams(setts, top_x=5, error=0.005, verify=True)
+        self.assertTrue(actual.iloc[:, 0].equals(exact.iloc[:, 0]))
+        self.assertEqual(0.0, actual['error'].sum())
+        self.assertRaises(RuntimeWarning, aps.count_ngrams, setts, None, 5, 1.5)
+
+    def test_count_ngrams_4(self):
+        """count_ngrams() drops only the analyses it cached, and stops the workers on an error"""
+        pieces = [Importer(os.path.join(VIS_PATH, 'tests', 'corpus', name))
+                  for name in ('bwv77.mxl', 'Kyrie.krn')]
+        pieces[0].get_data('noterest')
+        cached = [set(piece._analyses) for piece in pieces]
+        aps = AggregatedPieces(pieces=pieces)
+        setts = {'n': 2, 'vertical': 'all', 'horizontal': 'lowest'}
+        aps.count_ngrams(setts)
+        self.assertEqual(cached, [set(piece._analyses) for piece in pieces])
+        pool = MagicMock()
+        pool.imap.return_value = iter([])
+        with mock.patch('vis.models.aggregated_pieces.mp.Pool', return_value=pool):
+            with mock.patch.object(pieces[0], '_get_ngram_codes', side_effect=RuntimeError):
+                pieces[0]._pathname = None
+                self.assertRaises(RuntimeError, aps.count_ngrams, setts, 2)
+        pool.terminate.assert_called_once_with()
+
+    def test_index_ngrams_1(self):
+        """index_ngrams() finds every n-gram where the 'ngram' indexer has it"""
+        pieces = [Importer(os.path.join(VIS_PATH, 'tests', 'corpus', name))
+                  for name in ('bwv77.mxl', 'Kyrie.krn')]
+        aps = AggregatedPieces(pieces=pieces)
+        setts = {'n': 3, 'vertical': 'all', 'horizontal': 'lowest'}
+        index = aps.index_ngrams(setts)
+        ngrams = aps.get_data('ngram', settings=setts)
+        for gram in ('[8] (_) [8] (_) [8]', '[3] (_) [3] (_) [3]'):
+            expected = sorted((piece.metadata('pathname'), label[1], offset)
+                              for piece, frame in zip(pieces, ngrams)
+                              for label in frame.columns
+                              for offset in frame.index[frame[label] == gram])
+            found = index.find(gram)
+            actual = sorted(zip(found['piece'], found['voices'], found['offset']))
+            self.assertEqual(expected, actual)
+
+    def test_find_patterns_1(self):
+        """find_patterns() finds melodic patterns and their inversions"""
+        aps = AggregatedPieces(pieces=[Importer(os.path.join(VIS_PATH, 'tests', 'corpus', 'bwv77.mxl'))])
+        setts = {'quality': False, 'simple or compound': 'simple'}
+        actual = aps.find_patterns(['[-2] [-2] [-2]', '2 * 2'], ['inversion'], settings=setts)
+        self.assertEqual(['piece', 'voices', 'offset', 'end', 'pattern', 'variant'], list(actual.columns))
+        horiz = aps.get_data('horizontal_interval', settings=setts)[0]
+        for label in horiz.columns:
+            stream = horiz[label].dropna()
+            values = list(stream)
+            starts = [stream.index[i] for i in range(len(values) - 2)
+                      if values[i:i + 3] == ['2', '2', '2']]
+            found = actual[(actual['voices'] == label[1]) & (actual['variant'] == 'inversion') &
+                           (actual['pattern'] == '[-2] [-2] [-2]')]
+            self.assertEqual(starts, list(found['offset']))
+        self.assertRaises(RuntimeWarning, aps.find_patterns, ['2 2'], None, 'diagonal')
+
     def test_date(self):
         date = ['----/--/-- to ----/--/--']
         agg = AggregatedPieces()._make_date_range(date)
@@ -107,10 +107,23 @@ class TestContourIndexer(TestCase):
         actual = contour.ContourIndexer(NOTES, settings).run()
         self.assertTrue(actual.equals(EXPECTED))
 
+    def test_contour_2(self):
+        """tests that rests are skipped and that each spelling of a pitch is counted"""
+        notes = pandas.Series(['B#3', 'Rest', 'C4', 'D4', float('nan'), 'C4'], index=range(6))
+        actual = contour.ContourIndexer(make_dataframe(['0'], [notes], horiz_name), {'length': 3}).run()
+        self.assertSequenceEqual(['[1, 1, 2]', '[0, 1, 0]'], list(actual.iloc[:, 0]))
+        self.assertSequenceEqual([0, 2], list(actual.index))
+        self.assertEqual('[1, 1, 2, 1]', contour.getContour(['B#3', 'C4', 'D4', 'C4']))
+
     def test_matrix(self):
         matrix = contour.COM_matrix(test1)
         self.assertEqual(matrix, matrix1)
 
+    def test_matrix_2(self):
+        """tests that contour numbers are compared as numbers"""
+        matrix = contour.COM_matrix('[10, 9]')
+        self.assertEqual([['0', '-'], ['+', '0']], matrix)
+
     def test_compare(self):
         comparison = contour.compare(matrix1, matrix2)
         self.assertEqual(0.8, comparison)
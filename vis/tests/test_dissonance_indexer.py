@@ -30,6 +30,7 @@
 
 import os
 import unittest
+import numpy as np
 import pandas as pd
 from vis.analyzers.indexers import dissonance, noterest, meter, interval
 from vis.models.indexed_piece import Importer, IndexedPiece
@@ -145,6 +146,29 @@ class TestDissonanceIndexer(unittest.TestCase):
         actual = init._is_passing_or_neigh(1, '0,1', 'M2', 'P1')
         self.assertSequenceEqual(expected, actual)
 
+    def test_check_4s_5s_1(self):
+        """
+        A fourth is consonant if its lower voice makes a third with a voice below it while the 
+        fourth lasts, even if that voice only comes in after the fourth starts, but not if the 
+        interval below is a second.
+        """
+        parts = ('0', '1', '2')
+        index = [0.0, 1.0, 2.0]
+        b_df = make_df([pd.Series([1, .125, .25], index=index)]*3,
+                       pd.MultiIndex.from_product((b_ind, parts), names=names))
+        dur_df = make_df([pd.Series([1]*3, index=index)]*3,
+                         pd.MultiIndex.from_product((dur_ind, parts), names=names))
+        h_df = make_df([pd.Series(['1']*3, index=index)]*3,
+                       pd.MultiIndex.from_product((h_ind, parts), names=names))
+        v_df = make_df([pd.Series(['P4', np.nan, 'P4'], index=index),
+                        pd.Series(['m7', 'm6', 'm6'], index=index),
+                        pd.Series([np.nan, 'M3', 'M2'], index=index)],
+                       pd.MultiIndex.from_product((v_ind, ('0,1', '0,2', '1,2')), names=names))
+        init = dissonance.DissonanceIndexer([b_df, dur_df, h_df, v_df])
+        simuls = v_df[v_ind].ffill()
+        self.assertEqual('CP4', init.check_4s_5s('0,1', 0, 'P4', simuls))
+        self.assertEqual('DP4', init.check_4s_5s('0,1', 2, 'P4', simuls))
+
     def test_diss_indexer_run_1a(self):
         """
         Detection of two rising passing tones in a mini-piece.
@@ -168,6 +192,48 @@ class TestDissonanceIndexer(unittest.TestCase):
         actual = dissonance.DissonanceIndexer(in_dfs).run()
         assert_frame_equal(expected, actual)
 
+    def test_rule_statistics_1(self):
+        """
+        The dissonance types checked for two rising passing tones in a mini-piece are counted, 
+        whether or not the voice pairs are classified in worker processes.
+        """
+        in_dfs = [qh_b_df, qh_dur_df, qh_h_df, asc_q_v_df]
+        for settings in ({'statistics': True}, {'statistics': True, 'processes': 2}):
+            init = dissonance.DissonanceIndexer(in_dfs, settings)
+            init.run()
+            actual = init.rule_statistics()
+            self.assertSequenceEqual(dissonance.DissonanceIndexer._RULES, list(actual.index))
+            self.assertSequenceEqual([2, 0, 0, 0, 0, 0, 0, 0, 0], list(actual['evaluations']))
+            self.assertSequenceEqual([2, 0, 0, 0, 0, 0, 0, 0, 0], list(actual['hits']))
+            self.assertEqual(1.0, actual.at['passing_or_neigh', 'hit rate'])
+            self.assertTrue(pd.isnull(actual.at['suspension', 'hit rate']))
+        # nothing is counted by default
+        init = dissonance.DissonanceIndexer(in_dfs)
+        init.run()
+        self.assertEqual(0, init.rule_statistics()['evaluations'].sum())
+
+    def test_diss_indexer_meter_1(self):
+        """
+        The mini-piece with descending passing tones, written in 4/4 with every value halved, is 
+        scaled back to the thresholds for 4/2 and gets the same labels.
+        """
+        in_dfs = [hq_b_df, hq_dur_df, hdescq_h_df, asc_q_v_df]
+        halved = [df.copy() for df in in_dfs]
+        for df in halved:
+            df.index = df.index / 2.0
+        halved[1] = halved[1] / 2.0
+        meters = pd.DataFrame({'0': ['4/4'], '1': ['4/4']}, index=[0.0])
+        expected = empty_df.copy()
+        expected.iat[1, 1] = 'D'
+        expected.iat[3, 1] = 'D'
+        expected.index = expected.index / 2.0
+        whole = dissonance.DissonanceIndexer(in_dfs)
+        init = dissonance.DissonanceIndexer(halved, {'time_signatures': meters})
+        for voice in ('0', '1'):
+            np.testing.assert_array_equal(whole._durs[voice], init._durs[voice])
+            np.testing.assert_array_equal(whole._strengths[voice], init._strengths[voice])
+        assert_frame_equal(expected, init.run())
+
     def test_diss_indexer_run_2(self):
         """
         Test the dissonance indexer on an entire real piece that has most of the dissonance types 
@@ -185,6 +251,54 @@ class TestDissonanceIndexer(unittest.TestCase):
         expected.columns = actual.columns # the pickle file has old-style column names.
         assert_frame_equal(actual, expected)
 
+    def test_diss_indexer_run_3(self):
+        """
+        Test the dissonance indexer on another entire piece. The expected labels were made before the 
+        dissonance rules looked up their surrounding events in precomputed arrays, so this checks that 
+        the lookups give the same labels as searching the score did.
+        """
+        expected = pd.read_pickle(os.path.join(VIS_PATH, 'tests', 'expecteds', 'test_dissonance_jos2308.pickle'))
+        ip = Importer(os.path.join(VIS_PATH, 'tests', 'corpus', 'Jos2308.krn'))
+        actual = ip.get_data('dissonance')
+        assert_frame_equal(actual, expected)
+
+    def test_diss_indexer_run_4(self):
+        """
+        Classifying the voice pairs in worker processes gives the same labels as classifying them 
+        one after another.
+        """
+        expected = pd.read_pickle(os.path.join(VIS_PATH, 'tests', 'expecteds', 'test_dissonance_jos2308.pickle'))
+        ip = Importer(os.path.join(VIS_PATH, 'tests', 'corpus', 'Jos2308.krn'))
+        actual = ip.get_data('dissonance', settings={'processes': 2})
+        assert_frame_equal(actual, expected)
+
+    def test_diss_indexer_attacks_1(self):
+        """
+        The precomputed positions of the previous and next events are those of the last and first 
+        valid rows before and after every row of every column of intervals in a real piece.
+        """
+        ip = Importer(os.path.join(VIS_PATH, 'tests', 'corpus', 'bwv2.xml'))
+        h_setts = {'quality': False, 'simple or compound': 'compound', 'horiz_attach_before': False}
+        v_setts = {'quality': True, 'simple or compound': 'simple', 'directed': True}
+        in_dfs = [ip.get_data('beat_strength'), ip.get_data('duration'),
+                  ip.get_data('horizontal_interval', settings=h_setts),
+                  ip.get_data('vertical_interval', settings=v_setts)]
+        init = dissonance.DissonanceIndexer(in_dfs)
+        score = init._score
+        for col, key in enumerate(score.columns):
+            if key[0] not in (h_ind, v_ind):
+                continue
+            column = score.iloc[:, col]
+            for i in range(len(score)):
+                before = column.iloc[:i].last_valid_index()
+                if before is None:
+                    self.assertRaises(IndexError, init._previous, key, i)
+                else:
+                    self.assertEqual(score.index.get_loc(before), init._previous(key, i))
+                after = column.iloc[i + 1:].first_valid_index()
+                expected = None if after is None else score.index.get_loc(after)
+                self.assertEqual(expected, init._next(key, i))
+
 
 #-------------------------------------------------------------------------------------------------#
 # Definitions                                                                                     #
@@ -39,7 +39,7 @@ import pandas
 import music21
 from music21 import converter
 from vis.analyzers.indexer import Indexer
-from vis.analyzers.indexers import noterest
+from vis.analyzers.indexers import noterest, interval
 from vis.analyzers.experimenter import Experimenter
 from vis.models.indexed_piece import Importer, IndexedPiece, _find_piece_title, _find_part_names, _find_piece_range, _find_part_ranges, login_edb, auth_get
 # find pathname to the 'vis' directory
@@ -202,6 +202,104 @@ class TestPartsAndTitles(TestCase):
         actual_range = _find_part_ranges(score)
         self.assertEqual(expected_range, actual_range)
 
+class TestIndexedPieceIntervals(TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(VIS_PATH, 'tests', 'corpus', 'bwv77.mxl')
+        self.ind_piece = Importer(self.path)
+
+    def test_vertical_pairs_1(self):
+        # Requested pairs are calculated and cached incrementally, in the usual column order, and
+        # the 'pairs' setting doesn't change the other settings
+        expected = Importer(self.path).get_data('vertical_interval')
+        other = Importer(self.path).get_data('vertical_interval', settings={})
+        actual = self.ind_piece.get_data('vertical_interval', settings={'pairs': ['Tenor,Bass']})
+        self.assertTrue(actual.equals(other.loc[:, [('interval.IntervalIndexer', 'Tenor,Bass')]]))
+        self.assertEqual(['Tenor,Bass'], self.ind_piece._analyses['vertical_interval'].labels)
+        self.ind_piece.get_data('vertical_interval', settings={'pairs': [(0, 3), (2, 3)]})
+        cached = self.ind_piece._analyses['vertical_interval']
+        self.assertSequenceEqual(['Soprano,Bass', 'Tenor,Bass'], cached.labels)
+        actual = self.ind_piece.get_data('vertical_interval')
+        self.assertTrue(actual.equals(expected))
+
+    def test_vertical_pairs_2(self):
+        # The other interval settings still apply to the requested pairs
+        setts = {'quality': False, 'simple or compound': 'simple', 'directed': True}
+        expected = self.ind_piece.get_data('vertical_interval', settings=setts).iloc[:, [2]]
+        setts['pairs'] = ['Soprano,Bass']
+        actual = Importer(self.path).get_data('vertical_interval', settings=setts)
+        self.assertTrue(actual.equals(expected))
+
+    def test_vertical_pairs_3(self):
+        # The n-grams of a voice pair are the same whether it's picked or all pairs are used
+        setts = {'n': 2, 'vertical': 'all'}
+        expected = Importer(self.path).get_data('ngram', settings=setts)
+        setts['vertical'] = [('Soprano,Alto',)]
+        actual = self.ind_piece.get_data('ngram', settings=setts)
+        self.assertSequenceEqual(list(expected['ngram.NGramIndexer']['Soprano,Alto'].dropna()),
+                                 list(actual['ngram.NGramIndexer']['Soprano,Alto'].dropna()))
+
+    def test_interval_variants_1(self):
+        # Each combination of settings is made once from the cached interval codes
+        setts = {'quality': 'chromatic', 'simple or compound': 'simple', 'directed': False}
+        first = self.ind_piece.get_data('vertical_interval', settings=setts)
+        expected = interval.IntervalIndexer(self.ind_piece.get_data('noterest'), setts).run()
+        self.assertTrue(first.equals(expected))
+        # changing a result doesn't change the cached codes
+        first.fillna('x', inplace=True)
+        self.assertTrue(self.ind_piece.get_data('vertical_interval', settings=setts.copy()).equals(expected))
+        first = self.ind_piece.get_data('horizontal_interval', settings=setts)
+        expected = interval.HorizontalIntervalIndexer(self.ind_piece.get_data('noterest'), setts).run()
+        self.assertTrue(first.equals(expected))
+        first.fillna('x', inplace=True)
+        self.assertTrue(self.ind_piece.get_data('horizontal_interval', settings=setts.copy()).equals(expected))
+
+    def test_horiz_attach_before_1(self):
+        # Intervals attached to their first note, with and without the default interval settings
+        notes = self.ind_piece.get_data('noterest')
+        for setts in ({'horiz_attach_before': True, 'quality': 'chromatic'},
+                      {'horiz_attach_before': True, 'quality': True, 'directed': True,
+                       'simple or compound': 'compound'}):
+            actual = self.ind_piece.get_data('horizontal_interval', settings=setts)
+            expected = interval.HorizontalIntervalIndexer(notes, setts).run()
+            self.assertTrue(actual.equals(expected))
+            self.assertEqual(0.0, actual.index[0])
+        after = self.ind_piece.get_data('horizontal_interval')
+        self.assertSequenceEqual(list(after.iloc[:, 0].dropna()), list(actual.iloc[:, 0].dropna()))
+
+    def test_ngram_pairs_1(self):
+        # Without data, the n-grams are made from the pairs in the 'vertical' setting
+        int_setts = {'quality': False, 'simple or compound': 'compound', 'directed': True}
+        ngram_setts = {'n': 2, 'horizontal': 'lowest', 'vertical': [('Soprano,Bass',), ('Alto,Tenor',)]}
+        data = (self.ind_piece.get_data('vertical_interval', settings=int_setts),
+                self.ind_piece.get_data('horizontal_interval', settings=int_setts))
+        expected = self.ind_piece.get_data('ngram', data=data, settings=ngram_setts)
+        ngram_setts.update(int_setts)
+        other_piece = Importer(self.path)
+        actual = other_piece.get_data('ngram', settings=ngram_setts)
+        self.assertTrue(actual.equals(expected))
+        self.assertEqual(2, len(other_piece._analyses['vertical_interval'].labels))
+
+    def test_offset_grids_1(self):
+        # Without data, the notes are regularized and cached for each quarterLength and method
+        notes = self.ind_piece.get_data('noterest')
+        grids = self.ind_piece.get_data('offset', settings={'quarterLength': [1.0, 2.0]})
+        self.assertSequenceEqual([1.0, 2.0], sorted(grids))
+        for q_length in (1.0, 2.0):
+            expected = self.ind_piece.get_data('offset', data=notes, settings={'quarterLength': q_length})
+            self.assertTrue(grids[q_length].equals(expected))
+        # the cached grid is reused, but changing what was returned doesn't change it
+        grids[2.0].iloc[0, 0] = 'changed'
+        again = self.ind_piece.get_data('offset', settings={'quarterLength': 2})
+        self.assertIsNot(grids[2.0], again)
+        self.assertTrue(again.equals(self.ind_piece._analyses[('offset', 2.0, 'ffill')]))
+        self.assertNotEqual('changed', again.iloc[0, 0])
+        self.assertIn(('offset', 1.0, 'ffill'), self.ind_piece._analyses)
+        unfilled = self.ind_piece.get_data('offset', settings={'quarterLength': 1.0, 'method': None})
+        self.assertIsNot(grids[1.0], unfilled)
+        self.assertIn(('offset', 1.0, None), self.ind_piece._analyses)
+
+
 class TestIndexedPieceC(TestCase):
 
     def test_meta(self):
@@ -249,4 +347,5 @@ class TestIndexedPieceC(TestCase):
 #-------------------------------------------------------------------------------------------------#
 INDEXED_PIECE_SUITE_A = TestLoader().loadTestsFromTestCase(TestIndexedPieceA)
 INDEXED_PIECE_PARTS_TITLES = TestLoader().loadTestsFromTestCase(TestPartsAndTitles)
+INDEXED_PIECE_INTERVALS = TestLoader().loadTestsFromTestCase(TestIndexedPieceIntervals)
 INDEXED_PIECE_SUITE_C = TestLoader().loadTestsFromTestCase(TestIndexedPieceC)
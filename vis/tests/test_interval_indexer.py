@@ -32,9 +32,11 @@
 import os
 import unittest
 import six
+import numpy
 import pandas
 from music21 import interval, note
 from vis.analyzers.indexers.interval import IntervalIndexer, HorizontalIntervalIndexer, real_indexer_func, indexer_funcs
+from vis.analyzers.indexers import interval as vis_interval
 from vis.tests.test_note_rest_indexer import TestNoteRestIndexer
 
 # find the pathname of the 'vis' directory
@@ -519,6 +521,168 @@ class TestHorizIntervalIndexerLong(unittest.TestCase):
         self.assertTrue(actual.equals(expected))
 
 
+class TestIntervalIndexerPairs(unittest.TestCase):
+    def setUp(self):
+        not_processed = [[(0.0, 'G4'), (0.5, 'A4')], [(0.0, 'E4')], [(0.0, 'C4'), (0.5, 'Rest')]]
+        self.test_in = pandas_maker(not_processed)
+        self.test_in.columns = pandas.MultiIndex.from_product([('notes',), ('S', 'A', 'B')])
+
+    def test_pairs_1(self):
+        # Pairs given by label or by position give the same columns as the full analysis
+        everything = IntervalIndexer(self.test_in, settings={'quality': True}).run()
+        for pairs in (['S,B', 'A,B'], [(0, 2), (1, 2)], ['A,B', (0, 2)]):
+            actual = IntervalIndexer(self.test_in, settings={'quality': True, 'pairs': pairs}).run()
+            self.assertSequenceEqual(['S,B', 'A,B'], list(actual.columns.get_level_values(1)))
+            self.assertTrue(actual.equals(everything.iloc[:, [1, 2]]))
+
+    def test_pairs_2(self):
+        # Pairs that aren't in the piece
+        for pairs in (['B,S'], [(2, 0)], ['S,T']):
+            indexer = IntervalIndexer(self.test_in, settings={'pairs': pairs})
+            self.assertRaises(RuntimeError, indexer.run)
+
+
+class TestIntervalEngine(unittest.TestCase):
+    # Every spelled pitch up to double sharps and flats, in three octaves (one of them implicit)
+    pitch_names = [step + acc + octave for step in 'CDEFGAB' for acc in ('', '#', '-', '##', '--')
+                   for octave in ('', '2', '5')]
+
+    def test_parse_pitch_name_1(self):
+        self.assertEqual((29, 60), vis_interval.parse_pitch_name('C4'))
+        self.assertEqual((29, 60), vis_interval.parse_pitch_name('c'))
+        self.assertEqual((71, 131), vis_interval.parse_pitch_name('c-10'))
+        self.assertEqual((35, 73), vis_interval.parse_pitch_name(u'B##4'))
+        self.assertIsNone(vis_interval.parse_pitch_name('Rest'))
+        self.assertIsNone(vis_interval.parse_pitch_name('C~4'))
+        self.assertIsNone(vis_interval.parse_pitch_name(float('nan')))
+
+    def test_engine_vs_music21_1(self):
+        """Compare the engine with music21 for all pairs of pitch_names and all 14 analysis types."""
+        numbers = [i for i, func in enumerate(vis_interval.analysis_types) if func is not None]
+        lowers, uppers, expecteds = [], [], {i: [] for i in numbers}
+        for lower in self.pitch_names:
+            lower_numbers = vis_interval.parse_pitch_name(lower)
+            for upper in self.pitch_names:
+                try:
+                    interv = interval.Interval(note.Note(lower), note.Note(upper))
+                except interval.IntervalException:
+                    # music21 can't name intervals beyond quadruply augmented, and neither can we
+                    upper_numbers = vis_interval.parse_pitch_name(upper)
+                    parts = vis_interval.interval_parts(lower_numbers[0], lower_numbers[1],
+                                                        upper_numbers[0], upper_numbers[1])
+                    self.assertRaises(interval.IntervalException, vis_interval.interval_name, *parts,
+                                      analysis_number=0)
+                    continue
+                lowers.append(lower)
+                uppers.append(upper)
+                for i in numbers:
+                    expecteds[i].append(vis_interval.analysis_types[i](interv))
+        for i in numbers:
+            actual = vis_interval.interval_names_from_pitches(lowers, uppers, i)
+            self.assertSequenceEqual(expecteds[i], list(actual))
+
+    def test_interval_table_1(self):
+        # The table is read-only, shared between calls, and agrees with the engine
+        table, names = vis_interval.interval_table(1)
+        self.assertIs(table, vis_interval.interval_table(1)[0])
+        self.assertFalse(table.flags.writeable)
+        pitches = vis_interval.TABLE_PITCHES
+        codes = vis_interval.table_codes(['C4', 'G5', 'Rest', 'C~4'])
+        self.assertSequenceEqual([pitches.index('C4'), pitches.index('G5'), len(pitches) - 1, -1],
+                                 list(codes))
+        self.assertEqual('P5', names[table[codes[0], codes[1]]])
+        self.assertEqual('-P5', names[table[codes[1], codes[0]]])
+        self.assertEqual('Rest', names[table[codes[2], codes[0]]])
+        numbers = vis_interval.pitch_numbers(pitches[:-1])
+        parts = vis_interval.interval_parts(numbers[0][:, None], numbers[1][:, None], numbers[0], numbers[1])
+        possible = parts[2] != 0
+        expected = vis_interval.interval_names(parts[0][possible], parts[1][possible], parts[2][possible], 1)
+        actual = numpy.array(names, dtype=object)[table[:-1, :-1][possible]]
+        self.assertSequenceEqual(list(expected), list(actual))
+        self.assertTrue((table[:-1, :-1][~possible] == -1).all())
+
+    def test_interval_names_from_pitches_1(self):
+        # NaN, rests, and pitches that only music21 can parse
+        lowers = [float('nan'), 'C4', 'Rest', 'C4', 'C4', 'C~4']
+        uppers = ['C4', float('nan'), 'E4', 'Rest', 'E`4', 'G4']
+        expected = [float('nan'), float('nan'), 'Rest', 'Rest',
+                    real_indexer_func(('E`4', 'C4'), vis_interval.dwq_dir_com_analysis),
+                    real_indexer_func(('G4', 'C~4'), vis_interval.dwq_dir_com_analysis)]
+        actual = vis_interval.interval_names_from_pitches(lowers, uppers, 9)
+        self.assertTrue(pandas.Series(actual).equals(pandas.Series(expected)))
+
+    def test_pair_interval_names_1(self):
+        # All the pairs at once give the same names as one pair at a time
+        pitches = numpy.array([[float('nan'), 'C4', 'G#3', 'E4'],
+                               ['A4', 'C4', 'Rest', 'B--2'],
+                               ['C###5', 'D~4', 'F3', 'E-3']], dtype=object)
+        pairs = [(0, 1), (0, 2), (0, 3), (1, 2), (1, 3), (2, 3)]
+        for analysis_number, analysis_type in enumerate(vis_interval.analysis_types):
+            if analysis_type is None:
+                continue
+            actual = vis_interval.pair_interval_names(pitches, pairs, analysis_number)
+            expected = [[real_indexer_func((row[x], row[y]), analysis_type) for x, y in pairs]
+                        for row in pitches]
+            self.assertTrue(pandas.DataFrame(actual).equals(pandas.DataFrame(expected)))
+
+    def test_interval_codes_1(self):
+        # Every analysis type made from the codes is what the indexers make with those settings
+        not_processed = [[(0.0, 'G4'), (0.5, 'A4'), (1.0, 'B#4'), (2.0, 'C~5')],
+                         [(0.5, 'E4'), (1.0, 'Rest'), (1.5, 'F##3')],
+                         [(0.0, 'C4'), (0.5, 'B-2'), (2.0, 'C-4')]]
+        test_in = pandas_maker(not_processed)
+        test_in.columns = pandas.MultiIndex.from_product([('notes',), ('S', 'A', 'B')])
+        vert_codes = IntervalIndexer(test_in).run_codes()
+        horiz_codes = HorizontalIntervalIndexer(test_in).run_codes()
+        self.assertSequenceEqual(['S,A', 'S,B', 'A,B'], vert_codes.labels)
+        for analysis_number, analysis_type in enumerate(vis_interval.analysis_types):
+            if analysis_type is None:
+                continue
+            settings = {'quality': ('diatonic no quality', 'diatonic with quality', 'chromatic',
+                                    'interval class')[analysis_number % 4],
+                        'directed': analysis_number % 8 < 4,
+                        'simple or compound': 'compound' if analysis_number >= 8 else 'simple'}
+            self.assertEqual(analysis_number, vis_interval.find_analysis_number(settings))
+            expected = IntervalIndexer(test_in, settings).run()
+            self.assertTrue(vert_codes.to_frame(analysis_number).equals(expected))
+            expected = HorizontalIntervalIndexer(test_in, settings).run()
+            self.assertTrue(horiz_codes.to_frame(analysis_number).equals(expected))
+        # the frames are cached, but changing one that was returned doesn't change the cache
+        first = vert_codes.to_frame(9)
+        expected = vert_codes.to_frame(9)
+        self.assertIsNot(first, expected)
+        first.iloc[0, 0] = 'changed'
+        self.assertTrue(vert_codes.to_frame(9).equals(expected))
+
+    def test_interval_codes_2(self):
+        # Joining and selecting columns
+        not_processed = [[(0.0, 'G4'), (0.5, 'A4')], [(0.0, 'E4')], [(0.0, 'C4'), (0.5, 'Rest')]]
+        test_in = pandas_maker(not_processed)
+        test_in.columns = pandas.MultiIndex.from_product([('notes',), ('S', 'A', 'B')])
+        expected = IntervalIndexer(test_in, {'quality': True}).run()
+        first = IntervalIndexer(test_in, {'pairs': ['A,B']}).run_codes()
+        second = IntervalIndexer(test_in, {'pairs': ['S,A', 'S,B']}).run_codes()
+        actual = first.join(second).select(['S,A', 'S,B', 'A,B'])
+        self.assertTrue(actual.to_frame(9).equals(expected))
+        self.assertTrue(actual.select(['A,B']).to_frame(9).equals(expected.iloc[:, [2]]))
+
+    def test_interval_reindexer_1(self):
+        # The translation tables give what music21 gives, including for names that aren't in them
+        names = ['M3', '-d1', 'P-8', 'AAAA22', 'Rest', float('nan'), 'm-10', 'd1', 'P1', 'M3']
+        in_df = pandas.DataFrame({'a': names, 'b': names[::-1]})
+        for analysis_number, analysis_type in enumerate(vis_interval.analysis_types):
+            if analysis_type is None:
+                continue
+            settings = {'quality': ('diatonic no quality', 'diatonic with quality', 'chromatic',
+                                    'interval class')[analysis_number % 4],
+                        'directed': analysis_number % 8 < 4,
+                        'simple or compound': 'compound' if analysis_number >= 8 else 'simple'}
+            actual = vis_interval.IntervalReindexer(in_df, settings).run()
+            expected = in_df.applymap(lambda x: x if isinstance(x, float) or x == 'Rest'
+                                      else analysis_type(interval.Interval(x)))
+            self.assertTrue(actual.equals(expected))
+
+
 #-------------------------------------------------------------------------------------------------#
 # Definitions                                                                                     #
 #-------------------------------------------------------------------------------------------------#
@@ -526,3 +690,5 @@ INTERVAL_INDEXER_SHORT_SUITE = unittest.TestLoader().loadTestsFromTestCase(TestI
 INTERVAL_INDEXER_LONG_SUITE = unittest.TestLoader().loadTestsFromTestCase(TestIntervalIndexerLong)
 INT_IND_INDEXER_SUITE = unittest.TestLoader().loadTestsFromTestCase(TestIntervalIndexerIndexer)
 HORIZ_INT_IND_LONG_SUITE = unittest.TestLoader().loadTestsFromTestCase(TestHorizIntervalIndexerLong)
+INTERVAL_PAIRS_SUITE = unittest.TestLoader().loadTestsFromTestCase(TestIntervalIndexerPairs)
+INTERVAL_ENGINE_SUITE = unittest.TestLoader().loadTestsFromTestCase(TestIntervalEngine)
@@ -27,6 +27,8 @@
 # pylint: disable=too-many-public-methods
 
 import os
+import shutil
+import tempfile
 import unittest
 import pandas
 from vis.analyzers.indexers import ngram
@@ -628,6 +630,173 @@ class TestNGramIndexer(unittest.TestCase):
         actual = ngram.NGramIndexer([vertical, horizontal], setts).run()
         self.assertTrue(actual.equals(expected))
 
+    def test_ngram_codes_1(self):
+        """that the integer-coded n-grams give the same strings as concatenating strings, with
+        leading NaNs, several observations per slice, terminators, and the other settings"""
+        mi = mi_maker((V_IND,), ('0,1', '0,2', '1,2'))
+        vertical = df_maker([pandas.Series(['A', 'B', 'Rest', 'D', 'E']),
+                             pandas.Series(['Z', 'X', 'Y', 'W'], index=[1, 2, 3, 4]),
+                             pandas.Series(['Q', 'R', 'S', 'T'], index=[0, 1, 3, 4])], mi)
+        mi = mi_maker((H_IND,), ('0', '1', '2'))
+        horizontal = df_maker([pandas.Series(['a', 'b', 'c', 'd'], index=[1, 2, 3, 4]),
+                               pandas.Series(['a2', 'b2'], index=[1, 3]),
+                               pandas.Series(['z', 'x', 'y', 'w'], index=[1, 2, 3, 4])], mi)
+        for n in (1, 2, 3):
+            for brackets in (True, False):
+                for terminator in ([], ['Rest']):
+                    for align in ('left', 'right'):
+                        setts = {'n': n, 'vertical': [('0,1', '1,2'), ('0,2',)], 'brackets': brackets,
+                                 'terminator': terminator, 'align': align}
+                        if n > 1:
+                            setts['horizontal'] = [('1', '0'), ('2',)]
+                            setts['open-ended'] = n == 3
+                            score = [vertical, horizontal]
+                        else:
+                            score = [vertical]
+                        expected = ngram.NGramIndexer(score, dict(setts))._run_strings(n)
+                        actual = ngram.NGramIndexer(score, dict(setts)).run()
+                        self.assertTrue(actual.equals(expected))
+
+    def test_ngram_codes_2(self):
+        """that the codes of distinct n-grams are distinct and render to the n-grams"""
+        mi = mi_maker((V_IND,), ('0,1',))
+        vertical = df_maker([pandas.Series(['A', 'B', 'A', 'B', 'A'])], mi)
+        codes = ngram.NGramIndexer([vertical], {'n': 2, 'vertical': [('0,1',)]}).run_codes()
+        self.assertEqual(['0,1'], codes.labels)
+        self.assertSequenceEqual([0, 1, 2, 3], list(codes.indices[0]))
+        grams = codes.grams[0]
+        self.assertEqual((4, 2), grams.shape)
+        self.assertTrue((grams[0] == grams[2]).all())
+        self.assertFalse((grams[0] == grams[1]).all())
+        self.assertEqual('[A] [B]', codes.render(0, grams[0]))
+
+    def test_ngram_codes_3(self):
+        """that n-grams of observations that aren't strings are still made with str()"""
+        mi = mi_maker((V_IND,), ('0,1',))
+        vertical = df_maker([pandas.Series([1, 2, 3])], mi)
+        setts = {'n': 2, 'vertical': [('0,1',)], 'brackets': False}
+        self.assertRaises(RuntimeError, ngram.NGramIndexer([vertical], setts).run_codes)
+        actual = ngram.NGramIndexer([vertical], setts).run()
+        self.assertSequenceEqual(['1 2.0', '2 3.0'], list(actual.iloc[:, 0]))
+
+    def test_ngram_counter_1(self):
+        """that the NGramCounter adds up coded and rendered n-grams from several pieces"""
+        mi = mi_maker((V_IND,), ('0,1', '1,2'))
+        first = df_maker([pandas.Series(['A', 'B', 'A', 'B']), pandas.Series(['B', 'A', 'B', 'C'])], mi)
+        mi = mi_maker((V_IND,), ('0,1',))
+        second = df_maker([pandas.Series(['C', 'A', 'B'])], mi)
+        third = df_maker([pandas.Series([1, 2])], mi)
+        setts = {'n': 2, 'vertical': 'all'}
+        counter = ngram.NGramCounter()
+        counter.add(ngram.NGramIndexer([first], dict(setts)).run_codes())
+        counter.add(ngram.NGramIndexer([second], dict(setts)).run_codes())
+        counter.add_frame(ngram.NGramIndexer([third], {'n': 2, 'vertical': 'all', 'brackets': False}).run())
+        expected = pandas.Series([1.0, 4.0, 2.0, 1.0, 1.0],
+                                 index=['1 2.0', '[A] [B]', '[B] [A]', '[B] [C]', '[C] [A]'])
+        actual = counter.counts()
+        self.assertEqual(['aggregator.ColumnAggregator'], list(actual.columns))
+        self.assertTrue(actual.iloc[:, 0].equals(expected))
+
+    def test_ngram_counter_2(self):
+        """that a counter with a capacity keeps the common n-grams, never under-counts them, and
+        counts them exactly when they're counted again"""
+        mi = mi_maker((V_IND,), ('0,1',))
+        vertical = df_maker([pandas.Series(list('ABABABABCDEFGABAB'))], mi)
+        setts = {'n': 2, 'vertical': 'all'}
+        codes = ngram.NGramIndexer([vertical], setts).run_codes()
+        exact = ngram.NGramCounter()
+        exact.add(codes)
+        exact = exact.counts().iloc[:, 0]
+        counter = ngram.NGramCounter(4)
+        counter.add(codes)
+        actual = counter.counts(2)
+        self.assertEqual(['[A] [B]', '[B] [A]'], list(actual.index))
+        self.assertEqual(['aggregator.ColumnAggregator', 'error'], list(actual.columns))
+        for gram in actual.index:
+            count, error = actual.loc[gram]
+            self.assertTrue(count >= exact[gram] >= count - error)
+            self.assertTrue(error <= 16.0 / 4)
+        again = counter.shortlist(2)
+        again.add(codes)
+        verified = again.counts(2)
+        self.assertSequenceEqual([6.0, 4.0], list(verified.iloc[:, 0]))
+        self.assertSequenceEqual([0.0, 0.0], list(verified['error']))
+
+    def test_ngram_lengths_1(self):
+        """that n-grams of several lengths at once are the same as finding each length separately"""
+        mi = mi_maker((V_IND,), ('0,1', '1,2'))
+        vertical = df_maker([pandas.Series(['A', 'B', 'Rest', 'D', 'E']),
+                             pandas.Series(['Z', 'X', 'Y', 'W'], index=[1, 2, 3, 4])], mi)
+        mi = mi_maker((H_IND,), ('1', '2'))
+        horizontal = df_maker([pandas.Series(['a', 'b', 'c', 'd'], index=[1, 2, 3, 4]),
+                               pandas.Series(['z', 'x'], index=[1, 3])], mi)
+        for open_ended in (False, True):
+            for terminator in ([], ['Rest']):
+                setts = {'n': [3, 2], 'vertical': 'all', 'horizontal': 'lowest',
+                         'open-ended': open_ended, 'terminator': terminator}
+                actual = ngram.NGramIndexer([vertical, horizontal], dict(setts)).run()
+                self.assertEqual(2, len(actual))
+                for n, each in zip((2, 3), actual):
+                    setts['n'] = n
+                    expected = ngram.NGramIndexer([vertical, horizontal], dict(setts)).run()
+                    self.assertTrue(each.equals(expected))
+
+    def test_ngram_maximal_1(self):
+        """that the 'maximal' setting leaves out n-grams that only happen inside the same longer
+        n-gram"""
+        mi = mi_maker((V_IND,), ('0,1',))
+        vertical = df_maker([pandas.Series(list('ABCXABCYABD'))], mi)
+        setts = {'n': [2, 3], 'vertical': 'all', 'maximal': True}
+        twos, threes = ngram.NGramIndexer([vertical], setts).run()
+        self.assertSequenceEqual(['[A] [B]'] * 3, list(twos.iloc[:, 0].dropna()))
+        self.assertSequenceEqual([0, 4, 8], list(twos.iloc[:, 0].dropna().index))
+        self.assertEqual(9, len(threes.iloc[:, 0].dropna()))
+
+    def test_ngram_index_1(self):
+        """that the NGramIndex finds where n-grams happen, which pieces share them, and still does
+        after it's saved and loaded"""
+        mi = mi_maker((V_IND,), ('0,1', '1,2'))
+        first = df_maker([pandas.Series(['A', 'B', 'A', 'B']), pandas.Series(['B', 'C', 'B', 'C'])], mi)
+        mi = mi_maker((V_IND,), ('0,1',))
+        second = df_maker([pandas.Series(['C', 'A', 'B'], index=[0.0, 1.5, 2.0])], mi)
+        setts = {'n': 2, 'vertical': 'all'}
+        index = ngram.NGramIndex()
+        index.add('first', ngram.NGramIndexer([first], dict(setts)).run_codes())
+        index.add('second', ngram.NGramIndexer([second], dict(setts)).run_codes())
+        self.assertEqual(['[A] [B]', '[B] [A]', '[B] [C]', '[C] [A]', '[C] [B]'], index.grams())
+        directory = tempfile.mkdtemp()
+        try:
+            index.save(directory)
+            loaded = ngram.NGramIndex.load(directory)
+            for each in (index, loaded):
+                found = each.find('[A] [B]')
+                self.assertSequenceEqual(['first', 'first', 'second'], list(found['piece']))
+                self.assertSequenceEqual(['0,1', '0,1', '0,1'], list(found['voices']))
+                self.assertSequenceEqual([0.0, 2.0, 1.5], list(found['offset']))
+                self.assertEqual(0, len(each.find('[D] [A]')))
+                self.assertSequenceEqual(['first'], each.pieces_with('[A] [B]', '[B] [C]'))
+                self.assertSequenceEqual([], each.pieces_with('[C] [A]', '[B] [C]'))
+                self.assertTrue(each.shared().equals(pandas.Series([2], index=['[A] [B]'])))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_ngram_index_2(self):
+        """that a loaded NGramIndex can be saved back to the directory it's mapped from"""
+        mi = mi_maker((V_IND,), ('0,1',))
+        first = df_maker([pandas.Series(['A', 'B', 'A', 'C'])], mi)
+        index = ngram.NGramIndex()
+        index.add('first', ngram.NGramIndexer([first], {'n': 2, 'vertical': 'all'}).run_codes())
+        directory = tempfile.mkdtemp()
+        try:
+            index.save(directory)
+            ngram.NGramIndex.load(directory).save(directory)
+            loaded = ngram.NGramIndex.load(directory)
+            self.assertEqual(index.grams(), loaded.grams())
+            for gram in index.grams():
+                self.assertTrue(index.find(gram).equals(loaded.find(gram)))
+        finally:
+            shutil.rmtree(directory)
+
 #--------------------------------------------------------------------------------------------------#
 # Definitions                                                                                      #
 #--------------------------------------------------------------------------------------------------#
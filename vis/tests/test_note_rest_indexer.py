@@ -30,9 +30,15 @@
 
 import os
 import unittest
+import six
+if six.PY3:
+    from unittest import mock
+else:
+    import mock
 import pandas
 from music21 import note, chord, stream, clef, bar
-from vis.analyzers.indexers import noterest
+from vis.analyzers.indexers import noterest, interval
+from vis.analyzers.experimenters import frequency
 from vis.models.indexed_piece import Importer, IndexedPiece, _find_part_names
 
 # find the pathname of the 'vis' directory
@@ -160,6 +166,45 @@ class TestMultiStopIndexer(unittest.TestCase):
         actual = noterest.unpack_chords(temp)
         self.assertTrue(actual.equals(expected))
 
+    def test_unpack_chords_2(self):
+        # Chord-free parts with different offsets next to a part with chords of different sizes.
+        temp = pandas.concat((pandas.Series((('C4',), ('D4',)), index=(0.0, 1.0)),
+                              pandas.Series((['E4', 'G4'], ('Rest',), ['C5', 'E5', 'G5']),
+                                            index=(0.0, 0.5, 1.0)),
+                              pandas.Series((('F3',),), index=(0.5,))), axis=1)
+        expected = pandas.DataFrame([['C4', 'E4', 'G4', None, None],
+                                     [None, 'Rest', None, None, 'F3'],
+                                     ['D4', 'C5', 'E5', 'G5', None]],
+                                    index=(0.0, 0.5, 1.0), columns=(0, 0, 1, 2, 0))
+        actual = noterest.unpack_chords(temp)
+        self.assertTrue(actual.equals(expected))
+
+    def test_unpack_chords_3(self):
+        # Chord-free parts are unwrapped directly, without the ragged form.
+        temp = pandas.concat((pandas.Series((('C4',), ('D4',)), index=(0.0, 1.0)),
+                              pandas.Series((('Rest',), ('F3',)), index=(0.5, 1.0)),
+                              pandas.Series()), axis=1)
+        expected = pandas.DataFrame([['C4', None], [None, 'Rest'], ['D4', 'F3']],
+                                    index=(0.0, 0.5, 1.0), columns=(0, 0))
+        with mock.patch.object(noterest.RaggedMultiStop, 'from_events') as mock_from:
+            actual = noterest.unpack_chords(temp)
+            self.assertEqual(0, mock_from.call_count)
+        self.assertTrue(actual.equals(expected))
+        self.assertTrue(noterest.RaggedMultiStop.from_events(temp).unpack().equals(expected))
+
+    def test_unpack_chords_4(self):
+        # Only a part with chords goes through the ragged form; a monophonic part next to it doesn't.
+        temp = pandas.concat((pandas.Series((['E4', 'G4'], ('Rest',)), index=(0.0, 1.0)),
+                              pandas.Series((('C3',), ('D3',)), index=(0.0, 0.5))), axis=1)
+        expected = pandas.DataFrame([['E4', 'G4', 'C3'], [None, None, 'D3'], ['Rest', None, None]],
+                                    index=(0.0, 0.5, 1.0), columns=(0, 1, 0))
+        real = noterest.RaggedMultiStop.from_events
+        with mock.patch.object(noterest.RaggedMultiStop, 'from_events', side_effect=real) as mock_from:
+            actual = noterest.unpack_chords(temp)
+            self.assertEqual(1, mock_from.call_count)
+            self.assertSequenceEqual([0], list(mock_from.call_args[0][0].columns))
+        self.assertTrue(actual.equals(expected))
+
     def test_multistop_ind_func_1(self):
         # Check the indexer_func on note, rest, and chord objects
         expected = pandas.Series((('A-4',), ('Rest',), ['F#5', 'D#5', 'A-4']))
@@ -193,6 +238,44 @@ class TestMultiStopIndexer(unittest.TestCase):
         # expected = pandas.read_pickle(os.path.join(VIS_PATH, 'tests', 'corpus', 'expecteds', 'test_multistop.pickle'))
         # self.assertTrue(actual.equals(expected))
 
+    def test_multistop_ragged_1(self):
+        # The ragged form of the results holds the same events and converts back to the DataFrame
+        ip = Importer(os.path.join(VIS_PATH, 'tests', 'corpus', 'prelude28-20.mid'))
+        ms_indexer = noterest.MultiStopIndexer(ip._get_m21_nrc_objs_no_tied())
+        expected = ms_indexer.run()
+        actual = ms_indexer.run_ragged()
+        self.assertTrue(actual.to_frame().equals(expected))
+        self.assertSequenceEqual(list(actual.to_frame().columns), list(expected.columns))
+        self.assertEqual(2, actual.parts)
+        width = actual.lengths[0].max()
+        self.assertSequenceEqual(expected.iloc[0, :width].dropna().tolist(),
+                                 actual.event(0, expected.index[0]))
+
+    def test_multistop_ragged_2(self):
+        # Frequencies counted from the ragged form are the same as from the DataFrame
+        temp = pandas.concat((pandas.Series((('C4',), ['C4', 'E4'], ('Rest',))),
+                              pandas.Series((['E4', 'G4', 'C5'], ('E4',), ('E4',)))), axis=1)
+        ragged = noterest.RaggedMultiStop.from_events(temp)
+        self.assertSequenceEqual(['E4', 'G4', 'C5'], ragged.event(1, 0))
+        self.assertSequenceEqual(['Rest'], ragged.event(0, 2))
+        expected = frequency.FrequencyExperimenter(ragged.to_frame()).run()[0]
+        actual = frequency.FrequencyExperimenter(ragged).run()[0]
+        self.assertTrue(actual.equals(expected))
+        self.assertSequenceEqual(list(actual.columns), list(expected.columns))
+
+    def test_multistop_ragged_3(self):
+        # The IntervalIndexer reads the ragged form directly, with the same results
+        temp = pandas.concat((pandas.Series((('C4',), ['C4', 'E4'], ('Rest',))),
+                              pandas.Series((['E4', 'G4', 'C5'], ('E4',), ('F4',)))), axis=1)
+        ragged = noterest.RaggedMultiStop.from_events(temp)
+        expected = interval.IntervalIndexer(ragged.to_frame()).run()
+        with mock.patch.object(noterest.RaggedMultiStop, 'to_frame') as mock_frame:
+            actual = interval.IntervalIndexer(ragged).run()
+            self.assertEqual(0, mock_frame.call_count)
+        self.assertTrue(actual.equals(expected))
+        self.assertTrue(interval.IntervalIndexer(ragged).run_codes().to_frame(0).equals(
+            interval.IntervalIndexer(ragged.to_frame()).run_codes().to_frame(0)))
+
     def test_multistop_indexer_3(self):
         # Integration test on a piece with multiple voices in each part
         ip = Importer(os.path.join(VIS_PATH, 'tests', 'corpus', 'prelude28-20.mid'))
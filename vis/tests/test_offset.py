@@ -35,7 +35,9 @@ if six.PY3:
     from unittest import mock
 else:
     import mock
+import numpy
 import pandas
+from vis.analyzers.indexers import offset
 from vis.analyzers.indexers.offset import FilterByOffsetIndexer
 from vis.models.indexed_piece import Importer
 # find pathname to the 'vis' directory
@@ -81,6 +83,17 @@ class TestOffsetIndexerSinglePart(unittest.TestCase):
         except RuntimeError as run_err:
             self.assertEqual(FilterByOffsetIndexer._ZERO_PART_ERROR, run_err.args[0])
     
+    def test_init_5(self):
+        # when the quarterLengths are an empty list, or one of them is less than 0.001
+        in_val = [pandas.Series(['a', 'b', 'c', 'd'], index=[0.0, 0.4, 1.1, 2.1])]
+        for q_lengths in ([], [1.0, 0.0003]):
+            setts = {u'quarterLength': q_lengths}
+            self.assertRaises(RuntimeError, FilterByOffsetIndexer, in_val, setts)
+            try:
+                FilterByOffsetIndexer(in_val, setts)
+            except RuntimeError as run_err:
+                self.assertEqual(FilterByOffsetIndexer._QLENGTH_TOO_SMALL_ERROR, run_err.args[0])
+
     def test_run_1_a(self):
         # try statement correctly finds minimum start_offset and whole index when no series is empty.
         in_val = [pandas.Series(['A', 'B'], name=('N', '0')),
@@ -116,6 +129,15 @@ class TestOffsetIndexerSinglePart(unittest.TestCase):
         self.assertListEqual(list(actual.index), [])
         self.assertEqual(len(actual.columns), 2)
 
+    def test_run_2_c(self):
+        # when one of the passed series is empty, the others still start where they should.
+        in_val = [pandas.Series(['A', 'B'], index=[4.0, 5.0], name=('N', '0')),
+                  pandas.Series(name=('N', '1'))]
+        settings = {'quarterLength': 1.0, 'method': 'ffill'}
+        actual = FilterByOffsetIndexer(in_val, settings).run()
+        self.assertListEqual(list(actual.index), [4.0, 5.0])
+        self.assertEqual(len(actual.columns), 2)
+
     def test_offset_1part_1(self):
         # 0 length
         in_val = [pandas.Series(name=('Indexer', '0'))]
@@ -260,6 +282,57 @@ class TestOffsetIndexerSinglePart(unittest.TestCase):
         self.assertSequenceEqual(list(expected.values), list(actual.values))  # same rows?
         self.assertSequenceEqual(list(expected.index), list(actual.index))  # same index?
 
+    def test_offset_1part_11(self):
+        # triplets are observed exactly, rather than at thousandths of a quarter note
+        in_val = [pandas.Series(['a', 'b', 'c', 'd', 'e'], index=[0.0, 1/3.0, 2/3.0, 1.0, 4/3.0],
+                                name=('N', '0'))]
+        expected = pandas.Series(['a', 'b', 'c', 'd', 'e'], index=[0.0, 1/3.0, 2/3.0, 1.0, 4/3.0],
+                                 name=('N', '0'))
+        ind = FilterByOffsetIndexer(in_val, {u'quarterLength': 1/3.0})
+        actual = ind.run()['offset.FilterByOffsetIndexer']
+        self.assertEqual(1, len(actual.columns))  # same number of columns?
+        actual = actual['0']
+        self.assertSequenceEqual(list(expected.values), list(actual.values))  # same rows?
+        self.assertSequenceEqual(list(expected.index), list(actual.index))  # same index?
+
+    def test_offset_1part_12(self):
+        # with no method, only the events on observed offsets are kept
+        in_val = [pandas.Series([1, 2, 3], index=[0.0, 0.5, 2.0], name=('N', '0'))]
+        ind = FilterByOffsetIndexer(in_val, {u'quarterLength': 1.0, 'method': None})
+        actual = ind.run()['offset.FilterByOffsetIndexer']['0']
+        self.assertSequenceEqual([0.0, 1.0, 2.0], list(actual.index))
+        self.assertEqual(1.0, actual.iat[0])
+        self.assertTrue(pandas.isnull(actual.iat[1]))
+        self.assertEqual(3.0, actual.iat[2])
+
+    def test_offset_1part_13(self):
+        # several quarterLengths at once give the same results as one at a time
+        in_val = [pandas.Series(['a', 'b', 'c', 'd'], index=[0.0, 0.4, 1.1, 2.1], name=('N', '0')),
+                  pandas.Series(['x', 'y'], index=[0.5, 1.0], name=('N', '1'))]
+        q_lengths = [0.5, 1.0, 2.0, 1/3.0]
+        actual = FilterByOffsetIndexer(in_val, {u'quarterLength': q_lengths}).run()
+        self.assertSequenceEqual(sorted(q_lengths), sorted(actual))
+        for q_length in q_lengths:
+            expected = FilterByOffsetIndexer(in_val, {u'quarterLength': q_length}).run()
+            self.assertTrue(actual[q_length].equals(expected))
+
+    def test_offset_1part_14(self):
+        # quarterLengths with a least common denominator of more than _MAX_TICKS, and offsets that
+        # make it more than that with a quarterLength that doesn't
+        in_val = [pandas.Series(['a', 'b', 'c'], index=[0.0, 0.5, 2.0], name=('N', '0'))]
+        q_lengths = [1/7., 1/9., 1/11., 1/13., 1/17., 1/19.]
+        actual = FilterByOffsetIndexer(in_val, {u'quarterLength': q_lengths}).run()
+        self.assertSequenceEqual(sorted(q_lengths), sorted(actual))
+        for q_length in q_lengths:
+            expected = FilterByOffsetIndexer(in_val, {u'quarterLength': q_length}).run()
+            self.assertTrue(actual[q_length].equals(expected))
+            self.assertEqual('c', expected.iloc[-1, 0])
+        in_val = [pandas.Series(['a', 'b', 'c'], index=[0.0, 1/997., 1/991. + 1/983.],
+                                name=('N', '0'))]
+        actual = FilterByOffsetIndexer(in_val, {u'quarterLength': 0.5}).run()
+        self.assertSequenceEqual([0.0, 0.5], list(actual.index))
+        self.assertSequenceEqual(['a', 'c'], list(actual.iloc[:, 0]))
+
 
 class TestOffsetIndexerManyParts(unittest.TestCase):
     def test_offset_xparts_0a(self):
@@ -397,6 +470,41 @@ class TestOffsetIndexerManyParts(unittest.TestCase):
         actual = ip.get_data('offset', data=nr, settings={'quarterLength': 'dynamic'})
         self.assertTrue(actual.equals(expected))
 
+    def test_dynamic_offset_method_2(self):
+        # the dynamic offsets of a piece whose regular grid changes, in 2/1, as they were before
+        # _dynamic_run() used numpy
+        expected = os.path.join(VIS_PATH, 'tests', 'expecteds', 'test_dynamic_offset_jos2308.pickle')
+        expected = pandas.read_pickle(expected)
+        ip = Importer(os.path.join(VIS_PATH, 'tests', 'corpus', 'Jos2308.krn'))
+        nr = ip.get_data('noterest')
+        actual = ip.get_data('offset', data=nr, settings={'quarterLength': 'dynamic'})
+        self.assertTrue(actual.equals(expected))
+
+    def test_dynamic_lend_backwards(self):
+        # weak dissonances give their durations to the last note before them, skipping empty rows
+        durations = numpy.array([[1.0], [0.5], [0.25], [2.0], [numpy.nan], [1.0]])
+        lenders = numpy.array([[False], [True], [True], [False], [False], [True]])
+        offset._lend_backwards(durations, lenders)
+        numpy.testing.assert_array_equal(durations[:, 0], [1.75, 0.75, 0.25, 3.0, numpy.nan, 1.0])
+
+    def test_dynamic_borrow_forwards(self):
+        # strong dissonances take the durations and note of the notes up to the next consonance
+        durations = numpy.array([[1.0], [2.0], [0.5], [1.0], [numpy.nan], [4.0]])
+        notes = numpy.array([['A'], ['B'], ['C'], ['D'], [numpy.nan], ['E']], dtype=object)
+        borrowers = numpy.array([[False], [True], [True], [False], [False], [True]])
+        offset._borrow_forwards(durations, notes, borrowers)
+        numpy.testing.assert_array_equal(durations[:, 0], [1.0, 3.5, numpy.nan, numpy.nan,
+                                                           numpy.nan, 4.0])
+        self.assertSequenceEqual(['A', 'D', 'E'], list(notes[[0, 1, 5], 0]))
+        self.assertTrue(pandas.isnull(notes[[2, 3, 4], 0]).all())
+
+    def test_dynamic_confirmed(self):
+        # readings are confirmed by the most common dissonance level or the last confirmed reading
+        levels = numpy.array([[2.0], [2.0], [4.0], [4.0], [numpy.nan]])
+        readings = numpy.array([2.0, 4.0, 4.0, 2.0, 4.0])
+        actual = offset._confirmed(levels, readings, 1)
+        self.assertSequenceEqual([True, False, True, False, True], list(actual))
+
 
 #--------------------------------------------------------------------------------------------------#
 # Definitions                                                                                      #
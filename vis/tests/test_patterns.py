@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#--------------------------------------------------------------------------------------------------
+# Program Name:           vis
+# Program Description:    Helps analyze music with computers.
+#
+# Filename:               vis/tests/test_patterns.py
+# Purpose:                Tests for models/patterns.py.
+#
+# Copyright (C) 2016 Alexander Morgan
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#--------------------------------------------------------------------------------------------------
+"""
+Tests for :py:class:`~vis.models.patterns.PatternSet`.
+"""
+
+from unittest import TestCase, TestLoader
+from vis.models.patterns import PatternSet
+
+
+class TestPatternSet(TestCase):
+    """Tests for PatternSet"""
+
+    def brute_force(self, pattern_set, tokens):
+        """Find the matches of every variant by comparing it at every position."""
+        post = []
+        for number, (_, _, variant) in enumerate(pattern_set.variants):
+            for start in range(len(tokens) - len(variant) + 1):
+                if all(x == '*' or x == y for x, y in zip(variant, tokens[start:start + len(variant)])):
+                    post.append((start, start + len(variant) - 1, number))
+        return sorted(post)
+
+    def test_search_1(self):
+        """overlapping patterns, patterns inside others, and wildcards"""
+        pattern_set = PatternSet(['a b', 'b c', '* c', 'a * c', 'c', 'a b c a'], melodic=False)
+        tokens = list('abcabxcabca')
+        expected = self.brute_force(pattern_set, tokens)
+        actual = pattern_set.search(tokens)
+        self.assertEqual(expected, sorted(actual))
+        self.assertEqual((0, 3), actual[[x[2] for x in actual].index(5)][:2])
+
+    def test_search_2(self):
+        """a pattern that is only wildcards, and one longer than the intervals"""
+        pattern_set = PatternSet(['* *', 'a b c d'], melodic=False)
+        self.assertEqual([(0, 1, 0), (1, 2, 0)], pattern_set.search(['a', 'b', 'c']))
+
+    def test_search_3(self):
+        """partial matches that never complete are forgotten without losing later matches"""
+        pattern_set = PatternSet(['a * * b', 'a b * * c', 'c'], melodic=False)
+        tokens = list('axxcab' * 50 + 'abxxcab')
+        self.assertEqual(self.brute_force(pattern_set, tokens), sorted(pattern_set.search(tokens)))
+
+    def test_transformations_1(self):
+        """the variants of a melodic pattern"""
+        pattern_set = PatternSet(['[2] [-3] [P1]'],
+                                 ['inversion', 'retrograde', 'retrograde inversion'])
+        expected = [('[2] [-3] [P1]', 'original', ('2', '-3', 'P1')),
+                    ('[2] [-3] [P1]', 'inversion', ('-2', '3', 'P1')),
+                    ('[2] [-3] [P1]', 'retrograde', ('P1', '3', '-2')),
+                    ('[2] [-3] [P1]', 'retrograde inversion', ('P1', '-3', '2'))]
+        self.assertEqual(expected, pattern_set.variants)
+
+    def test_transformations_3(self):
+        """chromatic unisons aren't inverted, so the inversion of a pattern with one still matches"""
+        pattern_set = PatternSet(['[2] [0] [-5]'], ['inversion', 'retrograde inversion'])
+        expected = [('[2] [0] [-5]', 'original', ('2', '0', '-5')),
+                    ('[2] [0] [-5]', 'inversion', ('-2', '0', '5')),
+                    ('[2] [0] [-5]', 'retrograde inversion', ('-5', '0', '2'))]
+        self.assertEqual(expected, pattern_set.variants)
+        tokens = ['-2', '0', '5', '-5', '0', '2', '0', '-5']
+        self.assertEqual([(0, 2, 1), (3, 5, 2), (5, 7, 0)], sorted(pattern_set.search(tokens)))
+
+    def test_transformations_2(self):
+        """vertical patterns aren't inverted, and the same variant is only kept once"""
+        pattern_set = PatternSet([['3', '6', '3']], ['inversion', 'retrograde', 'permutations'],
+                                 melodic=False)
+        expected = [('3 6 3', 'original', ('3', '6', '3')),
+                    ('3 6 3', 'permutation', ('3', '3', '6')),
+                    ('3 6 3', 'permutation', ('6', '3', '3'))]
+        self.assertEqual(expected, pattern_set.variants)
+        tokens = ['3', '3', '6', '3', '3']
+        self.assertEqual(self.brute_force(pattern_set, tokens), sorted(pattern_set.search(tokens)))
+
+    def test_errors_1(self):
+        """unknown transformations and empty patterns"""
+        self.assertRaises(RuntimeError, PatternSet, ['2 2'], ['augmentation'])
+        self.assertRaises(RuntimeError, PatternSet, [''])
+
+
+#--------------------------------------------------------------------------------------------------#
+# Definitions                                                                                      #
+#--------------------------------------------------------------------------------------------------#
+PATTERN_SET_SUITE = TestLoader().loadTestsFromTestCase(TestPatternSet)
@@ -76,6 +76,18 @@ class TestWindexer(TestCase):
         actual = windexer.Windexer(NOTES, {'window_size': 3}).run()
         self.assertTrue(actual.equals(WINDOW3))
 
+    def test_windows(self):
+        actual = list(windexer.Windexer(NOTES, {'window_size': 3}).windows())
+        self.assertEqual(4, len(actual))
+        for i, window in enumerate(actual):
+            self.assertTrue(window.equals(WINDOW3.iloc[3 * i:3 * i + 3]))
+
+    def test_view(self):
+        actual = windexer.Windexer(NOTES).view()
+        self.assertEqual((3, 4, 1), actual.shape)
+        self.assertSequenceEqual(list(WINDOW4.values.ravel()), list(actual.ravel()))
+        self.assertFalse(actual.flags.writeable)
+
     def test_init4(self):
 
         setts = {'window_size': 465}
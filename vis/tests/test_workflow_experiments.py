@@ -83,11 +83,12 @@ class Intervals(TestCase):
         mock_guc.return_value = [[0, 1]]
         voice_combos = str(mock_guc.return_value)
         exp_voice_combos = ['0,1']
-        test_settings = {'simple or compound': 'compound', 'quality': False}
+        test_settings = {'simple or compound': 'compound', 'quality': False, 'pairs': [(0, 1)]}
         test_pieces = [MagicMock(spec_set=IndexedPiece) for _ in range(3)]
         returns = ['get_data() {}'.format(i) for i in range(len(test_pieces))]
         for piece in test_pieces:
             piece.get_data.side_effect = lambda *x: returns.pop(0)
+            piece.metadata.return_value = ['Soprano', 'Bass']
         exp_into_mock_rep = ['get_data() {}'.format(i) for i in range(len(test_pieces))]
         mock_rep_returns = ['IndP-{} no pairs'.format(i) for i in range(len(test_pieces))]
         mock_rep.side_effect = lambda *x: mock_rep_returns.pop(0)
@@ -112,6 +113,33 @@ class Intervals(TestCase):
         for i in range(len(actual)):
             self.assertSequenceEqual(expected[i], actual[i])
 
+    @mock.patch('vis.workflow.WorkflowManager._remove_extra_pairs')
+    @mock.patch('vis.workflow.WorkflowManager._run_freq_agg')
+    @mock.patch('vis.workflow.WorkflowManager._get_unique_combos')
+    def test_intervs_2b(self, mock_guc, mock_rfa, mock_rep):
+        """Same as test_intervs_2() but with a reversed pair and a part the piece doesn't have,
+           which aren't asked of the IntervalIndexer (but still go to _remove_extra_pairs())."""
+        mock_guc.return_value = [[0, 1], [1, 0], [0, 2]]
+        voice_combos = str(mock_guc.return_value)
+        exp_voice_combos = ['0,1', '1,0', '0,2']
+        test_settings = {'simple or compound': 'compound', 'quality': False, 'pairs': [(0, 1)]}
+        test_piece = MagicMock(spec_set=IndexedPiece)
+        test_piece.get_data.return_value = 'get_data()'
+        test_piece.metadata.return_value = ['Soprano', 'Bass']
+        mock_rep.return_value = 'IndP no pairs'
+        exp_analyzers = [noterest.NoteRestIndexer, interval.IntervalIndexer]
+
+        test_wc = WorkflowManager([test_piece])
+        test_wc.settings(None, 'include rests', True)
+        test_wc.settings(None, 'count frequency', False)
+        test_wc.settings(None, 'voice combinations', voice_combos)
+        actual = test_wc._intervs()  # pylint: disable=protected-access
+
+        test_piece.get_data.assert_called_once_with(exp_analyzers, test_settings)
+        mock_rep.assert_called_once_with('get_data()', exp_voice_combos)
+        self.assertEqual(0, mock_rfa.call_count)
+        self.assertSequenceEqual(['IndP no pairs'], actual)
+
     @mock.patch('vis.workflow.WorkflowManager._remove_extra_pairs')
     @mock.patch('vis.workflow.WorkflowManager._run_freq_agg')
     @mock.patch('vis.workflow.WorkflowManager._get_unique_combos')
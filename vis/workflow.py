@@ -569,10 +569,7 @@ class WorkflowManager(object):
             if self.settings(i, 'filter repeats'):
                 analyzer_list.append()
 
-            # 3.) run the analyzers
-            vert_ints = piece.get_data(analyzer_list, setts)
-
-            # 4.) remove the voice-pair combinations we don't want
+            # 3.) find the voice-pair combinations we want, so only those get calculated
             combos = str(self.settings(i, 'voice combinations'))
             if combos != 'all' and combos != 'all pairs' and combos != 'None':  # "if we remove pairs"
                 # NB: this next line may raise a ValueError, but we can't do anything to save it
@@ -581,8 +578,21 @@ class WorkflowManager(object):
                 for pair in combos:
                     if 2 != len(pair):
                         raise RuntimeError(WorkflowManager._REQUIRE_PAIRS_ERROR.format(len(pair)))
+                # only ask for pairs the IntervalIndexer can make; like _remove_extra_pairs(), we
+                # quietly ignore reversed pairs and parts the piece doesn't have
+                num_parts = len(piece.metadata('parts'))
+                setts['pairs'] = [tuple(pair) for pair in combos
+                                  if 0 <= pair[0] < pair[1] < num_parts]
                 # convert to what we'll find in the DataFrame
                 combos = [str(x).replace(' ', '')[1:-1] for x in combos]
+            else:
+                combos = None
+
+            # 4.) run the analyzers
+            vert_ints = piece.get_data(analyzer_list, setts)
+
+            # 5.) remove the voice-pair combinations we don't want
+            if combos is not None:
                 vert_ints = WorkflowManager._remove_extra_pairs(vert_ints, combos)
 
             # 6.) remove "Rest" entries, if required